@@ -2,11 +2,20 @@ from flask import Flask
 from flask_cors import CORS
 from .config import Config, config  # Import the config dictionary
 from flask_restful import Api
-from .extensions import db, migrate, bcrypt, cors, api  # Import all extensions
+from .extensions import db, migrate, bcrypt, cors, api, response_cache, password_hasher, sql_instrumentation, metrics, statement_timeouts, read_your_writes, seat_holds  # Import all extensions
+from .commands import register_commands
+from .utils.jwt_utils import verified_tokens
+from .utils.user_cache import user_summaries
+from .utils.idempotency import replayed_responses
+from .utils.db_settings import engine_options
+from .utils.json_output import output_json
+from .utils.sweeper import start_sweeper
+from .utils.payments import start_payment_worker
 from .routes.auth_routes import RegisterResource, LoginResource, CheckSessionResource, LogoutResource
-from app.routes.admin_routes import AddDriverResource, ViewAllUsersResource, ViewAllBookingsResource, ViewAllTransactionsResource, AssignDriverToBusResource, ChangeUserRoleResource,  ViewMyBusesResource
+from app.routes.admin_routes import AddDriverResource, ViewAllUsersResource, ViewAllBookingsResource, ViewAllTransactionsResource, ExportBookingsResource, ExportTransactionsResource, AssignDriverToBusResource, ChangeUserRoleResource, ViewCacheStatsResource, ViewMyBusesResource
 from app.routes.driver_routes import AddBusResource, DeleteDriverResource, FetchDriversResource, UpdateBusResource, DeleteBusResource, ScheduleBusResource,  UpdatePriceResource, MyAssignedBusesResource
-from app.routes.user_routes import BookMultipleSeatsResource, ConfirmPaymentResource, SimpleBookingResource, UserSelectSeatsResource, ViewAvailableSeatsResource, ViewAvailableBusesResource, ViewMyBookingsResource, CancelBookingResource, ViewAvailableBusesResource, BookSeatResource, UpdateBookingResource, SearchBusResource, SimulatePaymentResource
+from app.routes.metrics_routes import MetricsResource
+from app.routes.user_routes import BookMultipleSeatsResource, ConfirmPaymentResource, SimpleBookingResource, UserSelectSeatsResource, ViewAvailableSeatsResource, ViewAvailableBusesResource, ViewMyBookingsResource, CancelBookingResource, ViewAvailableBusesResource, BookSeatResource, UpdateBookingResource, SearchBusResource, SimulatePaymentResource, SeatHoldResource, ConfirmSeatHoldResource, ConfirmOrderPaymentResource, PaymentStatusResource
 
 import os
 
@@ -18,11 +27,24 @@ def create_app():
     env = os.getenv("FLASK_ENV", "development")  # Default to development
     app.config.from_object(config[env])  # Load the appropriate config class
     api = Api(app) 
+    api.representation('application/json')(output_json)  # orjson-backed encoder (datetimes, enums, bytes)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))  # Pool size, pre-ping, timeouts
+
     # Initialize extensions
     db.init_app(app)
+    statement_timeouts.init_app(app)  # Per-Resource statement timeout profiles
+    read_your_writes.init_app(app)  # Keep a client on the primary right after its writes
+    sql_instrumentation.init_app(app)  # Per-request query counts and N+1 warnings
+    metrics.init_app(app)  # Prometheus request/pool/booking metrics
     migrate.init_app(app, db)
     bcrypt.init_app(app)
+    password_hasher.init_app(app)  # Initialize the bounded bcrypt pool
     cors.init_app(app)  # Initialize CORS
+    response_cache.init_app(app)  # Initialize the public listing cache
+    seat_holds.init_app(app)  # Checkout seat holds (in-process or Redis)
+    verified_tokens.configure(ttl=app.config["TOKEN_CACHE_TTL"], max_entries=app.config["TOKEN_CACHE_MAX_ENTRIES"])
+    user_summaries.configure(ttl=app.config["USER_CACHE_TTL"], max_entries=app.config["USER_CACHE_MAX_ENTRIES"])
+    replayed_responses.configure(ttl=app.config["IDEMPOTENCY_KEY_TTL"], max_entries=app.config["IDEMPOTENCY_CACHE_MAX_ENTRIES"])
     api.init_app(app)  # Initialize Flask-RESTful
    
 
@@ -47,9 +69,12 @@ def create_app():
     api.add_resource(ViewAllUsersResource, '/admin/users')
     api.add_resource(ViewAllBookingsResource, '/admin/bookings')
     api.add_resource(ViewAllTransactionsResource, '/admin/transactions')
+    api.add_resource(ExportBookingsResource, '/admin/export/bookings')
+    api.add_resource(ExportTransactionsResource, '/admin/export/transactions')
     api.add_resource(AssignDriverToBusResource, '/admin/assign_driver')
     api.add_resource(ChangeUserRoleResource, '/admin/change_user_role')
     api.add_resource(ViewMyBusesResource,'/admin/my_buses' )
+    api.add_resource(ViewCacheStatsResource, '/admin/cache_stats')
     api.add_resource(FetchDriversResource, '/admin/drivers')  
     api.add_resource(DeleteDriverResource, '/admin/drivers/<int:driver_id>')
     
@@ -66,21 +91,34 @@ def create_app():
 
     # User Routes
     api.add_resource(BookSeatResource, '/user/book_seat')
-    api.add_resource(UpdateBookingResource, '/user/update_booking>')
+    api.add_resource(UpdateBookingResource, '/user/update_booking/<int:booking_id>')
     api.add_resource(ViewAvailableBusesResource, '/user/buses')
     api.add_resource(ViewAvailableSeatsResource, '/bus/<int:bus_id>')
     api.add_resource(SearchBusResource,  '/buses/search') 
     api.add_resource(BookMultipleSeatsResource, '/api/bookings/multiple')
-    api.add_resource(CancelBookingResource, '/user/cancel_bookings')
+    api.add_resource(CancelBookingResource, '/user/cancel_bookings/<int:booking_id>')
     api.add_resource(ViewMyBookingsResource, '/user/bookings/<int:customer_id>')
     api.add_resource(ConfirmPaymentResource, '/api/bookings/<int:booking_id>/confirm_payment')
+    api.add_resource(ConfirmOrderPaymentResource, '/api/orders/<int:order_id>/confirm_payment')
+    api.add_resource(PaymentStatusResource, '/api/payments/<int:job_id>')
     api.add_resource(UserSelectSeatsResource, '/buses/<int:bus_id>/seats')
     api.add_resource(SimpleBookingResource, '/simple-booking')
+    api.add_resource(SeatHoldResource, '/buses/<int:bus_id>/holds')
+    api.add_resource(ConfirmSeatHoldResource, '/buses/<int:bus_id>/holds/confirm')
+
+    # Metrics
+    api.add_resource(MetricsResource, '/metrics')
 
 
 
+    # Maintenance CLI commands
+    register_commands(app)
+
     # Create database tables (if they don't exist)
     with app.app_context():
         db.create_all()
 
+    start_sweeper(app)  # Expire unpaid bookings in the background, if configured
+    start_payment_worker(app)  # Process queued payments in the background once serving requests
+
     return app
\ No newline at end of file
@@ -0,0 +1,174 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, or_, select, update
+from app.extensions import db
+from app.models.models import Booking, BookingStatus, Bus
+from app.utils.places import parse_route
+from app.utils.replica import REPLICA_BIND
+from app.utils.sweeper import sweep_pending_bookings
+from app.utils.idempotency import purge_idempotency_keys
+from app.utils.payments import process_payment_jobs, run_payment_worker
+
+
+def register_commands(app):
+    """
+    Registers the maintenance commands on the Flask CLI (run with `flask <command>`).
+    """
+    app.cli.add_command(backfill_routes)
+    app.cli.add_command(sync_replica)
+    app.cli.add_command(repair_seat_counters)
+    app.cli.add_command(expire_bookings)
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(payment_worker)
+
+
+@click.command('backfill-routes')
+@click.option('--batch-size', default=1000, show_default=True, help='Buses updated per transaction.')
+@with_appcontext
+def backfill_routes(batch_size):
+    """
+    Fill origin/destination for buses created before they were stored.
+    """
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.session.query(Bus.id, Bus.route).filter(
+            Bus.id > last_id,
+            Bus.origin.is_(None)
+        ).order_by(Bus.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        values = []
+        for row in rows:
+            origin, destination = parse_route(row.route)
+            if origin is not None:
+                values.append({'id': row.id, 'origin': origin, 'destination': destination})
+        if values:
+            db.session.execute(update(Bus), values)
+        db.session.commit()
+
+        updated += len(values)
+        last_id = rows[-1].id
+
+    click.echo(f'Backfilled origin/destination for {updated} buses.')
+
+
+@click.command('sync-replica')
+@with_appcontext
+def sync_replica():
+    """
+    Copy the primary SQLite database over the replica one (local testing only;
+    real replicas are kept in sync by the database server).
+    """
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is None:
+        raise click.ClickException('No replica bind configured (set DATABASE_REPLICA_URL).')
+    if db.engine.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise click.ClickException('sync-replica only copies SQLite files; use the server\'s replication instead.')
+
+    source = db.engine.raw_connection()
+    target = replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+    click.echo(f'Copied {db.engine.url.database} to {replica.url.database}.')
+
+
+def _booking_count(status):
+    return select(func.count(Booking.id)).where(
+        Booking.bus_id == Bus.id,
+        Booking.status == status
+    ).correlate(Bus).scalar_subquery()
+
+
+@click.command('repair-seat-counters')
+@click.option('--batch-size', default=1000, show_default=True, help='Buses checked per transaction.')
+@click.option('--rebuild-maps', is_flag=True, help='Also drop every seat map so it is rebuilt from bookings on next use.')
+@with_appcontext
+def repair_seat_counters(batch_size, rebuild_maps):
+    """
+    Recompute confirmed_seats/pending_seats from the bookings table.
+
+    Buses whose counters disagree with their bookings also get their seat map
+    dropped (it is rebuilt from bookings on next use) and their version bumped.
+    """
+    confirmed = _booking_count(BookingStatus.CONFIRMED)
+    pending = _booking_count(BookingStatus.PENDING)
+    last_id = 0
+    checked = repaired = 0
+    while True:
+        bus_ids = db.session.scalars(
+            select(Bus.id).where(Bus.id > last_id).order_by(Bus.id).limit(batch_size)
+        ).all()
+        if not bus_ids:
+            break
+
+        criteria = [Bus.id.in_(bus_ids)]
+        if not rebuild_maps:
+            criteria.append(or_(Bus.confirmed_seats != confirmed, Bus.pending_seats != pending))
+        result = db.session.execute(
+            update(Bus).where(*criteria).values(
+                confirmed_seats=confirmed,
+                pending_seats=pending,
+                seat_map=None,
+                version=Bus.version + 1
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        checked += len(bus_ids)
+        repaired += result.rowcount
+        last_id = bus_ids[-1]
+
+    click.echo(f'Checked {checked} buses, repaired {repaired}.')
+
+
+@click.command('expire-bookings')
+@click.option('--hold-minutes', type=int, default=None, help='Hold window (default: BOOKING_HOLD_MINUTES).')
+@click.option('--batch-size', type=int, default=None, help='Bookings per transaction (default: BOOKING_SWEEP_BATCH_SIZE).')
+@with_appcontext
+def expire_bookings(hold_minutes, batch_size):
+    """
+    Cancel pending bookings older than the hold window and free their seats.
+    """
+    config = current_app.config
+    hold_minutes = hold_minutes if hold_minutes is not None else config['BOOKING_HOLD_MINUTES']
+    expired, buses = sweep_pending_bookings(
+        hold_minutes,
+        batch_size or config['BOOKING_SWEEP_BATCH_SIZE'],
+        config['BOOKING_SWEEP_PAUSE']
+    )
+    click.echo(f'Released {expired} seats on {buses} buses (pending for over {hold_minutes} minutes).')
+
+
+@click.command('purge-idempotency-keys')
+@click.option('--batch-size', default=1000, show_default=True, help='Keys deleted per transaction.')
+@with_appcontext
+def purge_idempotency_keys_command(batch_size):
+    """
+    Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL.
+    """
+    deleted = purge_idempotency_keys(batch_size)
+    click.echo(f'Deleted {deleted} expired idempotency keys.')
+
+
+@click.command('payment-worker')
+@click.option('--once', is_flag=True, help='Process one batch of due payments and exit.')
+@click.option('--poll-interval', type=float, default=1.0, show_default=True, help='Seconds to wait when the queue is empty.')
+@click.option('--batch-size', type=int, default=None, help='Payments claimed per batch (default: PAYMENT_WORKER_BATCH_SIZE).')
+@with_appcontext
+def payment_worker(once, poll_interval, batch_size):
+    """
+    Process queued payments: charge the gateway, record the transaction and
+    confirm the booking or order. Run as many workers as needed.
+    """
+    if once:
+        processed = process_payment_jobs(batch_size)
+        click.echo(f'Processed {processed} payments.')
+        return
+    click.echo('Payment worker started.')
+    run_payment_worker(current_app._get_current_object(), poll_interval, batch_size)
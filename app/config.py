@@ -11,9 +11,26 @@ class Config:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default_jwt_secret_key")
 
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
+    SQLALCHEMY_BINDS = {"replica": os.getenv("DATABASE_REPLICA_URL")} if os.getenv("DATABASE_REPLICA_URL") else {}  # GET requests read from the replica
+    READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 10))  # Reads stay on the primary this long after a client's write
+    READ_YOUR_WRITES_COOKIE = "read_primary_until"
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # Avoids SQLAlchemy warning
 
+    # Engine pool and timeouts (SQLALCHEMY_ENGINE_OPTIONS is built from these in create_app)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))  # Connections kept open per worker process
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))  # Extra connections allowed under load
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # Test connections before use
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))  # Default per-statement limit (PostgreSQL, 0 = none)
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(os.getenv("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", 60000))  # Close sessions left idle in a transaction
+    DB_TRANSACTION_TIMEOUT_MS = int(os.getenv("DB_TRANSACTION_TIMEOUT_MS", 0))  # Whole-transaction limit (PostgreSQL 17+, 0 = none)
+    DB_TIMEOUT_PROFILES = {  # Statement limits (ms) for Resources with a timeout_profile
+        "booking": int(os.getenv("DB_BOOKING_TIMEOUT_MS", 3000)),
+        "report": int(os.getenv("DB_REPORT_TIMEOUT_MS", 300000)),
+    }
+
     JWT_TOKEN_LOCATION = ["cookies", "headers"]  # Store tokens in cookies and headers
     JWT_COOKIE_SECURE = True  # Set to True in production (HTTPS only)
     JWT_COOKIE_CSRF_PROTECT = False  # Set to True if using CSRF protection
@@ -30,7 +47,49 @@ class Config:
     PAGINATION_PER_PAGE = int(os.getenv("PAGINATION_PER_PAGE", 10))  # Default items per page
     PAGINATION_MAX_PER_PAGE = int(os.getenv("PAGINATION_MAX_PER_PAGE", 100))  # Max items per page
 
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"  # Cache public bus listings
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 30))  # Seconds before a cached response expires
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1024))  # Max cached responses per worker
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 16 * 1024 * 1024))  # Max cached JSON size per worker
+
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))  # bcrypt cost factor; older hashes are upgraded on login
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))  # Threads per worker process doing bcrypt work
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 16))  # Waiting hash jobs before returning 503
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))  # Seconds a request waits for its hash job
+
+    TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 300))  # Seconds a verified JWT payload is reused (never past its exp)
+    TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 4096))  # Max verified tokens cached per worker
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))  # Seconds a user summary is cached for session checks
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))  # Max user summaries cached per worker
+
+
+
+    SQL_INSTRUMENTATION_ENABLED = os.getenv("SQL_INSTRUMENTATION_ENABLED", "true").lower() == "true"  # Count queries per request
+    SQL_INSTRUMENTATION_HEADERS = False  # Add X-SQL-* headers to responses
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))  # Same statement this many times in one request is flagged
+    SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", 20))  # Default max queries per request (Resource.query_budget overrides)
+
+    IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 24 * 3600))  # Seconds a payment response is replayed for its Idempotency-Key
+    IDEMPOTENCY_CLAIM_TIMEOUT = int(os.getenv("IDEMPOTENCY_CLAIM_TIMEOUT", 60))  # Seconds before an unfinished claim (its request died) can be retried
+    IDEMPOTENCY_CACHE_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_CACHE_MAX_ENTRIES", 10000))  # Max replayable responses cached per worker
+
+    SEAT_HOLD_MINUTES = int(os.getenv("SEAT_HOLD_MINUTES", 5))  # How long a checkout seat hold lasts
+    SEAT_HOLD_BACKEND = os.getenv("SEAT_HOLD_BACKEND", "memory")  # "memory" (per worker) or "redis" (shared)
+    SEAT_HOLD_REDIS_URL = os.getenv("SEAT_HOLD_REDIS_URL", "redis://localhost:6379/0")
+
+    BOOKING_HOLD_MINUTES = int(os.getenv("BOOKING_HOLD_MINUTES", 15))  # Unpaid bookings hold their seats this long
+    BOOKING_SWEEP_INTERVAL = int(os.getenv("BOOKING_SWEEP_INTERVAL", 0))  # Seconds between in-process sweeps (0 = use the CLI)
+    BOOKING_SWEEP_BATCH_SIZE = int(os.getenv("BOOKING_SWEEP_BATCH_SIZE", 500))  # Bookings expired per transaction
+    BOOKING_SWEEP_PAUSE = float(os.getenv("BOOKING_SWEEP_PAUSE", 0.05))  # Seconds between batches
 
+    PAYMENT_WORKER_INTERVAL = float(os.getenv("PAYMENT_WORKER_INTERVAL", 1))  # Seconds between polls of the in-process worker (0 = run `flask payment-worker` instead)
+    PAYMENT_WORKER_BATCH_SIZE = int(os.getenv("PAYMENT_WORKER_BATCH_SIZE", 10))  # Payment jobs claimed per poll
+    PAYMENT_JOB_LEASE_SECONDS = int(os.getenv("PAYMENT_JOB_LEASE_SECONDS", 120))  # A claimed job is picked up again if its worker is silent this long
+    PAYMENT_MAX_ATTEMPTS = int(os.getenv("PAYMENT_MAX_ATTEMPTS", 5))  # Gateway attempts before a payment fails
+    PAYMENT_RETRY_BASE_SECONDS = float(os.getenv("PAYMENT_RETRY_BASE_SECONDS", 2))  # First retry delay, doubled on each attempt
+    PAYMENT_RETRY_MAX_SECONDS = float(os.getenv("PAYMENT_RETRY_MAX_SECONDS", 300))  # Longest retry delay
+    PAYMENT_GATEWAY_LATENCY = float(os.getenv("PAYMENT_GATEWAY_LATENCY", 0))  # Simulated gateway response time in seconds
+    PAYMENT_GATEWAY_FAILURE_RATE = float(os.getenv("PAYMENT_GATEWAY_FAILURE_RATE", 0))  # Share of simulated charges that time out
 
     NEXT_PUBLIC_BACKEND_URL = os.getenv("NEXT_PUBLIC_BACKEND_URL")
 
@@ -40,10 +99,18 @@ class Config:
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
+    SQL_INSTRUMENTATION_HEADERS = True
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 2))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 5))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 60000))
 
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 10))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 15000))
 
 # Dictionary to select the configuration based on ENV
 config = {
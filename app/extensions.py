@@ -3,10 +3,24 @@ from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_restful import Api
+from app.utils.cache import ResponseCache
+from app.utils.passwords import PasswordHasher
+from app.utils.sql_instrumentation import SQLInstrumentation
+from app.utils.metrics import Metrics
+from app.utils.db_settings import StatementTimeouts
+from app.utils.replica import RoutingSession, ReadYourWrites
+from app.utils.holds import SeatHolds
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # GET reads go to the replica bind when configured
 migrate = Migrate()
 bcrypt = Bcrypt()
 cors = CORS()
-api = Api()
\ No newline at end of file
+api = Api()
+response_cache = ResponseCache()
+password_hasher = PasswordHasher()
+sql_instrumentation = SQLInstrumentation(db)
+metrics = Metrics(db)
+statement_timeouts = StatementTimeouts(db)
+read_your_writes = ReadYourWrites(db)
+seat_holds = SeatHolds()
\ No newline at end of file
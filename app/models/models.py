@@ -1,10 +1,12 @@
 from datetime import datetime
-from sqlalchemy import Enum
+from sqlalchemy import Enum, event
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy_serializer import SerializerMixin
-from app.extensions import db, bcrypt
-from sqlalchemy.orm import validates
+from app.extensions import db, password_hasher
+from sqlalchemy.orm import object_session, validates
 from app.utils.jwt_utils import generate_token
+from app.utils import seat_map
+from app.utils.places import parse_route
 from enum import Enum as PyEnum
 
 
@@ -20,6 +22,28 @@ class BookingStatus(str, PyEnum):
     CANCELED = "canceled"
 
 
+class PaymentJobStatus(str, PyEnum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+PAYMENT_METHODS = ('M-Pesa', 'Credit Card', 'PayPal')
+
+
+def seat_state_for(status):
+    """Maps a booking status (or None for a released seat) to its seat map state."""
+    if status is None:
+        return seat_map.FREE
+    status = BookingStatus(status)
+    if status == BookingStatus.CONFIRMED:
+        return seat_map.CONFIRMED
+    if status == BookingStatus.PENDING:
+        return seat_map.PENDING
+    return seat_map.FREE
+
+
 # User Model
 class User(db.Model, SerializerMixin):
     __tablename__ = 'users'
@@ -40,10 +64,15 @@ class User(db.Model, SerializerMixin):
 
     @password_hash.setter
     def password_hash(self, plaintext_password):
-        self._password_hash = bcrypt.generate_password_hash(plaintext_password).decode('utf-8')
+        # Hashed on the bounded password pool; may raise PasswordHasherBusyError
+        self._password_hash = password_hasher.hash(plaintext_password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self._password_hash, password)
+        return password_hasher.check(self._password_hash, password)
+
+    def needs_password_rehash(self):
+        """True if the stored hash uses a different bcrypt cost than BCRYPT_LOG_ROUNDS."""
+        return password_hasher.needs_rehash(self._password_hash)
 
     def generate_auth_token(self):
         """Generates a JWT token for the user."""
@@ -70,25 +99,76 @@ class User(db.Model, SerializerMixin):
 # Bus Model
 class Bus(db.Model, SerializerMixin):
     __tablename__ = 'buses'
+    __table_args__ = (
+        # Search looks up an exact origin/destination pair and a departure range
+        db.Index('ix_buses_origin_destination_departure', 'origin', 'destination', 'departure_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     driver_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     number_of_seats = db.Column(db.Integer, nullable=False)
     cost_per_seat = db.Column(db.Float, nullable=False)
     route = db.Column(db.String(200), nullable=False)
+    origin = db.Column(db.String(100), nullable=True)  # Normalized from route, see parse_route
+    destination = db.Column(db.String(100), nullable=True)
     departure_time = db.Column(db.DateTime, nullable=False)
     arrival_time = db.Column(db.DateTime, nullable=False)
     is_available = db.Column(db.Boolean, default=True)
+    seat_map = db.Column(db.LargeBinary, nullable=True)  # One byte per seat, see app/utils/seat_map.py
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # Bumped on every change, see bump_bus_version
+    confirmed_seats = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Kept in step with seat_map
+    pending_seats = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     driver = db.relationship('User', back_populates='buses')
     bookings = db.relationship('Booking', back_populates='bus', lazy=True)
 
-    @property
+    @hybrid_property
     def available_seats(self):
-        """Calculates the number of available seats."""
-        confirmed_bookings = [booking for booking in self.bookings if booking.status == BookingStatus.CONFIRMED]
-        return self.number_of_seats - len(confirmed_bookings)
+        """Seats not confirmed, from the maintained counter (also usable in queries)."""
+        return self.number_of_seats - (self.confirmed_seats or 0)
+
+    @available_seats.expression
+    def available_seats(cls):
+        return cls.number_of_seats - cls.confirmed_seats
+
+    @classmethod
+    def get_for_update(cls, bus_id):
+        """Fetches a bus with its row locked until the end of the transaction."""
+        return cls.query.filter_by(id=bus_id).with_for_update().populate_existing().first()
+
+    def current_seat_map(self):
+        """
+        Returns the seat occupancy map without changing the bus: the stored one,
+        or one built from bookings if it is missing or stale (for reads).
+        """
+        if self.seat_map is None or len(self.seat_map) != self.number_of_seats:
+            return seat_map.build(
+                self.number_of_seats,
+                ((booking.seat_number, seat_state_for(booking.status)) for booking in self.bookings)
+            )
+        return self.seat_map
+
+    def load_seat_map(self):
+        """Returns the seat occupancy map, storing a rebuilt one if it was missing or stale (for writes)."""
+        seats = self.current_seat_map()
+        if seats is not self.seat_map:
+            self._store_seat_map(seats)
+        return seats
+
+    def set_seat_status(self, seat_number, status):
+        """Records a booking state change for a seat. Pass None when the seat is released."""
+        self._store_seat_map(seat_map.set_state(self.load_seat_map(), seat_number, seat_state_for(status)))
+
+    def set_seats_status(self, seat_numbers, status):
+        """Records the same booking state change for several seats at once."""
+        self._store_seat_map(seat_map.set_states(self.load_seat_map(), seat_numbers, seat_state_for(status)))
+
+    def _store_seat_map(self, seats):
+        """Saves a new seat map along with the seat counters derived from it."""
+        self.seat_map = seats
+        self.confirmed_seats = seat_map.count_state(seats, seat_map.CONFIRMED)
+        self.pending_seats = seat_map.count_state(seats, seat_map.PENDING)
 
     @property
     def travel_time(self):
@@ -132,6 +212,11 @@ class Bus(db.Model, SerializerMixin):
             raise ValueError("Cost per seat cannot be negative.")
         return cost_per_seat
 
+    @validates('route')
+    def validate_route(self, key, route):
+        self.origin, self.destination = parse_route(route)
+        return route
+
     @validates('arrival_time')
     def validate_arrival_time(self, key, arrival_time):
         if arrival_time <= self.departure_time:
@@ -142,8 +227,32 @@ class Bus(db.Model, SerializerMixin):
         return f'<Bus {self.route}>'
 
 
+@event.listens_for(Bus, 'before_update')
+def bump_bus_version(mapper, connection, bus):
+    """
+    Bumps the bus version whenever a flush changes one of its columns. Seat
+    changes of its bookings all go through the seat map, so they bump it too.
+    """
+    if object_session(bus).is_modified(bus, include_collections=False):
+        bus.version = (bus.version or 0) + 1
+
+
 class Booking(db.Model, SerializerMixin):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # At most one pending/confirmed booking per seat; canceled rows don't count
+        db.Index(
+            'uq_bookings_active_seat', 'bus_id', 'seat_number',
+            unique=True,
+            postgresql_where=db.text("status IN ('PENDING', 'CONFIRMED')"),
+            sqlite_where=db.text("status IN ('PENDING', 'CONFIRMED')"),
+        ),
+        # Admin listing: newest first, optionally per bus
+        db.Index('ix_bookings_booking_date_id', 'booking_date', 'id'),
+        db.Index('ix_bookings_bus_id_booking_date', 'bus_id', 'booking_date'),
+        # Sweeper: oldest pending bookings first
+        db.Index('ix_bookings_status_booking_date', 'status', 'booking_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -151,11 +260,13 @@ class Booking(db.Model, SerializerMixin):
     seat_number = db.Column(db.Integer, nullable=False)
     booking_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     status = db.Column(Enum(BookingStatus), default=BookingStatus.PENDING, nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=True, index=True)  # Set for multi-seat purchases
 
     # Relationships
     customer = db.relationship('User', back_populates='bookings')
     bus = db.relationship('Bus', back_populates='bookings')
     transaction = db.relationship('Transaction', back_populates='booking', uselist=False)  # Add this line
+    order = db.relationship('Order', back_populates='bookings')
 
 
     def to_dict(self, serialize=True):
@@ -166,6 +277,7 @@ class Booking(db.Model, SerializerMixin):
             "seat_number": self.seat_number,
             "booking_date": self.booking_date.isoformat(),
             "status": self.status.value if hasattr(self.status, 'value') else str(self.status),
+            "order_id": self.order_id,
         }
         if serialize:
             data.update({
@@ -192,18 +304,67 @@ class Booking(db.Model, SerializerMixin):
         return f"<Booking {self.id}>"
 
 
+# Order Model: the bookings of one multi-seat request, paid for together
+class Order(db.Model, SerializerMixin):
+    __tablename__ = 'orders'
+
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    bus_id = db.Column(db.Integer, db.ForeignKey('buses.id'), nullable=False)
+    total_amount = db.Column(db.Float, nullable=False)
+    seat_count = db.Column(db.Integer, nullable=False)
+    status = db.Column(Enum(BookingStatus), default=BookingStatus.PENDING, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    bookings = db.relationship('Booking', back_populates='order')
+    transaction = db.relationship('Transaction', back_populates='order', uselist=False)
+
+    def to_dict(self, serialize=True):
+        data = {
+            "id": self.id,
+            "customer_id": self.customer_id,
+            "bus_id": self.bus_id,
+            "total_amount": self.total_amount,
+            "seat_count": self.seat_count,
+            "status": self.status.value if hasattr(self.status, 'value') else str(self.status),
+            "created_at": self.created_at.isoformat(),
+        }
+        if serialize:
+            data.update({
+                "bookings": [booking.to_dict(serialize=False) for booking in self.bookings],
+                "transaction": self.transaction.to_dict(serialize=False) if self.transaction else None
+            })
+        return data
+
+    @validates('total_amount')
+    def validate_total_amount(self, key, total_amount):
+        if total_amount < 0:
+            raise ValueError("Total amount cannot be negative.")
+        return total_amount
+
+    def __repr__(self):
+        return f'<Order {self.id}>'
+
+
 # Transaction Model
 class Transaction(db.Model, SerializerMixin):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Admin listing: newest first
+        db.Index('ix_transactions_payment_date_id', 'payment_date', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=True, index=True)  # Single-seat payments
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=True, index=True)  # Whole-order payments
     amount_paid = db.Column(db.Float, nullable=False)
     payment_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     payment_method = db.Column(db.String(50), nullable=False)  # e.g., M-Pesa, Credit Card
 
     # Relationships
     booking = db.relationship('Booking', back_populates='transaction')
+    order = db.relationship('Order', back_populates='transaction')
 
 
 
@@ -211,6 +372,7 @@ class Transaction(db.Model, SerializerMixin):
         data = {
             "id": self.id,
             "booking_id": self.booking_id,
+            "order_id": self.order_id,
             "amount_paid": self.amount_paid,
             "payment_date": self.payment_date.isoformat(),
             "payment_method": self.payment_method,
@@ -229,7 +391,7 @@ class Transaction(db.Model, SerializerMixin):
 
     @validates('payment_method')
     def validate_payment_method(self, key, payment_method):
-        if payment_method not in ['M-Pesa', 'Credit Card', 'PayPal']:
+        if payment_method not in PAYMENT_METHODS:
             raise ValueError("Invalid payment method.")
         return payment_method
 
@@ -237,3 +399,89 @@ class Transaction(db.Model, SerializerMixin):
         return f'<Transaction {self.id}>'
     
 
+
+# Payment Job Model: a payment waiting for (or handled by) the payment worker
+class PaymentJob(db.Model, SerializerMixin):
+    __tablename__ = 'payment_jobs'
+    __table_args__ = (
+        # At most one queued/processing payment per booking and per order
+        db.Index(
+            'uq_payment_jobs_active_booking', 'booking_id',
+            unique=True,
+            postgresql_where=db.text("status IN ('QUEUED', 'PROCESSING')"),
+            sqlite_where=db.text("status IN ('QUEUED', 'PROCESSING')"),
+        ),
+        db.Index(
+            'uq_payment_jobs_active_order', 'order_id',
+            unique=True,
+            postgresql_where=db.text("status IN ('QUEUED', 'PROCESSING')"),
+            sqlite_where=db.text("status IN ('QUEUED', 'PROCESSING')"),
+        ),
+        # Worker: due jobs first
+        db.Index('ix_payment_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=True)
+    amount = db.Column(db.Float, nullable=False)
+    payment_method = db.Column(db.String(50), nullable=False)
+    status = db.Column(Enum(PaymentJobStatus), default=PaymentJobStatus.QUEUED, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Not picked up before this (retry backoff)
+    locked_until = db.Column(db.DateTime, nullable=True)  # Worker lease; an expired lease is picked up again
+    last_error = db.Column(db.Text, nullable=True)
+    transaction_id = db.Column(db.Integer, db.ForeignKey('transactions.id'), nullable=True)  # Set once succeeded
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "booking_id": self.booking_id,
+            "order_id": self.order_id,
+            "amount": self.amount,
+            "payment_method": self.payment_method,
+            "status": self.status.value if hasattr(self.status, 'value') else str(self.status),
+            "attempts": self.attempts,
+            "next_attempt_at": self.run_at.isoformat() if self.status == PaymentJobStatus.QUEUED else None,
+            "last_error": self.last_error,
+            "transaction_id": self.transaction_id,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+    @validates('amount')
+    def validate_amount(self, key, amount):
+        if amount < 0:
+            raise ValueError("Amount cannot be negative.")
+        return amount
+
+    @validates('payment_method')
+    def validate_payment_method(self, key, payment_method):
+        if payment_method not in PAYMENT_METHODS:
+            raise ValueError("Invalid payment method.")
+        return payment_method
+
+    def __repr__(self):
+        return f'<PaymentJob {self.id}>'
+
+
+# Idempotency Model
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        # One claim per key and endpoint; concurrent retries collide here
+        db.UniqueConstraint('request_path', 'key', name='uq_idempotency_keys_path_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    request_path = db.Column(db.String(255), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # SHA-256 of the request body
+    status_code = db.Column(db.Integer, nullable=True)  # NULL while the first request is running
+    response = db.Column(db.Text, nullable=True)  # JSON body of the first response
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key}>'
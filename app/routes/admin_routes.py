@@ -1,8 +1,17 @@
+from functools import partial
 from flask import request, jsonify
 from flask_restful import Resource
-from app.models.models import Booking, Bus, Transaction, User
-from app.extensions import db
+from app.models.models import Booking, Bus, Order, Transaction, User
+from app.extensions import db, response_cache
 from app.utils.jwt_utils import token_required
+from app.utils.user_cache import invalidate_users
+from app.utils.passwords import PasswordHasherBusyError
+from app.utils.loaders import load_buses, load_bookings, load_users, load_transactions
+from app.utils.fieldsets import BUS_FIELDS, BOOKING_FIELDS, TRANSACTION_FIELDS, USER_FIELDS, serialize
+from app.utils.filters import QueryArgumentError, booking_filters, transaction_filters, user_filters
+from app.utils.pagination import keyset_paginate
+from app.utils.export import EXPORT_FORMATS, export_response
+from sqlalchemy import func, select
 
 
 class AddDriverResource(Resource):
@@ -25,7 +34,10 @@ class AddDriverResource(Resource):
 
         # Create a new driver
         driver = User(name=name, email=email, role='driver')
-        driver.password_hash = password  # Hash the password
+        try:
+            driver.password_hash = password  # Hash the password
+        except PasswordHasherBusyError:
+            return {'message': 'Server is busy, please retry shortly'}, 503, {'Retry-After': '1'}
 
         # Add and commit the driver to the database
         db.session.add(driver)
@@ -35,23 +47,125 @@ class AddDriverResource(Resource):
         return driver.to_dict(), 201
 
 class ViewAllBookingsResource(Resource):
+    timeout_profile = 'report'
+
     def get(self):
-        bookings = Booking.query.all()
-        bookings_data = [booking.to_dict() for booking in bookings]
-        return bookings_data, 200
+        """
+        View bookings, newest first, one page at a time.
+        Filters: status, bus_id, date_from, date_to. Paging: per_page, cursor.
+        Sparse responses: fields=id,status,... and include=customer,bus,transaction.
+        """
+        try:
+            selection = BOOKING_FIELDS.select(request.args, required=(Booking.booking_date,))
+            query = Booking.query.filter(*booking_filters(request.args))
+            page = keyset_paginate(query, (Booking.booking_date, Booking.id),
+                                   partial(load_bookings, selection=selection), partial(serialize, selection=selection))
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+        return page, 200
 
 
 class ViewAllTransactionsResource(Resource):
+    timeout_profile = 'report'
+
     def get(self):
-        transactions = Transaction.query.all()
-        transactions_data = [transaction.to_dict() for transaction in transactions]
-        return transactions_data, 200
+        """
+        View transactions, newest first, one page at a time.
+        Filters: status, bus_id (of the booking or order), date_from, date_to. Paging: per_page, cursor.
+        Sparse responses: fields=id,amount_paid,... and include=booking.
+        """
+        try:
+            selection = TRANSACTION_FIELDS.select(request.args, required=(Transaction.payment_date,))
+            criteria, needs_booking_join = transaction_filters(request.args)
+            query = Transaction.query
+            if needs_booking_join:
+                query = query.outerjoin(Transaction.booking).outerjoin(Transaction.order)
+            query = query.filter(*criteria)
+            page = keyset_paginate(query, (Transaction.payment_date, Transaction.id),
+                                   partial(load_transactions, selection=selection), partial(serialize, selection=selection))
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+        return page, 200
 
 class ViewAllUsersResource(Resource):
+    timeout_profile = 'report'
+
+    def get(self):
+        """
+        View users, newest first, one page at a time.
+        Filters: role. Paging: per_page, cursor.
+        Sparse responses: fields=id,name,... and include=buses,bookings.
+        """
+        try:
+            selection = USER_FIELDS.select(request.args)
+            query = User.query.filter(*user_filters(request.args))
+            page = keyset_paginate(query, (User.id,), partial(load_users, selection=selection), partial(serialize, selection=selection))
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+        return page, 200
+
+def _export_format():
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise QueryArgumentError(f'Invalid format (use one of: {", ".join(EXPORT_FORMATS)})')
+    return export_format
+
+
+class ExportBookingsResource(Resource):
+    timeout_profile = 'report'
+
     def get(self):
-        users = User.query.all()
-        users_data = [user.to_dict() for user in users]
-        return users_data, 200
+        """
+        Stream all matching bookings as NDJSON (default) or CSV.
+        Filters: status, bus_id, date_from, date_to. Format: format=ndjson|csv.
+        """
+        try:
+            export_format = _export_format()
+            criteria = booking_filters(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+
+        statement = select(
+            Booking.id,
+            Booking.customer_id,
+            Booking.bus_id,
+            Booking.seat_number,
+            Booking.booking_date,
+            Booking.status
+        ).where(*criteria).order_by(Booking.id)
+        return export_response(statement, export_format, 'bookings')
+
+
+class ExportTransactionsResource(Resource):
+    timeout_profile = 'report'
+
+    def get(self):
+        """
+        Stream all matching transactions (with the customer, bus and status of
+        their booking or order) as NDJSON (default) or CSV.
+        Filters: status, bus_id, date_from, date_to. Format: format=ndjson|csv.
+        """
+        try:
+            export_format = _export_format()
+            criteria, _ = transaction_filters(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+
+        statement = select(
+            Transaction.id,
+            Transaction.booking_id,
+            Transaction.order_id,
+            func.coalesce(Booking.customer_id, Order.customer_id).label('customer_id'),
+            func.coalesce(Booking.bus_id, Order.bus_id).label('bus_id'),
+            func.coalesce(Booking.status, Order.status).label('booking_status'),
+            Transaction.amount_paid,
+            Transaction.payment_date,
+            Transaction.payment_method
+        ).outerjoin(Booking, Transaction.booking_id == Booking.id).outerjoin(
+            Order, Transaction.order_id == Order.id
+        ).where(*criteria).order_by(Transaction.id)
+        return export_response(statement, export_format, 'transactions')
+
 
 class AssignDriverToBusResource(Resource):
     def post(self):
@@ -83,6 +197,7 @@ class AssignDriverToBusResource(Resource):
         # Assign the driver to the bus
         bus.driver_id = driver.id
         db.session.commit()
+        response_cache.invalidate_buses(bus.id)
 
         # Return success response with updated driver and bus details
         return {
@@ -119,20 +234,34 @@ class ChangeUserRoleResource(Resource):
         # Change the user's role
         user.role = new_role
         db.session.commit()
+        invalidate_users(user_id)
 
         # Return success response
         return {'message': f'User role changed to {new_role} successfully'}, 200
     
 
 
+class ViewCacheStatsResource(Resource):
+    def get(self):
+        """
+        View hit/miss counters and size of this worker's response cache.
+        """
+        return response_cache.stats(), 200
+
+
 class ViewMyBusesResource(Resource):
      def get(self):
         """
         View all buses added by the driver.
         """
+        try:
+            selection = BUS_FIELDS.select(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+
         # Fetch all buses (for simplicity, no driver filtering)
-        buses = Bus.query.all()
-        buses_data = [bus.to_dict() for bus in buses]
+        buses = load_buses(Bus.query, selection)
+        buses_data = [serialize(bus, selection) for bus in buses]
         return buses_data, 200
      
 
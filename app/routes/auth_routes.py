@@ -3,9 +3,18 @@ from flask_restful import Resource
 from app.models.models import User
 from app.extensions import db, bcrypt
 from app.utils.jwt_utils import generate_token, decode_token
+from app.utils.user_cache import get_user_summary
+from app.utils.passwords import PasswordHasherBusyError
 from datetime import datetime, timedelta
 
 
+def busy_response():
+    """503 returned when the password hashing pool is saturated."""
+    response = make_response(jsonify({'message': 'Server is busy, please retry shortly'}), 503)
+    response.headers['Retry-After'] = '1'
+    return response
+
+
 class RegisterResource(Resource):
     def post(self):
         data = request.get_json()
@@ -24,7 +33,10 @@ class RegisterResource(Resource):
 
         # Create a new user
         user = User(name=name, email=email, role=role)
-        user.password_hash = password  # This will hash the password automatically
+        try:
+            user.password_hash = password  # This will hash the password automatically
+        except PasswordHasherBusyError:
+            return busy_response()
 
         # Add and commit the user to the database
         db.session.add(user)
@@ -65,8 +77,19 @@ class LoginResource(Resource):
         user = User.query.filter_by(email=email).first()
 
         # Check if the user exists and the password is correct
-        if not user or not user.check_password(password):
-            return make_response(jsonify({'message': 'Invalid email or password'}), 401)
+        try:
+            if not user or not user.check_password(password):
+                return make_response(jsonify({'message': 'Invalid email or password'}), 401)
+        except PasswordHasherBusyError:
+            return busy_response()
+
+        # Transparently upgrade hashes made with an older cost factor (best effort)
+        if user.needs_password_rehash():
+            try:
+                user.password_hash = password
+                db.session.commit()
+            except PasswordHasherBusyError:
+                pass
 
         # Generate a JWT token for the authenticated user
         token = generate_token(user.id, user.role)
@@ -118,6 +141,10 @@ class LoginResource(Resource):
 
 class CheckSessionResource(Resource):
     def get(self):
+        """
+        Check the session from the JWT cookie. Answers from the (cached) token
+        claims and a cached user summary, so a warm check touches no tables.
+        """
         token = request.cookies.get('jwt_token')
 
         if not token:
@@ -127,14 +154,14 @@ class CheckSessionResource(Resource):
         if not payload:
             return make_response(jsonify({'message': 'Invalid or expired token'}), 401)
 
-        user = User.query.get(payload['user_id'])
+        user = get_user_summary(payload['user_id'])
         if not user:
             return make_response(jsonify({'message': 'User not found'}), 404)
 
         return make_response(jsonify({
-            'role': user.role,  # Ensure this matches the enum values in your database
+            'role': user['role'],  # Current role, which may differ from the token's claim after a role change
             'token': token,  # Return the token
-            'user': user.to_dict()
+            'user': user
         }), 200)
     
 
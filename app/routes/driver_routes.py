@@ -1,8 +1,13 @@
 from flask import request, jsonify
 from flask_restful import Resource
 from app.models.models import Bus, User, UserRole
-from app.extensions import db
+from app.extensions import db, response_cache
+from app.utils import seat_map
 from datetime import datetime
+from app.utils.loaders import load_buses, load_users
+from app.utils.fieldsets import BUS_FIELDS, USER_FIELDS, serialize
+from app.utils.filters import QueryArgumentError
+from app.utils.user_cache import invalidate_users
 
 
 class AddBusResource(Resource):
@@ -39,12 +44,14 @@ class AddBusResource(Resource):
             route=data.get('route'),
             departure_time=datetime.fromisoformat(data.get('departure_time')),
             arrival_time=datetime.fromisoformat(data.get('arrival_time')),
-            is_available=True
+            is_available=True,
+            seat_map=seat_map.empty(number_of_seats)
         )
 
         # Add and commit the bus to the database
         db.session.add(bus)
         db.session.commit()
+        response_cache.invalidate_buses(bus.id, listing=True)
 
         # Return the bus's details
         return bus.to_dict(), 201
@@ -71,6 +78,7 @@ class UpdateBusResource(Resource):
                 if number_of_seats < 1:
                     return {'message': 'Number of seats must be at least 1'}, 400
                 bus.number_of_seats = number_of_seats
+                bus.load_seat_map()  # Rebuild the seat map (and counters) for the new seat count
 
             cost_per_seat = data.get('cost_per_seat')
             if cost_per_seat is not None:
@@ -103,6 +111,7 @@ class UpdateBusResource(Resource):
 
         # Commit changes to the database
         db.session.commit()
+        response_cache.invalidate_buses(bus_id, listing=True)
 
         # Return the updated bus details
         return bus.to_dict(), 200
@@ -123,6 +132,7 @@ class DeleteBusResource(Resource):
         # Delete the bus
         db.session.delete(bus)
         db.session.commit()
+        response_cache.invalidate_buses(bus_id)
 
         # Return success message
         return {'message': 'Bus deleted successfully'}, 200
@@ -152,6 +162,7 @@ class ScheduleBusResource(Resource):
         bus.departure_time = datetime.fromisoformat(departure_time)
         bus.arrival_time = datetime.fromisoformat(arrival_time)
         db.session.commit()
+        response_cache.invalidate_buses(bus_id, listing=True)
 
         # Return success message
         return {'message': 'Bus scheduled successfully'}, 200
@@ -179,6 +190,7 @@ class UpdatePriceResource(Resource):
         # Update the price per seat
         bus.cost_per_seat = cost_per_seat
         db.session.commit()
+        response_cache.invalidate_buses(bus_id)
 
         # Return success message
         return {'message': 'Price per seat updated successfully'}, 200
@@ -188,6 +200,7 @@ class MyAssignedBusesResource(Resource):
     def get(self):
         """
         Fetch buses assigned to the current driver.
+        Sparse responses: fields=id,route,... and include=driver,bookings.
         """
         # In a real application, this would come from the authenticated user's session or token.
         driver_id = request.args.get('driver_id')  # Example: /driver/my_assigned_buses?driver_id=1
@@ -195,14 +208,19 @@ class MyAssignedBusesResource(Resource):
         if not driver_id:
             return {'message': 'Driver ID is required'}, 400
 
+        try:
+            selection = BUS_FIELDS.select(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+
         # Fetch buses assigned to the driver
-        buses = Bus.query.filter_by(driver_id=driver_id).all()
+        buses = load_buses(Bus.query.filter_by(driver_id=driver_id), selection)
 
         if not buses:
             return {'message': 'You do not have any buses assigned'}, 404
 
         # Return the list of buses
-        buses_data = [bus.to_dict() for bus in buses]
+        buses_data = [serialize(bus, selection) for bus in buses]
         return buses_data, 200
     
 
@@ -210,9 +228,14 @@ class FetchDriversResource(Resource):
     def get(self):
         """
         Fetch all users with the role 'driver'.
+        Sparse responses: fields=id,name,... and include=buses,bookings.
         """
-        drivers = User.query.filter_by(role=UserRole.DRIVER).all()
-        drivers_data = [driver.to_dict() for driver in drivers]
+        try:
+            selection = USER_FIELDS.select(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+        drivers = load_users(User.query.filter_by(role=UserRole.DRIVER), selection)
+        drivers_data = [serialize(driver, selection) for driver in drivers]
         return drivers_data, 200
     
 
@@ -235,5 +258,6 @@ class DeleteDriverResource(Resource):
         # Delete the driver
         db.session.delete(driver)
         db.session.commit()
+        invalidate_users(driver_id)
 
         return {'message': 'Driver deleted successfully'}, 200
\ No newline at end of file
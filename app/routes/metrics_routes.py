@@ -0,0 +1,12 @@
+from flask import Response
+from flask_restful import Resource
+from app.extensions import metrics
+
+
+class MetricsResource(Resource):
+    def get(self):
+        """
+        Expose request, database pool and booking metrics in the Prometheus text format.
+        """
+        body, content_type = metrics.render()
+        return Response(body, content_type=content_type)
@@ -1,22 +1,46 @@
 from flask import request, jsonify
 from flask_restful import Resource
-from app.models.models import Bus, Booking, Transaction, User
-from app.extensions import db
-from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from app.models.models import PAYMENT_METHODS, Bus, Booking, BookingStatus, Order, PaymentJob, User
+from app.extensions import db, response_cache, seat_holds
+from datetime import datetime, time, timedelta
 from sqlalchemy import and_
+from app.utils.loaders import load_buses, load_bookings
+from app.utils import seat_map
+from app.utils.places import normalize_place
+from app.utils.fieldsets import BUS_FIELDS, BOOKING_FIELDS, serialize
+from app.utils.filters import QueryArgumentError, bus_filters, bus_ordering
+from app.utils.cache import bus_list_tags, bus_detail_tags
+from app.utils.etags import bus_etag, current_bus_etag, conditional
+from app.utils.reservations import ACTIVE_STATUSES, SeatConflictError, reserve_seats, reserve_order, move_booking, delete_booking, payment_in_progress
+from app.utils.metrics import BOOKINGS_TOTAL, SEAT_CONFLICTS_TOTAL
+from app.utils.idempotency import idempotent
+from app.utils.payments import queue_payment
 
 
 class ViewAvailableBusesResource(Resource):
+    @response_cache.cached(bus_list_tags)
     def get(self):
         """
         View all available buses.
+        Filters: min_seats. Sorting: sort=departure_time|cost_per_seat|available_seats (- for descending).
+        Sparse responses: fields=id,route,... and include=driver,bookings.
         """
-        buses = Bus.query.filter_by(is_available=True).all()
-        buses_data = [bus.to_dict() for bus in buses]
+        try:
+            selection = BUS_FIELDS.select(request.args)
+            criteria = bus_filters(request.args)
+            ordering = bus_ordering(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+        query = Bus.query.filter(Bus.is_available == True, *criteria).order_by(*ordering)
+        buses = load_buses(query, selection)
+        buses_data = [serialize(bus, selection) for bus in buses]
         return buses_data, 200
 
 
 class BookSeatResource(Resource):
+    timeout_profile = 'booking'
+
     def post(self):
         """
         Book a seat on a bus.
@@ -39,20 +63,15 @@ class BookSeatResource(Resource):
         if seat_number < 1 or seat_number > bus.number_of_seats:
             return {'message': 'Invalid seat number'}, 400
 
-        # Check if the seat is already booked
-        existing_booking = Booking.query.filter_by(bus_id=bus_id, seat_number=seat_number).first()
-        if existing_booking:
-            return {'message': 'Seat already booked'}, 400
-
-        # Create a new booking
-        booking = Booking(
-            customer_id=customer_id,
-            bus_id=bus_id,
-            seat_number=seat_number,
-            status='pending'
-        )
-        db.session.add(booking)
+        # Create a new booking (fails if the seat is already booked)
+        try:
+            booking, = reserve_seats(customer_id, bus_id, [seat_number], BookingStatus.PENDING)
+        except SeatConflictError as e:
+            SEAT_CONFLICTS_TOTAL.inc()
+            return e.to_response()
         db.session.commit()
+        response_cache.invalidate_buses(bus_id)
+        BOOKINGS_TOTAL.labels('pending').inc()
 
         # Return the booking details
         return booking.to_dict(), 201
@@ -62,13 +81,20 @@ class ViewMyBookingsResource(Resource):
     def get(self, customer_id):
         """
         View all bookings for a customer.
+        Sparse responses: fields=id,seat_number,... and include=customer,bus,transaction.
         """
-        bookings = Booking.query.filter_by(customer_id=customer_id).all()
-        bookings_data = [booking.to_dict() for booking in bookings]
+        try:
+            selection = BOOKING_FIELDS.select(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+        bookings = load_bookings(Booking.query.filter_by(customer_id=customer_id), selection)
+        bookings_data = [serialize(booking, selection) for booking in bookings]
         return bookings_data, 200
 
 
 class CancelBookingResource(Resource):
+    timeout_profile = 'booking'
+
     def delete(self, booking_id):
         """
         Cancel a booking.
@@ -77,15 +103,29 @@ class CancelBookingResource(Resource):
         if not booking:
             return {'message': 'Booking not found'}, 404
 
-        # Delete the booking
-        db.session.delete(booking)
-        db.session.commit()
+        # A booking whose payment is running cannot go away under the worker
+        if payment_in_progress(booking):
+            return {'message': 'A payment for this booking is in progress'}, 409
+
+        # Release the seat (if the booking still holds it) and delete the booking
+        bus_id = booking.bus_id
+        delete_booking(booking)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A payment was queued for it since the check above
+            db.session.rollback()
+            return {'message': 'A payment for this booking is in progress'}, 409
+        response_cache.invalidate_buses(bus_id)
+        BOOKINGS_TOTAL.labels('canceled').inc()
 
         # Return success message
         return {'message': 'Booking canceled successfully'}, 200
 
 
 class UpdateBookingResource(Resource):
+    timeout_profile = 'booking'
+
     def put(self, booking_id):
         """
         Update a booking (e.g., change seat number).
@@ -99,24 +139,29 @@ class UpdateBookingResource(Resource):
 
         # Validate seat number
         if seat_number:
+            if booking.status not in ACTIVE_STATUSES:
+                return {'message': 'Only pending or confirmed bookings can change seats'}, 409
             if seat_number < 1 or seat_number > booking.bus.number_of_seats:
                 return {'message': 'Invalid seat number'}, 400
 
-            # Check if the new seat is already booked
-            existing_booking = Booking.query.filter_by(bus_id=booking.bus_id, seat_number=seat_number).first()
-            if existing_booking:
-                return {'message': 'Seat already booked'}, 400
-
-            booking.seat_number = seat_number
+            # Move the booking (fails if the new seat is already booked)
+            try:
+                move_booking(booking, seat_number)
+            except SeatConflictError as e:
+                SEAT_CONFLICTS_TOTAL.inc()
+                return e.to_response()
 
         # Commit changes to the database
         db.session.commit()
+        response_cache.invalidate_buses(booking.bus_id)
 
         # Return the updated booking details
         return booking.to_dict(), 200
 
 
 class ViewAvailableSeatsResource(Resource):
+    @conditional(current_bus_etag)
+    @response_cache.cached(bus_detail_tags, vary=current_bus_etag)
     def get(self, bus_id):
         """
         View available seats for a bus.
@@ -125,20 +170,26 @@ class ViewAvailableSeatsResource(Resource):
         if not bus:
             return {'message': 'Bus not found'}, 404
 
-        # Get all confirmed bookings for the bus
-        confirmed_bookings = Booking.query.filter_by(bus_id=bus_id, status='confirmed').all()
-        booked_seats = [booking.seat_number for booking in confirmed_bookings]
+        # Read seat states from the bus seat map (a missing one is built in
+        # memory; it is stored by the next booking change, never by a GET)
+        seats = bus.current_seat_map()
+        generation, holds = seat_holds.snapshot(bus.id)
 
-        # Calculate available seats
-        available_seats = [seat for seat in range(1, bus.number_of_seats + 1) if seat not in booked_seats]
-
-        return {'available_seats': available_seats}, 200
+        return {
+            'available_seats': seat_map.seats_not_in_state(seats, seat_map.CONFIRMED),
+            'pending_seats': seat_map.seats_in_state(seats, seat_map.PENDING),
+            'booked_seats': seat_map.seats_in_state(seats, seat_map.CONFIRMED),
+            'held_seats': sorted(seat for seat in holds if seat_map.get_state(seats, seat) == seat_map.FREE),
+        }, 200, {'ETag': bus_etag(bus.id, bus.version, generation)}
 
 
 class SearchBusResource(Resource):
+    @response_cache.cached(bus_list_tags)
     def get(self):
         """
         Search buses by travel date and route.
+        Filters: min_seats. Sorting: sort=departure_time|cost_per_seat|available_seats (- for descending).
+        Sparse responses: fields=id,route,... and include=driver,bookings.
         """
         departure_date = request.args.get('departure_date')
         from_location = request.args.get('from')
@@ -154,23 +205,57 @@ class SearchBusResource(Resource):
         except ValueError:
             return {'message': 'Invalid departure date format (use ISO format)'}, 400
 
-        # Search for buses
-        buses = Bus.query.filter(
+        try:
+            selection = BUS_FIELDS.select(request.args)
+            criteria = bus_filters(request.args)
+            ordering = bus_ordering(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+
+        # Departures on that day, as a half-open range so the index can be used
+        day_start = datetime.combine(departure_date, time.min)
+        day_end = day_start + timedelta(days=1)
+
+        # Search for buses (index lookup on origin, destination, departure_time)
+        buses = load_buses(Bus.query.filter(
             and_(
-                Bus.departure_time.cast(db.Date) == departure_date,  # Compare only the date part
-                Bus.route.ilike(f'%{from_location}%'),  # Origin is the first part of the route
-                Bus.route.ilike(f'%{to_location}%'),    # Destination is the last part of the route
-                Bus.is_available == True
+                Bus.origin == normalize_place(from_location),
+                Bus.destination == normalize_place(to_location),
+                Bus.departure_time >= day_start,
+                Bus.departure_time < day_end,
+                Bus.is_available == True,
+                *criteria
             )
-        ).all()
+        ).order_by(*ordering), selection)
 
-        buses_data = [bus.to_dict() for bus in buses]
+        buses_data = [serialize(bus, selection) for bus in buses]
         return buses_data, 200
 
+def accept_payment(amount, payment_method, booking_id=None, order_id=None):
+    """
+    Queues a payment for the payment worker, commits, and returns the 202
+    response pointing at its status. A payment already queued for the same
+    booking or order is returned instead of a second one.
+    """
+    job, _ = queue_payment(amount, payment_method, booking_id=booking_id, order_id=order_id)
+    response = {
+        'message': 'Payment is being processed',
+        'payment': job.to_dict(),
+        'status_url': f'/api/payments/{job.id}'
+    }
+    db.session.commit()
+    return response, 202
+
+
 class SimulatePaymentResource(Resource):
+    timeout_profile = 'booking'
+
+    @idempotent
     def post(self, booking_id):
         """
-        Simulate payment for a booking.
+        Simulate payment for a booking. The payment is queued and processed by
+        the payment worker; poll status_url for the outcome.
+        Retries carrying the same Idempotency-Key header get the first response back.
         """
         booking = Booking.query.get(booking_id)
         if not booking:
@@ -184,31 +269,25 @@ class SimulatePaymentResource(Resource):
         if not all([amount_paid, payment_method]):
             return {'message': 'Missing required fields (amount_paid, payment_method)'}, 400
 
+        if payment_method not in PAYMENT_METHODS:
+            return {'message': 'Invalid payment method'}, 400
+
         # Check if the booking is already confirmed
         if booking.status == 'confirmed':
             return {'message': 'Booking is already confirmed'}, 400
 
-        # Create a new transaction
-        transaction = Transaction(
-            booking_id=booking_id,
-            amount_paid=amount_paid,
-            payment_method=payment_method
-        )
-        db.session.add(transaction)
-
-        # Update the booking status to confirmed
-        booking.status = 'confirmed'
-        db.session.commit()
-
-        # Return the transaction details
-        return transaction.to_dict(), 201
+        # Queue the payment; the worker records the transaction and confirms the booking
+        return accept_payment(amount_paid, payment_method, booking_id=booking_id)
     
 
     
 class BookMultipleSeatsResource(Resource):
+    timeout_profile = 'booking'
+
     def post(self):
         """
-        Book multiple seats on a bus.
+        Book multiple seats on a bus as one order, paid for with
+        /api/orders/<order_id>/confirm_payment.
         """
         data = request.get_json()
         customer_id = data.get('customer_id')  # Automatically fetched from the logged-in user
@@ -224,35 +303,33 @@ class BookMultipleSeatsResource(Resource):
         if not bus:
             return {'message': 'Bus not found'}, 404
 
-        # Check if all selected seats are available
+        # Check if all selected seats are valid
         for seat_number in seat_numbers:
             if seat_number < 1 or seat_number > bus.number_of_seats:
                 return {'message': f'Invalid seat number: {seat_number}'}, 400
 
-            existing_booking = Booking.query.filter_by(bus_id=bus_id, seat_number=seat_number).first()
-            if existing_booking:
-                return {'message': f'Seat {seat_number} is already booked'}, 400
-
-        # Calculate total amount to be paid
-        total_amount = len(seat_numbers) * bus.cost_per_seat
-
-        # Create bookings for each selected seat
-        bookings = []
-        for seat_number in seat_numbers:
-            booking = Booking(
-                customer_id=customer_id,
-                bus_id=bus_id,
-                seat_number=seat_number,
-                status='pending'
-            )
-            db.session.add(booking)
-            bookings.append(booking)
+        if len(set(seat_numbers)) != len(seat_numbers):
+            return {'message': 'Duplicate seat numbers'}, 400
 
+        # Create the order and all its bookings in one statement (fails if any seat is already booked)
+        try:
+            order, booking_date, inserted = reserve_order(customer_id, bus, seat_numbers, BookingStatus.PENDING)
+        except SeatConflictError as e:
+            SEAT_CONFLICTS_TOTAL.inc()
+            return e.to_response()
+        order_id, total_amount = order.id, order.total_amount
         db.session.commit()
+        response_cache.invalidate_buses(bus_id)
+        BOOKINGS_TOTAL.labels('pending').inc(len(inserted))
 
-        # Return the booking details and total amount
+        # Return the order, the booking ids per seat and the total amount
         return {
-            'bookings': [booking.to_dict() for booking in bookings],
+            'order_id': order_id,
+            'customer_id': customer_id,
+            'bus_id': bus_id,
+            'status': BookingStatus.PENDING.value,
+            'booking_date': booking_date.isoformat(),
+            'bookings': [{'id': booking_id, 'seat_number': seat_number} for booking_id, seat_number in inserted],
             'total_amount': total_amount
         }, 201
 
@@ -261,17 +338,27 @@ class ViewMyBookingsResource(Resource):
     def get(self, customer_id):
         """
         View all bookings for a customer.
+        Sparse responses: fields=id,seat_number,... and include=customer,bus,transaction.
         """
-        bookings = Booking.query.filter_by(customer_id=customer_id).all()
-        bookings_data = [booking.to_dict() for booking in bookings]
+        try:
+            selection = BOOKING_FIELDS.select(request.args)
+        except QueryArgumentError as e:
+            return {'message': str(e)}, 400
+        bookings = load_bookings(Booking.query.filter_by(customer_id=customer_id), selection)
+        bookings_data = [serialize(booking, selection) for booking in bookings]
         return bookings_data, 200
     
 
 
 class ConfirmPaymentResource(Resource):
+    timeout_profile = 'booking'
+
+    @idempotent
     def post(self, booking_id):
         """
-        Confirm payment for a booking.
+        Confirm payment for a booking. The payment is queued and processed by
+        the payment worker; poll status_url for the outcome.
+        Retries carrying the same Idempotency-Key header get the first response back.
         """
         data = request.get_json()
         payment_method = data.get('payment_method')
@@ -279,6 +366,8 @@ class ConfirmPaymentResource(Resource):
         # Validate required fields
         if not payment_method:
             return {'message': 'Payment method is required'}, 400
+        if payment_method not in PAYMENT_METHODS:
+            return {'message': 'Invalid payment method'}, 400
 
         # Fetch the booking
         booking = Booking.query.get(booking_id)
@@ -292,20 +381,8 @@ class ConfirmPaymentResource(Resource):
         # Calculate the total amount to be paid
         total_amount = booking.bus.cost_per_seat
 
-        # Create a new transaction
-        transaction = Transaction(
-            booking_id=booking_id,
-            amount_paid=total_amount,
-            payment_method=payment_method
-        )
-        db.session.add(transaction)
-
-        # Update the booking status to confirmed
-        booking.status = 'confirmed'
-        db.session.commit()
-
-        # Return the transaction details
-        return transaction.to_dict(), 201
+        # Queue the payment; the worker records the transaction and confirms the booking
+        return accept_payment(total_amount, payment_method, booking_id=booking_id)
 
 
 
@@ -313,6 +390,8 @@ class ConfirmPaymentResource(Resource):
 
 
 class UserSelectSeatsResource(Resource):
+    @conditional(current_bus_etag)
+    @response_cache.cached(bus_detail_tags, vary=current_bus_etag)
     def get(self, bus_id):
         """
         View available seats for a bus (for drivers).
@@ -321,19 +400,24 @@ class UserSelectSeatsResource(Resource):
         if not bus:
             return {'message': 'Bus not found'}, 404
 
-        # Get all confirmed bookings for the bus
-        confirmed_bookings = Booking.query.filter_by(bus_id=bus_id, status='confirmed').all()
-        booked_seats = [booking.seat_number for booking in confirmed_bookings]
-
-        # Calculate available seats
-        available_seats = [seat for seat in range(1, bus.number_of_seats + 1) if seat not in booked_seats]
+        # Read seat states from the bus seat map (a missing one is built in
+        # memory; it is stored by the next booking change, never by a GET)
+        seats = bus.current_seat_map()
+        generation, holds = seat_holds.snapshot(bus.id)
 
-        return {'available_seats': available_seats}, 200
+        return {
+            'available_seats': seat_map.seats_not_in_state(seats, seat_map.CONFIRMED),
+            'pending_seats': seat_map.seats_in_state(seats, seat_map.PENDING),
+            'booked_seats': seat_map.seats_in_state(seats, seat_map.CONFIRMED),
+            'held_seats': sorted(seat for seat in holds if seat_map.get_state(seats, seat) == seat_map.FREE),
+        }, 200, {'ETag': bus_etag(bus.id, bus.version, generation)}
 
 
 
 
 class SimpleBookingResource(Resource):
+    timeout_profile = 'booking'
+
     def post(self):
         """
         Create a booking for a single seat on a bus.
@@ -356,20 +440,15 @@ class SimpleBookingResource(Resource):
         if seat_number < 1 or seat_number > bus.number_of_seats:
             return {'message': f'Invalid seat number. Seat must be between 1 and {bus.number_of_seats}'}, 400
 
-        # Check if the seat is already booked
-        existing_booking = Booking.query.filter_by(bus_id=bus_id, seat_number=seat_number, status='confirmed').first()
-        if existing_booking:
-            return {'message': f'Seat {seat_number} is already booked.'}, 400
-
-        # Create the booking
-        booking = Booking(
-            customer_id=customer_id,
-            bus_id=bus_id,
-            seat_number=seat_number,
-            status='confirmed'  # Assuming the booking is confirmed immediately
-        )
-        db.session.add(booking)
+        # Create the booking, confirmed immediately (fails if the seat is already booked)
+        try:
+            booking, = reserve_seats(customer_id, bus_id, [seat_number], BookingStatus.CONFIRMED)
+        except SeatConflictError as e:
+            SEAT_CONFLICTS_TOTAL.inc()
+            return e.to_response()
         db.session.commit()
+        response_cache.invalidate_buses(bus_id)
+        BOOKINGS_TOTAL.labels('confirmed').inc()
 
         # Calculate total amount
         total_amount = bus.cost_per_seat
@@ -380,3 +459,169 @@ class SimpleBookingResource(Resource):
             'total_amount': total_amount
         }, 201
 
+
+
+class SeatHoldResource(Resource):
+    def post(self, bus_id):
+        """
+        Hold seats on a bus for a few minutes while the customer checks out.
+        Holds are kept outside the database; confirm them to book the seats.
+        """
+        data = request.get_json()
+        customer_id = data.get('customer_id')
+        seat_numbers = data.get('seat_numbers')
+
+        # Validate required fields
+        if not all([customer_id, seat_numbers]):
+            return {'message': 'Missing required fields (customer_id, seat_numbers)'}, 400
+
+        # Fetch the bus
+        bus = Bus.query.get(bus_id)
+        if not bus:
+            return {'message': 'Bus not found'}, 404
+
+        # Check if all selected seats are valid
+        for seat_number in seat_numbers:
+            if seat_number < 1 or seat_number > bus.number_of_seats:
+                return {'message': f'Invalid seat number: {seat_number}'}, 400
+
+        if len(set(seat_numbers)) != len(seat_numbers):
+            return {'message': 'Duplicate seat numbers'}, 400
+
+        # Seats already booked cannot be held
+        seats = bus.load_seat_map()
+        booked = [seat for seat in seat_numbers if seat_map.get_state(seats, seat) != seat_map.FREE]
+        if booked:
+            SEAT_CONFLICTS_TOTAL.inc()
+            return SeatConflictError(booked).to_response()
+
+        conflicts, expires_at = seat_holds.hold(bus_id, seat_numbers, customer_id)
+        if conflicts:
+            SEAT_CONFLICTS_TOTAL.inc()
+            return SeatConflictError(conflicts, reason='held').to_response()
+
+        return {
+            'customer_id': customer_id,
+            'bus_id': bus_id,
+            'seat_numbers': sorted(seat_numbers),
+            'expires_at': expires_at.isoformat()
+        }, 201
+
+    def delete(self, bus_id):
+        """
+        Release the customer's holds on a bus (all of them unless seat_numbers is given).
+        """
+        data = request.get_json()
+        customer_id = data.get('customer_id')
+        if not customer_id:
+            return {'message': 'Missing required field (customer_id)'}, 400
+
+        seat_numbers = data.get('seat_numbers') or seat_holds.held_by(bus_id, customer_id)
+        released = seat_holds.release(bus_id, seat_numbers, customer_id)
+        return {'bus_id': bus_id, 'released_seats': sorted(released)}, 200
+
+
+class ConfirmSeatHoldResource(Resource):
+    timeout_profile = 'booking'
+
+    @idempotent
+    def post(self, bus_id):
+        """
+        Pay for held seats: books them as one order and queues its payment in
+        a single database transaction. The payment worker confirms the order;
+        poll status_url for the outcome.
+        Retries carrying the same Idempotency-Key header get the first response back.
+        """
+        data = request.get_json()
+        customer_id = data.get('customer_id')
+        payment_method = data.get('payment_method')
+
+        # Validate required fields
+        if not all([customer_id, payment_method]):
+            return {'message': 'Missing required fields (customer_id, payment_method)'}, 400
+        if payment_method not in PAYMENT_METHODS:
+            return {'message': 'Invalid payment method'}, 400
+
+        # Fetch the bus
+        bus = Bus.query.get(bus_id)
+        if not bus:
+            return {'message': 'Bus not found'}, 404
+
+        # Only seats the customer still holds can be confirmed
+        held = seat_holds.held_by(bus_id, customer_id)
+        seat_numbers = data.get('seat_numbers') or held
+        if not seat_numbers:
+            return {'message': 'No held seats to confirm'}, 409
+        not_held = sorted(set(seat_numbers) - set(held))
+        if not_held:
+            return {'message': 'Seats are not held by this customer or the hold has expired',
+                    'seat_numbers': not_held}, 409
+
+        # Book the seats as an order and queue its payment in one commit
+        try:
+            order, booking_date, inserted = reserve_order(customer_id, bus, seat_numbers, BookingStatus.PENDING)
+        except SeatConflictError as e:
+            SEAT_CONFLICTS_TOTAL.inc()
+            return e.to_response()
+        order_id, total_amount = order.id, order.total_amount
+        payment, status_code = accept_payment(total_amount, payment_method, order_id=order_id)
+        response_cache.invalidate_buses(bus_id)
+        BOOKINGS_TOTAL.labels('pending').inc(len(inserted))
+
+        # Return the order, the booking ids per seat, the total amount and the queued payment
+        return {
+            'order_id': order_id,
+            'customer_id': customer_id,
+            'bus_id': bus_id,
+            'status': BookingStatus.PENDING.value,
+            'booking_date': booking_date.isoformat(),
+            'bookings': [{'id': booking_id, 'seat_number': seat_number} for booking_id, seat_number in inserted],
+            'total_amount': total_amount,
+            **payment
+        }, status_code
+
+
+class ConfirmOrderPaymentResource(Resource):
+    timeout_profile = 'booking'
+
+    @idempotent
+    def post(self, order_id):
+        """
+        Confirm payment for a whole order: one transaction for the order total
+        and one update for all of its bookings, whatever the number of seats.
+        The payment is queued and processed by the payment worker; poll
+        status_url for the outcome.
+        Retries carrying the same Idempotency-Key header get the first response back.
+        """
+        data = request.get_json()
+        payment_method = data.get('payment_method')
+
+        # Validate required fields
+        if not payment_method:
+            return {'message': 'Payment method is required'}, 400
+        if payment_method not in PAYMENT_METHODS:
+            return {'message': 'Invalid payment method'}, 400
+
+        # Fetch the order
+        order = Order.query.get(order_id)
+        if not order:
+            return {'message': 'Order not found'}, 404
+
+        # Check if the order can still be paid
+        if order.status != BookingStatus.PENDING:
+            return {'message': f'Order is already {order.status.value}'}, 400
+
+        # Queue the payment; the worker records the transaction and confirms every booking
+        return accept_payment(order.total_amount, payment_method, order_id=order_id)
+
+
+class PaymentStatusResource(Resource):
+    def get(self, job_id):
+        """
+        Poll a queued payment: queued, processing, succeeded (with its
+        transaction_id) or failed (with last_error).
+        """
+        job = db.session.get(PaymentJob, job_id)
+        if not job:
+            return {'message': 'Payment not found'}, 404
+        return job.to_dict(), 200
@@ -0,0 +1,215 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request
+from app.utils.json_output import dumps
+
+
+# Invalidation tags. Every cached bus listing carries BUS_LIST_TAG plus the tag
+# of each bus it contains; a bus detail/seat map carries only its bus tag.
+# Listings filtered on free seats also carry BUS_SEATS_TAG, since any seat
+# change can move a bus they do not contain into them.
+BUS_LIST_TAG = 'bus-list'
+BUS_SEATS_TAG = 'bus-seats'
+
+
+def bus_tag(bus_id):
+    return f'bus:{bus_id}'
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a TTL.
+
+    Bounded both by entry count and by the approximate size of the stored
+    values, and tracks hits, misses and evictions. Entries can carry tags so
+    that a write invalidates exactly the entries that depend on it.
+    """
+
+    def __init__(self, ttl=30, max_entries=1024, max_bytes=16 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, value, size, tags)
+        self._tags = {}  # tag -> set of keys
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, ttl=None, max_entries=None, max_bytes=None):
+        """Resizes the cache and drops its contents."""
+        if ttl is not None:
+            self.ttl = ttl
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, size=1, tags=(), ttl=None):
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value, size, tuple(tags))
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tags(self, *tags):
+        """Drops every entry carrying any of the given tags. Returns how many were dropped."""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, _, size, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class ResponseCache(TTLCache):
+    """
+    In-process cache of public read responses, configured from the app config
+    (RESPONSE_CACHE_*). Each gunicorn worker has its own copy; invalidation is
+    local to the worker that handled the write, so the TTL bounds how stale
+    another worker's copy can get.
+    """
+
+    def __init__(self, app=None):
+        super().__init__()
+        self.enabled = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.configure(
+            ttl=app.config.get('RESPONSE_CACHE_TTL'),
+            max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES'),
+            max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES')
+        )
+
+    def invalidate_buses(self, *bus_ids, listing=False):
+        """
+        Drops cached responses for the given buses (and listings filtered on
+        free seats). Pass listing=True when the change can add or remove buses
+        from listings (new bus, schedule, route or availability change), which
+        drops every cached listing.
+        """
+        tags = [bus_tag(bus_id) for bus_id in bus_ids]
+        if tags:
+            tags.append(BUS_SEATS_TAG)
+        if listing:
+            tags.append(BUS_LIST_TAG)
+        if tags:
+            self.invalidate_tags(*tags)
+
+    def cached(self, tags, vary=None):
+        """
+        Decorator for Resource GET methods returning (data, status) or
+        (data, status, headers).
+
+        The key is the endpoint, its URL arguments, the normalized query
+        string and, if given, vary(**kwargs) for state that tag invalidation
+        in this process cannot track (e.g. a bus version bumped by another
+        process, seat holds). tags(data, **kwargs) returns the invalidation
+        tags of a fresh 200 response; its headers (e.g. ETag) are cached with
+        it. Responses carry X-Cache: HIT or MISS.
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+
+                key = (
+                    request.endpoint,
+                    tuple(sorted(kwargs.items())),
+                    tuple(sorted((name, tuple(value.strip() for value in values))
+                                 for name, values in request.args.lists())),
+                    vary(**kwargs) if vary is not None else None,
+                )
+                cached = self.get(key)
+                if cached is not None:
+                    data, status, headers = cached
+                    return data, status, {**headers, 'X-Cache': 'HIT'}
+
+                data, status, *headers = f(*args, **kwargs)
+                headers = dict(headers[0]) if headers else {}
+                if status == 200:
+                    size = len(dumps(data))
+                    self.set(key, (data, status, headers), size=size, tags=tags(data, **kwargs))
+                return data, status, {**headers, 'X-Cache': 'MISS'}
+            return wrapper
+        return decorator
+
+
+def bus_list_tags(data, **kwargs):
+    """Tags for a list of serialized buses."""
+    tags = [BUS_LIST_TAG] + [bus_tag(bus['id']) for bus in data]
+    if request.args.get('min_seats'):
+        tags.append(BUS_SEATS_TAG)
+    return tags
+
+
+def bus_detail_tags(data, bus_id, **kwargs):
+    """Tags for a single bus response keyed by the bus_id URL argument."""
+    return [bus_tag(bus_id)]
@@ -0,0 +1,81 @@
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(config):
+    """
+    Builds SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings.
+
+    Pool sizing only applies to server databases (SQLite gets its pool from
+    Flask-SQLAlchemy). On PostgreSQL the default statement and transaction
+    timeouts are set per connection through the libpq options string.
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    options = {
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+    }
+    if not uri:
+        return options
+
+    backend = make_url(uri).get_backend_name()
+    if backend != 'sqlite':
+        options['pool_size'] = config.get('DB_POOL_SIZE', 5)
+        options['max_overflow'] = config.get('DB_MAX_OVERFLOW', 10)
+        options['pool_timeout'] = config.get('DB_POOL_TIMEOUT', 30)
+
+    if backend == 'postgresql':
+        settings = {
+            'statement_timeout': config.get('DB_STATEMENT_TIMEOUT_MS', 0),
+            'idle_in_transaction_session_timeout': config.get('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', 0),
+            'transaction_timeout': config.get('DB_TRANSACTION_TIMEOUT_MS', 0),  # PostgreSQL 17+
+        }
+        flags = ' '.join(f'-c {name}={int(value)}' for name, value in settings.items() if value)
+        if flags:
+            options['connect_args'] = {'options': flags}
+    return options
+
+
+class StatementTimeouts:
+    """
+    Applies per-Resource statement timeout profiles on PostgreSQL.
+
+    A Resource sets a timeout_profile class attribute naming an entry of
+    DB_TIMEOUT_PROFILES (milliseconds), e.g. 'booking' for the short
+    latency-critical writes and 'report' for long admin reads. Each transaction
+    the session begins inside such a request runs SET LOCAL statement_timeout,
+    which lasts until that transaction ends, so the pooled connection goes
+    back with the default from engine_options().
+    """
+
+    def __init__(self, db=None, app=None):
+        self.db = db
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, db=None):
+        if db is not None:
+            self.db = db
+        if not event.contains(self.db.session, 'after_begin', self._after_begin):
+            event.listen(self.db.session, 'after_begin', self._after_begin)
+
+    @staticmethod
+    def current_timeout():
+        """
+        Returns the timeout (ms) of the current request's profile, or None.
+        """
+        if not has_request_context() or request.endpoint is None:
+            return None
+        view_class = getattr(current_app.view_functions.get(request.endpoint), 'view_class', None)
+        profile = getattr(view_class, 'timeout_profile', None)
+        if profile is None:
+            return None
+        return current_app.config.get('DB_TIMEOUT_PROFILES', {}).get(profile)
+
+    def _after_begin(self, session, transaction, connection):
+        if connection.dialect.name != 'postgresql':
+            return
+        timeout = self.current_timeout()
+        if timeout is not None:
+            connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
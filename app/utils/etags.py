@@ -0,0 +1,46 @@
+from functools import wraps
+from flask import Response, g, request
+from app.extensions import db, seat_holds
+from app.models.models import Bus
+
+
+def bus_etag(bus_id, version, hold_generation=0):
+    """
+    Strong ETag of a bus response: changes whenever the bus version or the
+    generation of its seat holds does.
+    """
+    return f'"bus-{bus_id}-v{version}-h{hold_generation}"'
+
+
+def current_bus_etag(bus_id, **kwargs):
+    """
+    The ETag a response for the bus would have now, from its version (one
+    primary key lookup, no bookings) and its hold generation, or None if the
+    bus does not exist. Looked up once per request: @conditional and the
+    response cache key (vary=current_bus_etag) share it.
+    """
+    etags = g.setdefault('bus_etags', {})
+    if bus_id not in etags:
+        version = db.session.query(Bus.version).filter(Bus.id == bus_id).scalar()
+        etags[bus_id] = bus_etag(bus_id, version, seat_holds.generation(bus_id)) if version is not None else None
+    return etags[bus_id]
+
+
+def conditional(current_etag):
+    """
+    Decorator for Resource GET methods whose responses carry an ETag header.
+
+    When the request has If-None-Match, current_etag(**kwargs) is computed
+    first and a matching tag is answered with 304 Not Modified, without
+    running the method (or its cache). Put it above @response_cache.cached.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if request.if_none_match:
+                etag = current_etag(**kwargs)
+                if etag is not None and request.if_none_match.contains_weak(etag.strip('"')):
+                    return Response(status=304, headers={'ETag': etag})
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from flask import Response, stream_with_context
+from app.extensions import db
+
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CHUNK_SIZE = 64 * 1024  # Bytes buffered before a chunk is sent
+YIELD_PER = 1000  # Rows fetched from the database per round trip
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(_plain, row))), separators=(',', ':')) + '\n'
+
+
+def _csv_lines(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_plain(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_rows(statement, export_format):
+    """
+    Runs a Core select and yields the encoded rows in chunks of about CHUNK_SIZE.
+    Field names are the statement's column keys (or labels).
+
+    Rows are plain tuples fetched YIELD_PER at a time (a server-side cursor on
+    PostgreSQL), so memory use stays flat whatever the size of the export.
+    """
+    columns = list(statement.selected_columns.keys())
+    result = db.session.execute(statement.execution_options(yield_per=YIELD_PER, stream_results=True))
+    lines = _csv_lines(columns, result) if export_format == 'csv' else _ndjson_lines(columns, result)
+
+    chunk = []
+    size = 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+
+def export_response(statement, export_format, name):
+    """
+    Builds a streamed attachment response for a Core select.
+    """
+    return Response(
+        stream_with_context(stream_rows(statement, export_format)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={name}.{export_format}'}
+    )
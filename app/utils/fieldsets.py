@@ -0,0 +1,204 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+from app.models.models import Booking, Bus, Transaction, User
+from app.utils.filters import QueryArgumentError
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def _attributes(model, columns):
+    """Maps Column objects to the model's mapped attributes (load_only wants those)."""
+    mapper = inspect(model)
+    return {mapper.get_property_by_column(column).class_attribute for column in columns}
+
+
+def reads(*columns, **relations):
+    """
+    What a field reads: model attributes and, for computed fields, the fields
+    of related rows it walks, e.g. reads(Bus.number_of_seats, bookings=('status',))
+    for a count over the bus bookings.
+    """
+    return columns, relations
+
+
+class Fieldset:
+    """
+    The fields and relations a model can return under ?fields= and ?include=.
+
+    fields maps each output field to what it reads (see reads()); relations
+    maps each embeddable relation to (fieldset name, many).
+    """
+
+    def __init__(self, model, fields, relations):
+        self.model = model
+        self.fields = fields
+        self.relations = relations
+
+    def related(self, relation):
+        return FIELDSETS[self.relations[relation][0]]
+
+    def pick(self, names):
+        """The given fields (all when empty) in declaration order, always with the id."""
+        names = set(names)
+        return [name for name in self.fields if not names or name in names or name == 'id']
+
+    def select(self, args, required=()):
+        """
+        Parses ?fields= and ?include= into a Selection, or returns None when
+        neither is given, so the endpoint keeps its full to_dict() shape.
+
+        fields lists top-level fields and, dotted, fields of an embedded
+        relation (driver.name, which also embeds driver). Without fields every
+        field is returned; without include no relation is embedded. The id is
+        always returned. required lists extra columns the endpoint reads
+        itself, e.g. its sort key.
+        """
+        if 'fields' not in args and 'include' not in args:
+            return None
+
+        fields, nested = [], {}
+        for name in _names(args.get('fields')):
+            relation, _, field = name.partition('.')
+            if field:
+                nested.setdefault(relation, []).append(field)
+            else:
+                fields.append(relation)
+        include = dict.fromkeys(_names(args.get('include')) + list(nested))
+
+        unknown = [name for name in fields if name not in self.fields]
+        unknown += [name for name in include if name not in self.relations]
+        for relation, related_fields in nested.items():
+            if relation in self.relations:
+                related = self.related(relation)
+                unknown += [f'{relation}.{name}' for name in related_fields if name not in related.fields]
+        if unknown:
+            raise QueryArgumentError(f'Unknown fields: {", ".join(unknown)}')
+
+        return Selection(
+            self,
+            self.pick(fields),
+            {relation: Selection(self.related(relation), self.related(relation).pick(nested.get(relation, ())))
+             for relation in include},
+            required
+        )
+
+
+class Selection:
+    """
+    The fields and embedded relations one request asked for: builds the
+    matching loader options and serializes rows to that shape.
+    """
+
+    def __init__(self, fieldset, fields, include=None, required=()):
+        self.fieldset = fieldset
+        self.fields = fields
+        self.include = include or {}
+        self.required = tuple(required)
+
+    def options(self, extra_fields=(), extra_columns=()):
+        """
+        Loader options that fetch only the columns of the selected fields and
+        one SELECT ... IN per embedded (or read) relation.
+        """
+        fieldset = self.fieldset
+        model = fieldset.model
+        mapper = inspect(model)
+        columns = _attributes(model, mapper.primary_key) | set(self.required) | set(extra_columns)
+        related_reads = {}
+        for name in list(self.fields) + list(extra_fields):
+            field_columns, relations = fieldset.fields[name]
+            columns.update(field_columns)
+            for relation, names in relations.items():
+                related_reads.setdefault(relation, set()).update(names)
+
+        options = []
+        for relation in dict.fromkeys(list(self.include) + list(related_reads)):
+            prop = mapper.relationships[relation]
+            related_fieldset = fieldset.related(relation)
+            # Both ends of the join key, so no row lazy-loads it back
+            columns |= _attributes(model, prop.local_columns)
+            remote_columns = _attributes(related_fieldset.model, [remote for _, remote in prop.local_remote_pairs])
+            related = self.include.get(relation) or Selection(related_fieldset, [])
+            options.append(selectinload(getattr(model, relation)).options(
+                *related.options(related_reads.get(relation, ()), remote_columns)
+            ))
+        return [load_only(*columns)] + options
+
+    def serialize(self, obj):
+        data = {name: getattr(obj, name) for name in self.fields}
+        for relation, related in self.include.items():
+            value = getattr(obj, relation)
+            if self.fieldset.relations[relation][1]:
+                data[relation] = [related.serialize(item) for item in value]
+            else:
+                data[relation] = related.serialize(value) if value is not None else None
+        return data
+
+
+def serialize(obj, selection=None):
+    """
+    Serializes a row to the selected shape, or with to_dict() when no
+    fields/include were requested.
+    """
+    return selection.serialize(obj) if selection is not None else obj.to_dict()
+
+
+USER_FIELDS = Fieldset(User, {
+    'id': reads(User.id),
+    'name': reads(User.name),
+    'email': reads(User.email),
+    'role': reads(User.role),
+}, {
+    'buses': ('bus', True),
+    'bookings': ('booking', True),
+})
+
+BUS_FIELDS = Fieldset(Bus, {
+    'id': reads(Bus.id),
+    'driver_id': reads(Bus.driver_id),
+    'number_of_seats': reads(Bus.number_of_seats),
+    'cost_per_seat': reads(Bus.cost_per_seat),
+    'route': reads(Bus.route),
+    'departure_time': reads(Bus.departure_time),
+    'arrival_time': reads(Bus.arrival_time),
+    'is_available': reads(Bus.is_available),
+    'available_seats': reads(Bus.number_of_seats, Bus.confirmed_seats),
+    'travel_time': reads(Bus.departure_time, Bus.arrival_time),
+}, {
+    'driver': ('user', False),
+    'bookings': ('booking', True),
+})
+
+BOOKING_FIELDS = Fieldset(Booking, {
+    'id': reads(Booking.id),
+    'customer_id': reads(Booking.customer_id),
+    'bus_id': reads(Booking.bus_id),
+    'seat_number': reads(Booking.seat_number),
+    'booking_date': reads(Booking.booking_date),
+    'status': reads(Booking.status),
+    'order_id': reads(Booking.order_id),
+}, {
+    'customer': ('user', False),
+    'bus': ('bus', False),
+    'transaction': ('transaction', False),
+})
+
+TRANSACTION_FIELDS = Fieldset(Transaction, {
+    'id': reads(Transaction.id),
+    'booking_id': reads(Transaction.booking_id),
+    'order_id': reads(Transaction.order_id),
+    'amount_paid': reads(Transaction.amount_paid),
+    'payment_date': reads(Transaction.payment_date),
+    'payment_method': reads(Transaction.payment_method),
+}, {
+    'booking': ('booking', False),
+})
+
+FIELDSETS = {
+    'user': USER_FIELDS,
+    'bus': BUS_FIELDS,
+    'booking': BOOKING_FIELDS,
+    'transaction': TRANSACTION_FIELDS,
+}
@@ -0,0 +1,140 @@
+from datetime import datetime, time, timedelta
+from sqlalchemy import or_
+from app.models.models import Booking, BookingStatus, Bus, Order, Transaction, User, UserRole
+
+
+class QueryArgumentError(ValueError):
+    """Raised when a list/export query argument is malformed."""
+
+
+def _parse_int(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryArgumentError(f'{name} must be an integer')
+
+
+def _parse_enum(args, name, enum):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return enum(value.lower())
+    except ValueError:
+        choices = ', '.join(member.value for member in enum)
+        raise QueryArgumentError(f'Invalid {name} (use one of: {choices})')
+
+
+def parse_date_range(args):
+    """
+    Reads date_from/date_to (ISO dates or datetimes) as a half-open range
+    [start, end). A plain date for date_to includes that whole day.
+    """
+    start = end = None
+    date_from = args.get('date_from')
+    date_to = args.get('date_to')
+    try:
+        if date_from:
+            start = datetime.fromisoformat(date_from)
+        if date_to:
+            end = datetime.fromisoformat(date_to)
+            if 'T' not in date_to and ' ' not in date_to:
+                end = datetime.combine(end.date(), time.min) + timedelta(days=1)
+    except ValueError:
+        raise QueryArgumentError('Invalid date_from/date_to format (use ISO format)')
+    return start, end
+
+
+def _date_criteria(column, args):
+    start, end = parse_date_range(args)
+    criteria = []
+    if start is not None:
+        criteria.append(column >= start)
+    if end is not None:
+        criteria.append(column < end)
+    return criteria
+
+
+def booking_filters(args):
+    """
+    Filter criteria for bookings: status, bus_id, date_from/date_to on booking_date.
+    """
+    criteria = _date_criteria(Booking.booking_date, args)
+    status = _parse_enum(args, 'status', BookingStatus)
+    if status is not None:
+        criteria.append(Booking.status == status)
+    bus_id = _parse_int(args, 'bus_id')
+    if bus_id is not None:
+        criteria.append(Booking.bus_id == bus_id)
+    return criteria
+
+
+def transaction_filters(args):
+    """
+    Filter criteria for transactions: date_from/date_to on payment_date, plus
+    status and bus_id of the paid booking or order. Returns (criteria,
+    needs_booking_join); the join is an outer join to both bookings and orders.
+    """
+    criteria = _date_criteria(Transaction.payment_date, args)
+    needs_join = False
+    status = _parse_enum(args, 'status', BookingStatus)
+    if status is not None:
+        criteria.append(or_(Booking.status == status, Order.status == status))
+        needs_join = True
+    bus_id = _parse_int(args, 'bus_id')
+    if bus_id is not None:
+        criteria.append(or_(Booking.bus_id == bus_id, Order.bus_id == bus_id))
+        needs_join = True
+    return criteria, needs_join
+
+
+# Sort keys for bus listings; a leading '-' sorts descending
+BUS_SORT_COLUMNS = {
+    'departure_time': Bus.departure_time,
+    'cost_per_seat': Bus.cost_per_seat,
+    'available_seats': Bus.available_seats,
+}
+
+
+def bus_filters(args):
+    """
+    Filter criteria for bus listings: min_seats (at least that many seats not
+    yet confirmed, read from the maintained counter).
+    """
+    criteria = []
+    min_seats = _parse_int(args, 'min_seats')
+    if min_seats is not None:
+        criteria.append(Bus.available_seats >= min_seats)
+    return criteria
+
+
+def bus_ordering(args):
+    """
+    ORDER BY clauses for bus listings from sort (e.g. sort=-available_seats,departure_time).
+    The bus id is always the last key so the order is stable.
+    """
+    ordering = []
+    for key in (args.get('sort') or '').split(','):
+        key = key.strip()
+        if not key:
+            continue
+        column = BUS_SORT_COLUMNS.get(key.lstrip('-'))
+        if column is None:
+            choices = ', '.join(BUS_SORT_COLUMNS)
+            raise QueryArgumentError(f'Invalid sort (use one of: {choices}, optionally prefixed with -)')
+        ordering.append(column.desc() if key.startswith('-') else column.asc())
+    return ordering + [Bus.id]
+
+
+def user_filters(args):
+    """
+    Filter criteria for users: role.
+    """
+    criteria = []
+    role = _parse_enum(args, 'role', UserRole)
+    if role is not None:
+        criteria.append(User.role == role)
+    return criteria
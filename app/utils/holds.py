@@ -0,0 +1,221 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    import redis
+except ImportError:  # Optional; only needed for SEAT_HOLD_BACKEND = 'redis'
+    redis = None
+
+
+class MemoryHoldStore:
+    """
+    Seat holds in this process: {bus_id: {seat_number: (holder, expires_at)}}.
+
+    Each bus also has a generation that changes whenever its holds do
+    (including when one is found expired), for cache keys and ETags. Holds are
+    per worker, so use a shared store when running several workers.
+    """
+
+    def __init__(self):
+        self._holds = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def _purge(self, bus_id, now):
+        holds = self._holds.get(bus_id)
+        if not holds:
+            return
+        expired = [seat for seat, (_, expires_at) in holds.items() if expires_at <= now]
+        for seat in expired:
+            del holds[seat]
+        if expired:
+            self._bump(bus_id)
+        if not holds:
+            del self._holds[bus_id]
+
+    def _bump(self, bus_id):
+        self._generations[bus_id] = self._generations.get(bus_id, 0) + 1
+
+    def acquire(self, bus_id, seat_numbers, holder, ttl):
+        now = time.time()
+        with self._lock:
+            self._purge(bus_id, now)
+            holds = self._holds.get(bus_id, {})
+            conflicts = [seat for seat in seat_numbers if seat in holds and holds[seat][0] != holder]
+            if conflicts:
+                return conflicts
+            holds = self._holds.setdefault(bus_id, {})
+            for seat in seat_numbers:
+                holds[seat] = (holder, now + ttl)
+            self._bump(bus_id)
+            return []
+
+    def release(self, bus_id, seat_numbers, holder):
+        with self._lock:
+            holds = self._holds.get(bus_id, {})
+            released = [seat for seat in seat_numbers if seat in holds and holds[seat][0] == holder]
+            for seat in released:
+                del holds[seat]
+            if released:
+                self._bump(bus_id)
+                if not holds:
+                    del self._holds[bus_id]
+            return released
+
+    def snapshot(self, bus_id):
+        with self._lock:
+            self._purge(bus_id, time.time())
+            holds = self._holds.get(bus_id, {})
+            return self._generations.get(bus_id, 0), {seat: holder for seat, (holder, _) in holds.items()}
+
+
+# Redis keys per bus: a hash seat -> holder, a sorted set seat -> expiry (ms)
+# and a generation counter. Every script first drops the expired holds.
+_PURGE = """
+local now = tonumber(ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+if #expired > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+    redis.call('HDEL', KEYS[1], unpack(expired))
+    redis.call('INCR', KEYS[3])
+end
+"""
+
+_ACQUIRE = _PURGE + """
+local holder = ARGV[2]
+local expires_at = tonumber(ARGV[3])
+local conflicts = {}
+for i = 4, #ARGV do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    if current and current ~= holder then
+        table.insert(conflicts, ARGV[i])
+    end
+end
+if #conflicts > 0 then
+    return conflicts
+end
+for i = 4, #ARGV do
+    redis.call('HSET', KEYS[1], ARGV[i], holder)
+    redis.call('ZADD', KEYS[2], expires_at, ARGV[i])
+end
+redis.call('INCR', KEYS[3])
+for i = 1, 3 do
+    redis.call('PEXPIREAT', KEYS[i], expires_at + 86400000)
+end
+return conflicts
+"""
+
+_RELEASE = _PURGE + """
+local released = {}
+for i = 3, #ARGV do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[2] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+        redis.call('ZREM', KEYS[2], ARGV[i])
+        table.insert(released, ARGV[i])
+    end
+end
+if #released > 0 then
+    redis.call('INCR', KEYS[3])
+end
+return released
+"""
+
+_SNAPSHOT = _PURGE + """
+return {redis.call('GET', KEYS[3]) or '0', redis.call('HGETALL', KEYS[1])}
+"""
+
+
+class RedisHoldStore:
+    """
+    Seat holds shared by every worker through Redis (any server speaking the
+    Redis protocol with Lua scripting, e.g. a local redis-server). Each
+    operation is one atomic script call.
+    """
+
+    def __init__(self, url, prefix='bookbus:holds'):
+        if redis is None:
+            raise RuntimeError("SEAT_HOLD_BACKEND = 'redis' needs the redis package installed")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._acquire = self.client.register_script(_ACQUIRE)
+        self._release = self.client.register_script(_RELEASE)
+        self._snapshot = self.client.register_script(_SNAPSHOT)
+
+    def _keys(self, bus_id):
+        base = f'{self.prefix}:{bus_id}'
+        return [f'{base}:seats', f'{base}:expiry', f'{base}:generation']
+
+    @staticmethod
+    def _now_ms():
+        return int(time.time() * 1000)
+
+    def acquire(self, bus_id, seat_numbers, holder, ttl):
+        now = self._now_ms()
+        conflicts = self._acquire(keys=self._keys(bus_id),
+                                  args=[now, holder, now + int(ttl * 1000), *seat_numbers])
+        return [int(seat) for seat in conflicts]
+
+    def release(self, bus_id, seat_numbers, holder):
+        released = self._release(keys=self._keys(bus_id), args=[self._now_ms(), holder, *seat_numbers])
+        return [int(seat) for seat in released]
+
+    def snapshot(self, bus_id):
+        generation, flat = self._snapshot(keys=self._keys(bus_id), args=[self._now_ms()])
+        return int(generation), {int(seat): holder for seat, holder in zip(flat[::2], flat[1::2])}
+
+
+class SeatHolds:
+    """
+    Short-lived seat holds taken while a customer is checking out.
+
+    Holds live in SEAT_HOLD_BACKEND ('memory' or 'redis') for
+    SEAT_HOLD_MINUTES and never touch the database; only confirming a hold
+    writes bookings. Holders are customer ids.
+    """
+
+    def __init__(self, app=None):
+        self.store = MemoryHoldStore()
+        self.ttl = 300
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('SEAT_HOLD_MINUTES', 5) * 60
+        backend = app.config.get('SEAT_HOLD_BACKEND', 'memory')
+        if backend == 'redis':
+            self.store = RedisHoldStore(app.config['SEAT_HOLD_REDIS_URL'])
+        elif backend == 'memory':
+            self.store = MemoryHoldStore()
+        else:
+            raise ValueError(f'Unknown SEAT_HOLD_BACKEND: {backend}')
+
+    def hold(self, bus_id, seat_numbers, customer_id):
+        """
+        Holds (or extends the hold on) the seats for the customer. Returns
+        (conflicts, expires_at); conflicts lists seats held by someone else,
+        in which case nothing is held.
+        """
+        conflicts = self.store.acquire(bus_id, list(seat_numbers), str(customer_id), self.ttl)
+        return conflicts, datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    def release(self, bus_id, seat_numbers, customer_id):
+        """Releases the customer's holds on the seats; returns the seats released."""
+        return self.store.release(bus_id, list(seat_numbers), str(customer_id))
+
+    def snapshot(self, bus_id):
+        """Returns (generation, {seat_number: customer id}) for the bus's live holds."""
+        generation, holds = self.store.snapshot(bus_id)
+        return generation, {seat: int(holder) for seat, holder in holds.items()}
+
+    def generation(self, bus_id, **kwargs):
+        return self.snapshot(bus_id)[0]
+
+    def held_by(self, bus_id, customer_id):
+        """Seats of the bus currently held by the customer."""
+        return sorted(seat for seat, holder in self.snapshot(bus_id)[1].items() if holder == int(customer_id))
+
+    def held_by_others(self, bus_id, seat_numbers, customer_id):
+        """The subset of seat_numbers held by another customer."""
+        holds = self.snapshot(bus_id)[1]
+        return [seat for seat in seat_numbers if seat in holds and holds[seat] != int(customer_id)]
@@ -0,0 +1,165 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, request
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models.models import IdempotencyKey
+from app.utils.cache import TTLCache
+from app.utils.json_output import dumps
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Stored responses keyed by (request path, Idempotency-Key), in front of the
+# idempotency_keys table so a retry storm costs one dictionary lookup.
+replayed_responses = TTLCache(ttl=24 * 3600, max_entries=10000)
+
+
+def _fingerprint():
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+
+def _window():
+    return timedelta(seconds=current_app.config.get('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+
+def _claim_timeout():
+    return timedelta(seconds=current_app.config.get('IDEMPOTENCY_CLAIM_TIMEOUT', 60))
+
+
+def _replay(stored, fingerprint):
+    """
+    The stored (data, status) of an earlier request with the same key, or an
+    error if the key was used for a different body.
+    """
+    stored_fingerprint, data, status_code = stored
+    if stored_fingerprint != fingerprint:
+        return {'message': f'{IDEMPOTENCY_HEADER} was already used for a different request'}, 422
+    return data, status_code, {REPLAYED_HEADER: 'true'}
+
+
+def _claim(path, key, fingerprint):
+    """
+    Inserts the key as in progress. Returns (claimed_at, None) when this
+    request now owns it, otherwise (None, response) with the response to
+    send: the stored one, or 409 while the first request is still running.
+    A claim still in progress after IDEMPOTENCY_CLAIM_TIMEOUT (its request
+    died) or a stored response older than the window is taken over.
+    """
+    for _ in range(2):
+        claimed_at = datetime.utcnow()
+        try:
+            db.session.execute(insert(IdempotencyKey).values(
+                request_path=path, key=key, fingerprint=fingerprint, created_at=claimed_at
+            ))
+            db.session.commit()
+            return claimed_at, None
+        except IntegrityError:
+            db.session.rollback()
+
+        row = IdempotencyKey.query.filter_by(request_path=path, key=key).first()
+        if row is None:
+            continue  # Deleted since (failed request or purge); claim again
+        lifetime = _claim_timeout() if row.status_code is None else _window()
+        if row.created_at < datetime.utcnow() - lifetime:
+            # Delete only the row we looked at, so two retries cannot both take it over
+            db.session.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.id == row.id, IdempotencyKey.created_at == row.created_at
+            ))
+            db.session.commit()
+            continue
+        if row.status_code is None:
+            return None, ({'message': 'A request with this Idempotency-Key is still in progress'}, 409)
+        stored = (row.fingerprint, json.loads(row.response), row.status_code)
+        replayed_responses.set((path, key), stored)
+        return None, _replay(stored, fingerprint)
+    return None, ({'message': 'A request with this Idempotency-Key is still in progress'}, 409)
+
+
+def _own_claim(path, key, claimed_at):
+    """The request's own in-progress row; empty once another request took the key over."""
+    return db.session.query(IdempotencyKey).filter_by(
+        request_path=path, key=key, created_at=claimed_at, status_code=None
+    )
+
+
+def _release(path, key, claimed_at):
+    db.session.rollback()
+    _own_claim(path, key, claimed_at).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def idempotent(func):
+    """
+    Decorator for Resource POST methods returning (data, status) that makes
+    retries carrying the same Idempotency-Key header safe.
+
+    The first request claims the key in the idempotency_keys table (a unique
+    insert, so concurrent retries cannot both run), then stores its response.
+    Retries within IDEMPOTENCY_KEY_TTL get that response back, marked
+    Idempotent-Replayed: true, without running the endpoint again. Retries
+    while the first request runs get 409; after IDEMPOTENCY_CLAIM_TIMEOUT its
+    claim is considered abandoned and the next retry runs instead. Responses
+    with a 5xx status (or an exception) release the key so the request can be
+    retried. Requests without the header run as usual.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return func(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return {'message': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'}, 400
+
+        path = request.path
+        fingerprint = _fingerprint()
+        stored = replayed_responses.get((path, key))
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        claimed_at, response = _claim(path, key, fingerprint)
+        if response is not None:
+            return response
+
+        try:
+            data, status_code = func(*args, **kwargs)
+        except Exception:
+            _release(path, key, claimed_at)
+            raise
+        if status_code >= 500:
+            _release(path, key, claimed_at)
+            return data, status_code
+
+        stored = _own_claim(path, key, claimed_at).update(
+            {'status_code': status_code, 'response': dumps(data).decode()},
+            synchronize_session=False
+        )
+        db.session.commit()
+        if stored:  # Not taken over by a retry meanwhile
+            replayed_responses.set((path, key), (fingerprint, json.loads(dumps(data)), status_code))
+        return data, status_code
+
+    return wrapper
+
+
+def purge_idempotency_keys(batch_size):
+    """
+    Deletes stored keys older than IDEMPOTENCY_KEY_TTL in batches of
+    batch_size, one transaction each. Returns the number deleted.
+    """
+    cutoff = datetime.utcnow() - _window()
+    deleted = 0
+    while True:
+        ids = db.session.scalars(
+            db.select(IdempotencyKey.id).where(IdempotencyKey.created_at < cutoff).limit(batch_size)
+        ).all()
+        if not ids:
+            return deleted
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
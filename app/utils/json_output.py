@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from flask import current_app, make_response
+
+try:
+    import orjson
+except ImportError:  # Optional; the standard json module is used without it
+    orjson = None
+
+
+def _default(value):
+    """
+    Encodes the types the JSON encoders do not know natively (orjson already
+    handles datetimes and enums itself).
+    """
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(data, pretty=False):
+    """
+    Encodes data to JSON bytes, with orjson when it is installed.
+    Datetimes become ISO 8601 strings, enums their values and bytes base64.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+    if pretty:
+        return json.dumps(data, default=_default, indent=4).encode()
+    return json.dumps(data, default=_default, separators=(',', ':')).encode()
+
+
+def output_json(data, code, headers=None):
+    """
+    Flask-RESTful representation for application/json using dumps().
+    Pretty-printed in debug mode, like Flask-RESTful's own encoder.
+    """
+    response = make_response(dumps(data, pretty=current_app.debug) + b'\n', code)
+    response.headers.extend(headers or {})
+    return response
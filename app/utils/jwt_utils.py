@@ -1,9 +1,16 @@
 from datetime import datetime, timedelta
+import time
 import jwt
 from flask import current_app
 
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, make_response
+from app.utils.cache import TTLCache
+
+
+# Payloads of tokens whose signature has already been verified, keyed by the
+# raw token. An entry never outlives the token's own expiry.
+verified_tokens = TTLCache(ttl=300, max_entries=4096)
 
 
 def generate_token(user_id, role):
@@ -25,14 +32,37 @@ def generate_token(user_id, role):
 def decode_token(token):
     """
     Decodes a JWT token and returns the payload.
+    Repeated calls with the same token skip signature verification until the
+    cache entry (at most TOKEN_CACHE_TTL seconds, never past 'exp') expires.
     """
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-        return payload
     except jwt.ExpiredSignatureError:
         return None  # Token has expired
     except jwt.InvalidTokenError:
         return None  # Invalid token
+
+    ttl = verified_tokens.ttl
+    if 'exp' in payload:
+        ttl = min(ttl, payload['exp'] - time.time())
+    if ttl > 0:
+        verified_tokens.set(token, payload, ttl=ttl)
+    return payload
+
+
+def get_request_token():
+    """
+    Returns the JWT sent with the request: the Authorization header (with or
+    without a "Bearer " prefix), falling back to the jwt_token cookie.
+    """
+    token = request.headers.get('Authorization')
+    if token and token.startswith('Bearer '):
+        token = token[len('Bearer '):]
+    return token or request.cookies.get('jwt_token')
     
 
 def token_required(f):
@@ -41,13 +71,13 @@ def token_required(f):
     """
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
+        token = get_request_token()
         if not token:
-            return jsonify({'message': 'Token is missing'}), 401
+            return make_response(jsonify({'message': 'Token is missing'}), 401)
 
         payload = decode_token(token)
         if not payload:
-            return jsonify({'message': 'Invalid or expired token'}), 401
+            return make_response(jsonify({'message': 'Invalid or expired token'}), 401)
 
         # Add user info to the request context
         request.current_user = payload
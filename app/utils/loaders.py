@@ -0,0 +1,63 @@
+from sqlalchemy.orm import selectinload
+from app.models.models import Bus, Booking, Transaction, User
+
+
+# Loader options for each serialization shape. Every relationship that
+# to_dict() touches is loaded up front with one SELECT ... IN per relationship,
+# so a list endpoint runs the same number of queries whatever the row count.
+
+# Bus.to_dict(): driver summary, bookings
+BUS_OPTIONS = (
+    selectinload(Bus.driver),
+    selectinload(Bus.bookings),
+)
+
+# Booking.to_dict(): customer, transaction and bus summary
+BOOKING_OPTIONS = (
+    selectinload(Booking.customer),
+    selectinload(Booking.transaction),
+    selectinload(Booking.bus),
+)
+
+# User.to_dict(): bus summaries and booking summaries
+USER_OPTIONS = (
+    selectinload(User.buses),
+    selectinload(User.bookings),
+)
+
+# Transaction.to_dict(): booking summary
+TRANSACTION_OPTIONS = (
+    selectinload(Transaction.booking),
+)
+
+
+def load_buses(query, selection=None):
+    """
+    Run a Bus query with everything Bus.to_dict() needs preloaded, or
+    only what a ?fields=/?include= selection needs.
+    """
+    return query.options(*(selection.options() if selection is not None else BUS_OPTIONS)).all()
+
+
+def load_bookings(query, selection=None):
+    """
+    Run a Booking query with everything Booking.to_dict() needs preloaded, or
+    only what a ?fields=/?include= selection needs.
+    """
+    return query.options(*(selection.options() if selection is not None else BOOKING_OPTIONS)).all()
+
+
+def load_users(query, selection=None):
+    """
+    Run a User query with everything User.to_dict() needs preloaded, or
+    only what a ?fields=/?include= selection needs.
+    """
+    return query.options(*(selection.options() if selection is not None else USER_OPTIONS)).all()
+
+
+def load_transactions(query, selection=None):
+    """
+    Run a Transaction query with everything Transaction.to_dict() needs preloaded, or
+    only what a ?fields=/?include= selection needs.
+    """
+    return query.options(*(selection.options() if selection is not None else TRANSACTION_OPTIONS)).all()
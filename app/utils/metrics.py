@@ -0,0 +1,121 @@
+import os
+import time
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+from app.utils.sql_instrumentation import resource_name
+
+
+# Request metrics, labelled by Flask-RESTful Resource class
+REQUEST_LATENCY = Histogram(
+    'bookbus_request_duration_seconds', 'Request latency by Resource.',
+    ['resource', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+REQUESTS_TOTAL = Counter('bookbus_requests_total', 'Requests by Resource and status code.', ['resource', 'method', 'status'])
+REQUESTS_IN_FLIGHT = Gauge('bookbus_requests_in_flight', 'Requests currently being handled.', multiprocess_mode='livesum')
+
+# Business counters
+BOOKINGS_TOTAL = Counter('bookbus_bookings_total', 'Seats booked, confirmed or released, by resulting status.', ['status'])
+SEAT_CONFLICTS_TOTAL = Counter('bookbus_seat_conflicts_total', 'Booking attempts rejected because a seat was taken.')
+PAYMENTS_TOTAL = Counter('bookbus_payments_total', 'Payments recorded, by payment method.', ['method'])
+PAYMENT_AMOUNT_TOTAL = Counter('bookbus_payment_amount_total', 'Sum of amounts paid, by payment method.', ['method'])
+PAYMENT_JOBS_TOTAL = Counter('bookbus_payment_jobs_total', 'Payment job attempts by outcome (succeeded, retried, failed).', ['outcome'])
+
+
+class DBPoolCollector:
+    """
+    Reports the SQLAlchemy connection pool state of this process at scrape
+    time. Under gunicorn each scrape only sees the worker that served it, so
+    the series carry a pid label.
+    """
+
+    def __init__(self, db, app):
+        self.db = db
+        self.app = app
+
+    def collect(self):
+        checked_out = GaugeMetricFamily('bookbus_db_pool_checked_out', 'Connections checked out of the pool.', labels=['bind', 'pid'])
+        overflow = GaugeMetricFamily('bookbus_db_pool_overflow', 'Connections open beyond the pool size.', labels=['bind', 'pid'])
+        size = GaugeMetricFamily('bookbus_db_pool_size', 'Configured pool size.', labels=['bind', 'pid'])
+        pid = str(os.getpid())
+        with self.app.app_context():
+            engines = self.db.engines
+        for bind, engine in engines.items():
+            pool = engine.pool
+            labels = [bind or 'default', pid]
+            if hasattr(pool, 'checkedout'):
+                checked_out.add_metric(labels, pool.checkedout())
+            if hasattr(pool, 'overflow'):
+                overflow.add_metric(labels, pool.overflow())
+            if hasattr(pool, 'size'):
+                size.add_metric(labels, pool.size())
+        yield checked_out
+        yield overflow
+        yield size
+
+
+class Metrics:
+    """
+    Prometheus metrics for the API.
+
+    Request hooks only touch in-process counters, so the hot path cost is a
+    few dictionary updates. With PROMETHEUS_MULTIPROC_DIR set (required under
+    gunicorn with several workers), prometheus_client writes the values to
+    per-process files in that directory and render() merges every worker's
+    files, so any worker can answer a scrape for the whole server.
+    """
+
+    def __init__(self, db=None, app=None):
+        self.db = db
+        self.pool_collector = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, db=None):
+        if db is not None:
+            self.db = db
+        self.pool_collector = DBPoolCollector(self.db, app)
+        if not self.multiprocess:
+            try:
+                REGISTRY.register(self.pool_collector)
+            except ValueError:
+                pass  # Already registered by an earlier app in this process
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    @property
+    def multiprocess(self):
+        return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    def _finish_request(self, response):
+        started = g.get('metrics_started')
+        if started is not None:
+            resource = resource_name() if request.endpoint else 'unmatched'
+            REQUEST_LATENCY.labels(resource, request.method).observe(time.perf_counter() - started)
+            REQUESTS_TOTAL.labels(resource, request.method, str(response.status_code)).inc()
+        return response
+
+    def _teardown_request(self, exc):
+        if g.pop('metrics_started', None) is not None:
+            REQUESTS_IN_FLIGHT.dec()
+
+    def render(self):
+        """
+        Returns (body, content type) in the Prometheus text format.
+        """
+        if self.multiprocess:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            registry.register(self.pool_collector)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
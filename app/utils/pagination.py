@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import and_, or_
+from app.utils.filters import QueryArgumentError
+
+
+def get_per_page():
+    """
+    Reads per_page from the query string, defaulting to PAGINATION_PER_PAGE and
+    capped at PAGINATION_MAX_PER_PAGE.
+    """
+    per_page = request.args.get('per_page', current_app.config['PAGINATION_PER_PAGE'])
+    try:
+        per_page = int(per_page)
+    except (ValueError, TypeError):
+        raise QueryArgumentError('per_page must be an integer')
+    if per_page < 1:
+        raise QueryArgumentError('per_page must be at least 1')
+    return min(per_page, current_app.config['PAGINATION_MAX_PER_PAGE'])
+
+
+def encode_cursor(values):
+    """
+    Encodes the sort key of the last row of a page as an opaque URL-safe token.
+    """
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """
+    Decodes a cursor back into sort key values matching the given columns.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError, NotImplementedError):
+        raise QueryArgumentError('Invalid cursor')
+
+
+def _after(columns, values):
+    """
+    Criterion for rows strictly after the given key in descending column order.
+    """
+    column, value = columns[0], values[0]
+    if len(columns) == 1:
+        return column < value
+    return or_(column < value, and_(column == value, _after(columns[1:], values[1:])))
+
+
+def keyset_paginate(query, order_columns, loader, serializer):
+    """
+    Returns one page of query results, newest first.
+
+    order_columns is the sort key (ending with the primary key so ordering is
+    stable). Rather than an OFFSET, each page seeks past the key of the last row
+    of the previous page, so every page is an index range scan of per_page rows
+    no matter how deep the client pages.
+    """
+    per_page = get_per_page()
+    cursor = request.args.get('cursor')
+    if cursor:
+        query = query.filter(_after(order_columns, decode_cursor(cursor, order_columns)))
+
+    query = query.order_by(*[column.desc() for column in order_columns]).limit(per_page + 1)
+    rows = loader(query)
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in order_columns])
+
+    return {
+        'items': [serializer(row) for row in rows],
+        'next_cursor': next_cursor,
+        'per_page': per_page,
+    }
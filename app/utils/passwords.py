@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt as _bcrypt
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password hashing pool is saturated and the request should be retried later."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so a small pool caps how many cores password work
+    can take per worker process while the request threads wait on it. At most
+    PASSWORD_HASH_WORKERS jobs run and PASSWORD_HASH_QUEUE_SIZE wait; beyond
+    that callers get PasswordHasherBusyError immediately instead of queueing,
+    so a login spike can't starve the rest of the API. The cost factor comes
+    from BCRYPT_LOG_ROUNDS.
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.timeout = 10
+        self._executor = None
+        self._slots = None
+        self._configure(workers=2, queue_size=16)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', self.rounds)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self._configure(
+            workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+            queue_size=app.config.get('PASSWORD_HASH_QUEUE_SIZE', 16)
+        )
+
+    def _configure(self, workers, queue_size):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusyError('Password hashing pool is saturated')
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise PasswordHasherBusyError('Password hashing timed out')
+
+    def hash(self, password):
+        """
+        Returns a bcrypt hash of the password at the configured cost.
+        """
+        salt = _bcrypt.gensalt(self.rounds)
+        return self._run(_bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, password_hash, password):
+        """
+        Returns True if the password matches the hash.
+        """
+        return self._run(_bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash):
+        """
+        Returns True if the hash was made with a different cost than the configured one.
+        """
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
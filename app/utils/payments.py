@@ -0,0 +1,346 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db, response_cache
+from app.models.models import PAYMENT_METHODS, Booking, BookingStatus, Bus, Order, PaymentJob, PaymentJobStatus, Transaction
+from app.utils.metrics import BOOKINGS_TOTAL, PAYMENT_AMOUNT_TOTAL, PAYMENT_JOBS_TOTAL, PAYMENTS_TOTAL
+from app.utils.reservations import ACTIVE_PAYMENT_STATUSES, confirm_order_bookings
+
+
+logger = logging.getLogger('app.payments')
+
+# Label values of the payment counters: one per accepted method, so the label
+# set follows PAYMENT_METHODS. Anything else (rows older than the validation)
+# is counted as 'other'.
+PAYMENT_METHOD_LABELS = {method: method.lower() for method in PAYMENT_METHODS}
+
+
+class PaymentGatewayError(Exception):
+    """A charge that failed for a transient reason (timeout, gateway down); it is retried."""
+
+
+class PaymentDeclinedError(Exception):
+    """A charge the gateway refused; retrying will not help."""
+
+
+class PaymentNotApplicableError(Exception):
+    """The booking or order can no longer be paid (already paid, expired, canceled)."""
+
+
+class LeaseLostError(Exception):
+    """The job's lease lapsed and another worker claimed it; this worker must not write its outcome."""
+
+
+class SimulatedGateway:
+    """
+    Stand-in for the M-Pesa/card gateway: waits latency seconds and fails
+    transiently for failure_rate of the charges. A real gateway gets the same
+    reference on every attempt of a job, so it can deduplicate retries.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('PAYMENT_GATEWAY_LATENCY', 0.0), config.get('PAYMENT_GATEWAY_FAILURE_RATE', 0.0))
+
+    def charge(self, reference, amount, payment_method):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise PaymentGatewayError(f'{payment_method} gateway timed out')
+        return reference
+
+
+def queue_payment(amount, payment_method, booking_id=None, order_id=None):
+    """
+    Adds a queued payment job for a booking or an order. If it already has a
+    queued or processing job (a double submit), the session is rolled back and
+    that job is returned instead.
+
+    Returns (job, created). The caller commits.
+    """
+    job = PaymentJob(booking_id=booking_id, order_id=order_id, amount=amount, payment_method=payment_method)
+    db.session.add(job)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        existing = PaymentJob.query.filter(
+            PaymentJob.booking_id == booking_id if booking_id is not None else PaymentJob.order_id == order_id,
+            PaymentJob.status.in_(ACTIVE_PAYMENT_STATUSES)
+        ).first()
+        if existing is None:
+            raise
+        return existing, False
+    return job, True
+
+
+def claim_payment_jobs(batch_size, lease_seconds):
+    """
+    Marks up to batch_size due jobs as processing under a lease and commits.
+    Due means queued with run_at passed, or processing with an expired lease
+    (its worker died). Jobs locked by another worker are skipped, and the
+    UPDATE re-checks that each job is still due.
+
+    Every claim bumps attempts, which is the lease token: the claiming worker
+    only writes the job's outcome while attempts still has the value it
+    claimed (see _owned).
+
+    Returns [(job id, attempt), ...] for the jobs claimed.
+    """
+    now = datetime.utcnow()
+    is_due = or_(
+        and_(PaymentJob.status == PaymentJobStatus.QUEUED, PaymentJob.run_at <= now),
+        and_(PaymentJob.status == PaymentJobStatus.PROCESSING, PaymentJob.locked_until < now)
+    )
+    due = select(PaymentJob.id).where(is_due).order_by(PaymentJob.run_at).limit(batch_size).with_for_update(skip_locked=True)
+    job_ids = db.session.scalars(due).all()
+    claimed = []
+    if job_ids:
+        result = db.session.execute(
+            update(PaymentJob).where(PaymentJob.id.in_(job_ids), is_due).values(
+                status=PaymentJobStatus.PROCESSING,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                attempts=PaymentJob.attempts + 1,
+                updated_at=now
+            ).returning(PaymentJob.id, PaymentJob.attempts).execution_options(synchronize_session=False)
+        )
+        claimed = sorted((row.id, row.attempts) for row in result)
+    db.session.commit()
+    return claimed
+
+
+def _owned(job_id, attempt):
+    """WHERE clause matching the job only while this worker's claim (attempt) holds it."""
+    return and_(
+        PaymentJob.id == job_id,
+        PaymentJob.status == PaymentJobStatus.PROCESSING,
+        PaymentJob.attempts == attempt
+    )
+
+
+def _write_outcome(job_id, attempt, **values):
+    """
+    Updates the job if this worker still holds it, else raises LeaseLostError.
+    Never touches a job that succeeded, failed or was claimed again. The
+    caller commits.
+    """
+    result = db.session.execute(
+        update(PaymentJob).where(_owned(job_id, attempt)).values(
+            locked_until=None, updated_at=datetime.utcnow(), **values
+        ).execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        raise LeaseLostError(f'Payment job {job_id} was claimed by another worker')
+
+
+def _renew_lease(job_id, attempt, lease_seconds):
+    """Extends this worker's lease on the job and commits; raises LeaseLostError if it no longer holds it."""
+    result = db.session.execute(
+        update(PaymentJob).where(_owned(job_id, attempt)).values(
+            locked_until=datetime.utcnow() + timedelta(seconds=lease_seconds)
+        ).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if not result.rowcount:
+        raise LeaseLostError(f'Payment job {job_id} was claimed by another worker')
+
+
+def _check_payable(job):
+    """Raises PaymentNotApplicableError unless the job's booking or order is still pending."""
+    target = db.session.get(Order, job.order_id) if job.order_id is not None else db.session.get(Booking, job.booking_id)
+    if target is None:
+        raise PaymentNotApplicableError('Booking or order no longer exists')
+    if target.status != BookingStatus.PENDING:
+        raise PaymentNotApplicableError(f'{type(target).__name__} is already {target.status.value}')
+
+
+def _apply_payment(job):
+    """
+    Records the Transaction of a charged job and confirms what it paid for,
+    with the same locking as a booking. Returns (transaction, bus_id,
+    confirmed seat count). The caller commits.
+    """
+    if job.order_id is not None:
+        order = db.session.get(Order, job.order_id)
+        claimed = db.session.execute(
+            update(Order).where(Order.id == order.id, Order.status == BookingStatus.PENDING)
+            .values(status=BookingStatus.CONFIRMED)
+        ).rowcount
+        if not claimed:
+            raise PaymentNotApplicableError(f'Order is already {order.status.value}')
+        seat_numbers = confirm_order_bookings(order)
+        if len(seat_numbers) != order.seat_count:
+            raise PaymentNotApplicableError('Some bookings of this order are no longer pending')
+        bus_id, confirmed = order.bus_id, len(seat_numbers)
+    else:
+        booking = Booking.query.filter_by(id=job.booking_id).with_for_update().populate_existing().first()
+        if booking is None or booking.status != BookingStatus.PENDING:
+            raise PaymentNotApplicableError('Booking is no longer pending')
+        bus = Bus.get_for_update(booking.bus_id)
+        booking.status = BookingStatus.CONFIRMED
+        bus.set_seat_status(booking.seat_number, BookingStatus.CONFIRMED)
+        bus_id, confirmed = booking.bus_id, 1
+
+    transaction = Transaction(
+        booking_id=job.booking_id,
+        order_id=job.order_id,
+        amount_paid=job.amount,
+        payment_method=job.payment_method
+    )
+    db.session.add(transaction)
+    db.session.flush()
+    return transaction, bus_id, confirmed
+
+
+def _give_up(job_id, attempt, error):
+    """Fails the job if this worker still holds it. Returns FAILED, or None if the lease was lost."""
+    try:
+        _write_outcome(job_id, attempt, status=PaymentJobStatus.FAILED, last_error=error)
+        db.session.commit()
+    except LeaseLostError:
+        db.session.rollback()
+        return None
+    PAYMENT_JOBS_TOTAL.labels('failed').inc()
+    return PaymentJobStatus.FAILED
+
+
+def _retry_delay(attempts, config):
+    """Exponential backoff with jitter: base * 2^(attempts - 1), capped, then 50-100% of that."""
+    delay = min(config['PAYMENT_RETRY_MAX_SECONDS'], config['PAYMENT_RETRY_BASE_SECONDS'] * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def process_payment_job(job_id, attempt, gateway):
+    """
+    Runs one job claimed as attempt: charges the gateway (outside any
+    database transaction, so gateway latency holds no locks), then records
+    the transaction and confirms the booking or order in one commit.
+
+    Transient gateway errors put the job back in the queue with backoff
+    until PAYMENT_MAX_ATTEMPTS; declines and bookings that can no longer be
+    paid fail it. Every outcome is written only while this worker still holds
+    the job: the lease is renewed right before charging, and if the job was
+    claimed again meanwhile nothing is written and the new owner finishes it
+    (the gateway sees the same reference from both). Returns the job's
+    resulting status, or None if the lease was lost.
+    """
+    config = current_app.config
+    job = db.session.get(PaymentJob, job_id)
+    charged = False
+    try:
+        _check_payable(job)
+        _renew_lease(job_id, attempt, config['PAYMENT_JOB_LEASE_SECONDS'])
+        gateway.charge(f'payment-job-{job_id}', job.amount, job.payment_method)
+        charged = True
+        # Mark the job first: on PostgreSQL this also locks it against a reclaim until commit
+        _write_outcome(job_id, attempt, status=PaymentJobStatus.SUCCEEDED, last_error=None)
+        transaction, bus_id, confirmed = _apply_payment(job)
+        amount, payment_method = transaction.amount_paid, transaction.payment_method
+        db.session.execute(
+            update(PaymentJob).where(PaymentJob.id == job_id).values(transaction_id=transaction.id)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    except LeaseLostError:
+        db.session.rollback()
+        logger.warning('Payment job %d attempt %d lost its lease; left to the worker that claimed it', job_id, attempt)
+        return None
+    except (PaymentDeclinedError, PaymentNotApplicableError) as e:
+        db.session.rollback()
+        if charged:
+            logger.warning('Payment job %d was charged but could not be applied (%s); refund it', job_id, e)
+        return _give_up(job_id, attempt, str(e))
+    except Exception as e:
+        db.session.rollback()
+        if attempt >= config['PAYMENT_MAX_ATTEMPTS']:
+            logger.exception('Payment job %d failed after %d attempts', job_id, attempt)
+            return _give_up(job_id, attempt, str(e))
+        try:
+            _write_outcome(
+                job_id, attempt,
+                status=PaymentJobStatus.QUEUED,
+                last_error=str(e),
+                run_at=datetime.utcnow() + timedelta(seconds=_retry_delay(attempt, config))
+            )
+            db.session.commit()
+        except LeaseLostError:
+            db.session.rollback()
+            return None
+        PAYMENT_JOBS_TOTAL.labels('retried').inc()
+        return PaymentJobStatus.QUEUED
+
+    response_cache.invalidate_buses(bus_id)
+    BOOKINGS_TOTAL.labels('confirmed').inc(confirmed)
+    record_payment(payment_method, amount)
+    PAYMENT_JOBS_TOTAL.labels('succeeded').inc()
+    return PaymentJobStatus.SUCCEEDED
+
+
+def record_payment(payment_method, amount):
+    label = PAYMENT_METHOD_LABELS.get(payment_method, 'other')
+    PAYMENTS_TOTAL.labels(label).inc()
+    PAYMENT_AMOUNT_TOTAL.labels(label).inc(amount or 0)
+
+
+def process_payment_jobs(batch_size=None):
+    """
+    Claims one batch of due jobs and processes them. Returns the number
+    processed. Must run in an app context.
+    """
+    config = current_app.config
+    gateway = SimulatedGateway.from_config(config)
+    claimed = claim_payment_jobs(batch_size or config['PAYMENT_WORKER_BATCH_SIZE'], config['PAYMENT_JOB_LEASE_SECONDS'])
+    for job_id, attempt in claimed:
+        process_payment_job(job_id, attempt, gateway)
+    return len(claimed)
+
+
+def run_payment_worker(app, poll_interval, batch_size=None):
+    """
+    Processes payment jobs forever, polling every poll_interval seconds
+    while the queue is empty.
+    """
+    while True:
+        try:
+            with app.app_context():
+                processed = process_payment_jobs(batch_size)
+        except Exception:
+            logger.exception('Payment worker batch failed')
+            processed = 0
+        if not processed:
+            time.sleep(poll_interval)
+
+
+def start_payment_worker(app):
+    """
+    Starts an in-process payment worker thread with the first request the app
+    serves, polling every PAYMENT_WORKER_INTERVAL seconds (0 leaves payments
+    to `flask payment-worker`). Starting on a request rather than here keeps
+    CLI commands from running one, and gives each gunicorn worker its own
+    thread after the fork. Several workers can run at once: each claims
+    different jobs.
+    """
+    interval = app.config.get('PAYMENT_WORKER_INTERVAL', 0)
+    if not interval:
+        return
+    lock = threading.Lock()
+    started = []
+
+    @app.before_request
+    def start():
+        if started:
+            return
+        with lock:
+            if not started:
+                thread = threading.Thread(target=run_payment_worker, args=(app, interval), name='payment-worker', daemon=True)
+                thread.start()
+                started.append(thread)
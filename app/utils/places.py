@@ -0,0 +1,26 @@
+import re
+
+
+ROUTE_SEPARATOR = re.compile(r'\s+to\s+', re.IGNORECASE)
+
+
+def normalize_place(name):
+    """
+    Normalizes a place name for storage and lookup: trimmed, single-spaced, lowercase.
+    """
+    if name is None:
+        return None
+    return ' '.join(name.split()).lower() or None
+
+
+def parse_route(route):
+    """
+    Splits an "X to Y" route string into normalized (origin, destination).
+    Returns (None, None) when the route doesn't follow that format.
+    """
+    if not route:
+        return None, None
+    parts = ROUTE_SEPARATOR.split(route.strip(), maxsplit=1)
+    if len(parts) != 2:
+        return None, None
+    return normalize_place(parts[0]), normalize_place(parts[1])
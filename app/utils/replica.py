@@ -0,0 +1,96 @@
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+
+
+def _is_write(clause):
+    return isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None
+
+
+def reads_from_replica():
+    """
+    True when the current request reads from the replica: one is configured
+    and this is a GET (or HEAD) outside the client's read-your-writes window.
+    """
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+    config = current_app.config
+    if REPLICA_BIND not in config.get('SQLALCHEMY_BINDS', {}) or g.get('read_primary'):
+        return False
+    try:
+        until = float(request.cookies.get(config.get('READ_YOUR_WRITES_COOKIE', 'read_primary_until'), 0))
+    except ValueError:
+        until = 0
+    return until <= time.time()
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of GET requests to the 'replica' bind.
+
+    Everything else goes through the normal Flask-SQLAlchemy bind lookup (the
+    primary): non-GET requests, the CLI, flushes, INSERT/UPDATE/DELETE
+    statements and SELECT ... FOR UPDATE. Without a replica bind configured it
+    behaves exactly like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not _is_write(clause) and reads_from_replica():
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReadYourWrites:
+    """
+    Keeps a client on the primary for READ_YOUR_WRITES_SECONDS after it commits
+    a write (a booking, payment, ...), so its next GETs cannot see a replica
+    that has not caught up yet. The window travels in a cookie holding its end
+    time; use_primary() pins the rest of a request to the primary.
+    """
+
+    def __init__(self, db=None, app=None):
+        self.db = db
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, db=None):
+        if db is not None:
+            self.db = db
+        if not event.contains(self.db.session, 'after_commit', self._after_commit):
+            event.listen(self.db.session, 'after_commit', self._after_commit)
+        app.after_request(self._set_window)
+
+    @staticmethod
+    def use_primary():
+        g.read_primary = True
+
+    def _after_commit(self, session):
+        if has_request_context() and request.method not in READ_METHODS:
+            g.db_committed = True
+
+    def _set_window(self, response):
+        if not g.pop('db_committed', False) or response.status_code >= 400:
+            return response
+        config = current_app.config
+        if REPLICA_BIND not in config.get('SQLALCHEMY_BINDS', {}):
+            return response
+        window = config.get('READ_YOUR_WRITES_SECONDS', 10)
+        # Same SameSite policy as the JWT cookie: the frontend is on another
+        # site, and a Strict cookie would never come back with its GETs
+        response.set_cookie(
+            config.get('READ_YOUR_WRITES_COOKIE', 'read_primary_until'),
+            str(int(time.time()) + window),
+            httponly=True,
+            secure=True,
+            samesite=config.get('JWT_COOKIE_SAMESITE', 'None'),
+            max_age=window
+        )
+        return response
@@ -0,0 +1,284 @@
+from datetime import datetime
+from collections import defaultdict
+from sqlalchemy import exists, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db, seat_holds
+from app.models.models import Booking, BookingStatus, Bus, Order, PaymentJob, PaymentJobStatus
+
+
+# Statuses that hold a seat. Only one booking per (bus_id, seat_number) may be
+# in one of these at a time, enforced by the uq_bookings_active_seat index.
+ACTIVE_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+
+# Payment job statuses that still hold a booking (or order): it is not expired
+# while its payment runs, and it cannot get a second job
+ACTIVE_PAYMENT_STATUSES = (PaymentJobStatus.QUEUED, PaymentJobStatus.PROCESSING)
+
+
+class SeatConflictError(Exception):
+    """Raised when one or more requested seats already have an active booking or hold."""
+
+    def __init__(self, seat_numbers, reason='booked'):
+        self.seat_numbers = sorted(seat_numbers)
+        self.reason = reason
+        super().__init__(f"Seats already {reason}: {self.seat_numbers}")
+
+    def to_response(self):
+        if len(self.seat_numbers) == 1:
+            message = f'Seat {self.seat_numbers[0]} is already {self.reason}'
+        else:
+            message = f'Seats {", ".join(str(seat) for seat in self.seat_numbers)} are already {self.reason}'
+        return {'message': message, 'seat_numbers': self.seat_numbers}, 409
+
+
+def taken_seats(bus_id, seat_numbers):
+    """
+    Returns the subset of seat_numbers that have an active booking on the bus.
+    """
+    rows = db.session.query(Booking.seat_number).filter(
+        Booking.bus_id == bus_id,
+        Booking.seat_number.in_(seat_numbers),
+        Booking.status.in_(ACTIVE_STATUSES)
+    ).all()
+    return {row.seat_number for row in rows}
+
+
+def check_holds(bus_id, seat_numbers, customer_id):
+    """
+    Raises SeatConflictError if another customer holds any of the seats.
+    """
+    held = seat_holds.held_by_others(bus_id, seat_numbers, customer_id)
+    if held:
+        raise SeatConflictError(held, reason='held')
+
+
+def _flush_or_conflict(bus_id, seat_numbers):
+    """
+    Flushes pending inserts/updates. A unique violation on an active seat rolls
+    the session back and raises SeatConflictError; other integrity errors are
+    re-raised unchanged.
+    """
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        conflicts = taken_seats(bus_id, seat_numbers)
+        if conflicts:
+            raise SeatConflictError(conflicts)
+        raise
+
+
+def reserve_seats(customer_id, bus_id, seat_numbers, status=BookingStatus.PENDING):
+    """
+    Reserves seats with insert-or-fail semantics.
+
+    The bookings are inserted first and the database uniqueness rule decides
+    who gets a contested seat, so no lock is held while checking. Only after
+    the insert succeeds is the bus row locked to update its seat map. On
+    conflict the session is rolled back and SeatConflictError is raised.
+    Seats held by another customer are refused, and the customer's own holds
+    on the seats are released once the rows are in. The caller commits.
+    """
+    check_holds(bus_id, seat_numbers, customer_id)
+    bookings = [
+        Booking(customer_id=customer_id, bus_id=bus_id, seat_number=seat_number, status=status)
+        for seat_number in seat_numbers
+    ]
+    db.session.add_all(bookings)
+    _flush_or_conflict(bus_id, seat_numbers)
+    seat_holds.release(bus_id, seat_numbers, customer_id)
+
+    bus = Bus.get_for_update(bus_id)
+    bus.set_seats_status(seat_numbers, status)
+    return bookings
+
+
+def bulk_reserve_seats(customer_id, bus_id, seat_numbers, status=BookingStatus.PENDING, order_id=None):
+    """
+    Reserves a group of seats in a fixed number of statements: one IN query to
+    report conflicts up front, one multi-row INSERT ... RETURNING, and one
+    seat map update. The uniqueness rule still guards against a concurrent
+    booker taking a seat between the check and the insert. Holds are handled
+    as in reserve_seats.
+
+    Returns (booking_date, [(booking_id, seat_number), ...]). The caller commits.
+    """
+    check_holds(bus_id, seat_numbers, customer_id)
+    conflicts = taken_seats(bus_id, seat_numbers)
+    if conflicts:
+        raise SeatConflictError(conflicts)
+
+    booking_date = datetime.utcnow()
+    rows = [
+        {
+            'customer_id': customer_id,
+            'bus_id': bus_id,
+            'seat_number': seat_number,
+            'booking_date': booking_date,
+            'status': status,
+            'order_id': order_id,
+        }
+        for seat_number in seat_numbers
+    ]
+    try:
+        result = db.session.execute(insert(Booking).returning(Booking.id, Booking.seat_number), rows)
+        inserted = [(row.id, row.seat_number) for row in result]
+    except IntegrityError:
+        db.session.rollback()
+        conflicts = taken_seats(bus_id, seat_numbers)
+        if conflicts:
+            raise SeatConflictError(conflicts)
+        raise
+    seat_holds.release(bus_id, seat_numbers, customer_id)
+
+    bus = Bus.get_for_update(bus_id)
+    bus.set_seats_status(seat_numbers, status)
+    return booking_date, inserted
+
+
+def reserve_order(customer_id, bus, seat_numbers, status=BookingStatus.PENDING):
+    """
+    Reserves a group of seats as one Order: the order row, then its bookings
+    as in bulk_reserve_seats. On conflict the session is rolled back and
+    SeatConflictError is raised.
+
+    Returns (order, booking_date, [(booking_id, seat_number), ...]). The caller commits.
+    """
+    order = Order(
+        customer_id=customer_id,
+        bus_id=bus.id,
+        total_amount=len(seat_numbers) * bus.cost_per_seat,
+        seat_count=len(seat_numbers),
+        status=status
+    )
+    db.session.add(order)
+    db.session.flush()
+    try:
+        booking_date, inserted = bulk_reserve_seats(customer_id, bus.id, seat_numbers, status, order_id=order.id)
+    except SeatConflictError:
+        db.session.rollback()
+        raise
+    return order, booking_date, inserted
+
+
+def confirm_order_bookings(order):
+    """
+    Confirms the order's pending bookings with one UPDATE ... RETURNING and
+    marks their seats confirmed on the bus, however many seats the order has.
+    Returns the confirmed seat numbers. The caller commits.
+    """
+    result = db.session.execute(
+        update(Booking).where(
+            Booking.order_id == order.id,
+            Booking.status == BookingStatus.PENDING
+        ).values(status=BookingStatus.CONFIRMED).returning(Booking.seat_number)
+        .execution_options(synchronize_session=False)
+    )
+    seat_numbers = [row.seat_number for row in result]
+    if seat_numbers:
+        bus = Bus.get_for_update(order.bus_id)
+        bus.set_seats_status(seat_numbers, BookingStatus.CONFIRMED)
+    return seat_numbers
+
+
+def move_booking(booking, seat_number):
+    """
+    Moves a booking to another seat with the same insert-or-fail semantics as
+    reserve_seats. Only PENDING/CONFIRMED bookings hold a seat to move: the old
+    seat of a canceled one may belong to someone else by now, so the seat map
+    is left alone for those (callers refuse to move them). The caller commits.
+    """
+    bus_id = booking.bus_id
+    check_holds(bus_id, [seat_number], booking.customer_id)
+    old_seat_number = booking.seat_number
+    booking.seat_number = seat_number
+    _flush_or_conflict(bus_id, [seat_number])
+
+    if booking.status in ACTIVE_STATUSES:
+        bus = Bus.get_for_update(bus_id)
+        bus.set_seat_status(old_seat_number, None)
+        bus.set_seat_status(seat_number, booking.status)
+    return booking
+
+
+def payment_in_progress(booking):
+    """
+    True if a payment for the booking (or its order) is queued or in progress.
+    """
+    owners = [PaymentJob.booking_id == booking.id]
+    if booking.order_id is not None:
+        owners.append(PaymentJob.order_id == booking.order_id)
+    return db.session.query(
+        exists().where(or_(*owners), PaymentJob.status.in_(ACTIVE_PAYMENT_STATUSES))
+    ).scalar()
+
+
+def delete_booking(booking):
+    """
+    Deletes a booking. Its seat is released only if the booking still held it:
+    the seat of a canceled (e.g. expired) booking may belong to someone else by
+    now. Finished payment jobs for the booking are detached from it first.
+    The caller checks payment_in_progress and commits.
+    """
+    if booking.status in ACTIVE_STATUSES:
+        bus = Bus.get_for_update(booking.bus_id)
+        bus.set_seat_status(booking.seat_number, None)
+    db.session.execute(
+        update(PaymentJob).where(PaymentJob.booking_id == booking.id).values(booking_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.delete(booking)
+
+
+def expire_pending_bookings(cutoff, batch_size):
+    """
+    Cancels up to batch_size PENDING bookings made before cutoff, oldest
+    first, and frees their seats.
+
+    The batch is picked through the (status, booking_date) index (skipping
+    rows another sweeper has locked, on PostgreSQL) and canceled with one
+    UPDATE ... RETURNING that re-checks the status, so a booking paid for in
+    the meantime is left alone. Bookings (or orders) with a payment queued or
+    in progress are not expired. The affected buses are then locked in id
+    order to update their seat maps, and orders with an expired booking are
+    canceled too. The caller commits.
+
+    Returns {bus_id: [released seat numbers]}.
+    """
+    active_payment = PaymentJob.status.in_(ACTIVE_PAYMENT_STATUSES)
+    candidates = select(Booking.id).where(
+        Booking.status == BookingStatus.PENDING,
+        Booking.booking_date < cutoff,
+        ~exists().where(PaymentJob.booking_id == Booking.id, active_payment),
+        ~exists().where(PaymentJob.order_id == Booking.order_id, active_payment)
+    ).order_by(Booking.booking_date).limit(batch_size).with_for_update(skip_locked=True)
+    booking_ids = db.session.scalars(candidates).all()
+    if not booking_ids:
+        return {}
+
+    result = db.session.execute(
+        update(Booking).where(
+            Booking.id.in_(booking_ids),
+            Booking.status == BookingStatus.PENDING
+        ).values(status=BookingStatus.CANCELED).returning(Booking.bus_id, Booking.seat_number, Booking.order_id)
+        .execution_options(synchronize_session=False)
+    )
+    released = defaultdict(list)
+    order_ids = set()
+    for row in result:
+        released[row.bus_id].append(row.seat_number)
+        if row.order_id is not None:
+            order_ids.add(row.order_id)
+
+    if order_ids:
+        db.session.execute(
+            update(Order).where(
+                Order.id.in_(order_ids),
+                Order.status == BookingStatus.PENDING
+            ).values(status=BookingStatus.CANCELED).execution_options(synchronize_session=False)
+        )
+
+    for bus_id in sorted(released):
+        bus = Bus.get_for_update(bus_id)
+        bus.set_seats_status(released[bus_id], None)
+    return dict(released)
@@ -0,0 +1,83 @@
+"""
+Compact per-bus seat occupancy map.
+
+A bus stores one byte per seat: index 0 is seat 1, and each byte holds the
+seat state below. Reads are a single column fetch and a byte scan instead of
+loading every booking of the bus.
+"""
+
+FREE = 0
+PENDING = 1
+CONFIRMED = 2
+
+STATE_NAMES = {
+    FREE: 'free',
+    PENDING: 'pending',
+    CONFIRMED: 'confirmed',
+}
+
+
+def empty(number_of_seats):
+    """
+    Returns a map with every seat free.
+    """
+    return bytes(number_of_seats)
+
+
+def build(number_of_seats, seat_states):
+    """
+    Builds a map from (seat_number, state) pairs. A confirmed seat wins over a
+    pending one if the same seat shows up twice.
+    """
+    seats = bytearray(number_of_seats)
+    for seat_number, state in seat_states:
+        if 1 <= seat_number <= number_of_seats and state > seats[seat_number - 1]:
+            seats[seat_number - 1] = state
+    return bytes(seats)
+
+
+def set_state(seat_map, seat_number, state):
+    """
+    Returns a copy of the map with one seat set to the given state.
+    """
+    seats = bytearray(seat_map)
+    seats[seat_number - 1] = state
+    return bytes(seats)
+
+
+def set_states(seat_map, seat_numbers, state):
+    """
+    Returns a copy of the map with several seats set to the given state.
+    """
+    seats = bytearray(seat_map)
+    for seat_number in seat_numbers:
+        seats[seat_number - 1] = state
+    return bytes(seats)
+
+
+def get_state(seat_map, seat_number):
+    """
+    Returns the state of one seat.
+    """
+    return seat_map[seat_number - 1]
+
+
+def count_state(seat_map, state):
+    """
+    Returns how many seats are in the given state.
+    """
+    return seat_map.count(state)
+
+
+def seats_in_state(seat_map, state):
+    """
+    Returns the seat numbers currently in the given state.
+    """
+    return [index + 1 for index, value in enumerate(seat_map) if value == state]
+
+
+def seats_not_in_state(seat_map, state):
+    """
+    Returns the seat numbers not in the given state.
+    """
+    return [index + 1 for index, value in enumerate(seat_map) if value != state]
@@ -0,0 +1,102 @@
+import logging
+import time
+from collections import Counter
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+
+
+logger = logging.getLogger('app.sql')
+
+
+def resource_name():
+    """
+    Returns the Flask-RESTful Resource class handling the current request
+    (or the endpoint name for plain views).
+    """
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, 'view_class', None)
+    if view_class is not None:
+        return view_class.__name__
+    return request.endpoint or request.path
+
+
+class SQLInstrumentation:
+    """
+    Counts SQL statements and database time per request and flags N+1 patterns.
+
+    Hooks every engine of the given Flask-SQLAlchemy instance. Within a request
+    it records each statement's shape (its SQL text; parameters are bound
+    separately, so lazy loads of the same relationship share one shape). At the
+    end of the request it logs the totals, warns when a shape repeats at least
+    N_PLUS_ONE_THRESHOLD times or the Resource's query budget is exceeded, and
+    in development adds X-SQL-* response headers.
+
+    A Resource can set a query_budget class attribute to override SQL_QUERY_BUDGET.
+    """
+
+    def __init__(self, db=None, app=None):
+        self.db = db
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, db=None):
+        if db is not None:
+            self.db = db
+        if not app.config.get('SQL_INSTRUMENTATION_ENABLED', True):
+            return
+
+        with app.app_context():
+            for engine in self.db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        g.sql_stats = {'count': 0, 'time': 0.0, 'shapes': Counter()}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the statement's execution context rather than the connection:
+        # after_cursor_execute does not fire when the statement raises (e.g. an
+        # IntegrityError on a seat conflict), and the context goes away with it.
+        context._sql_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_sql_started', None)
+        if started is None or not has_app_context():
+            return
+        stats = g.get('sql_stats')
+        if stats is None:
+            return
+        stats['count'] += 1
+        stats['time'] += time.perf_counter() - started
+        stats['shapes'][' '.join(statement.split())] += 1
+
+    def _finish_request(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+
+        config = current_app.config
+        name = resource_name()
+        view_class = getattr(current_app.view_functions.get(request.endpoint), 'view_class', None)
+        budget = getattr(view_class, 'query_budget', None) or config.get('SQL_QUERY_BUDGET', 20)
+        threshold = config.get('N_PLUS_ONE_THRESHOLD', 5)
+        db_time_ms = stats['time'] * 1000
+        repeated = [(shape, count) for shape, count in stats['shapes'].most_common() if count >= threshold]
+
+        logger.info('%s %s [%s] %d queries, %.1f ms in DB', request.method, request.path, name, stats['count'], db_time_ms)
+        for shape, count in repeated:
+            logger.warning('Possible N+1 in %s (%s %s): statement ran %d times: %s',
+                           name, request.method, request.path, count, shape[:300])
+        if stats['count'] > budget:
+            logger.warning('%s (%s %s) ran %d queries, over its budget of %d',
+                           name, request.method, request.path, stats['count'], budget)
+
+        if config.get('SQL_INSTRUMENTATION_HEADERS', False):
+            response.headers['X-SQL-Query-Count'] = str(stats['count'])
+            response.headers['X-SQL-Time-Ms'] = f'{db_time_ms:.2f}'
+            response.headers['X-SQL-Query-Budget'] = str(budget)
+            response.headers['X-SQL-N-Plus-One'] = str(len(repeated))
+        return response
@@ -0,0 +1,69 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from app.extensions import db, response_cache
+from app.utils.metrics import BOOKINGS_TOTAL
+from app.utils.reservations import expire_pending_bookings
+
+
+logger = logging.getLogger('app.sweeper')
+
+
+def sweep_pending_bookings(hold_minutes, batch_size, pause=0.0):
+    """
+    Expires every PENDING booking older than hold_minutes, one batch per
+    transaction so row and bus locks are only held for one batch at a time.
+
+    Returns (bookings expired, buses touched). Must run in an app context.
+    """
+    cutoff = datetime.utcnow() - timedelta(minutes=hold_minutes)
+    expired = 0
+    buses = set()
+    while True:
+        released = expire_pending_bookings(cutoff, batch_size)
+        db.session.commit()
+        if not released:
+            break
+
+        count = sum(len(seats) for seats in released.values())
+        expired += count
+        buses.update(released)
+        response_cache.invalidate_buses(*released)
+        BOOKINGS_TOTAL.labels('expired').inc(count)
+        if count < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if expired:
+        logger.info('Expired %d pending bookings on %d buses (hold window %d min)', expired, len(buses), hold_minutes)
+    return expired, len(buses)
+
+
+def start_sweeper(app):
+    """
+    Starts the in-process sweeper thread when BOOKING_SWEEP_INTERVAL is set
+    (seconds; 0 leaves expiry to `flask expire-bookings` run from a scheduler).
+    Every worker may run one: concurrent sweeps skip each other's rows.
+    """
+    interval = app.config.get('BOOKING_SWEEP_INTERVAL', 0)
+    if not interval:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    sweep_pending_bookings(
+                        app.config['BOOKING_HOLD_MINUTES'],
+                        app.config['BOOKING_SWEEP_BATCH_SIZE'],
+                        app.config['BOOKING_SWEEP_PAUSE']
+                    )
+            except Exception:
+                logger.exception('Pending booking sweep failed')
+
+    thread = threading.Thread(target=run, name='booking-sweeper', daemon=True)
+    thread.start()
+    return thread
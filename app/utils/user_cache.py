@@ -0,0 +1,40 @@
+from app.extensions import db
+from app.models.models import User
+from app.utils.cache import TTLCache
+
+
+# Flat user summaries (User.to_dict(serialize=False) shape) keyed by user id.
+# Invalidated whenever a user's role changes or the user is deleted.
+user_summaries = TTLCache(ttl=300, max_entries=10000)
+
+
+def get_user_summary(user_id):
+    """
+    Returns {id, name, email, role} for a user, or None if the user doesn't
+    exist. Served from the cache when possible, otherwise one narrow SELECT
+    with no relationships loaded.
+    """
+    summary = user_summaries.get(user_id)
+    if summary is not None:
+        return summary
+
+    row = db.session.query(User.id, User.name, User.email, User.role).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    summary = {
+        'id': row.id,
+        'name': row.name,
+        'email': row.email,
+        'role': row.role.value if hasattr(row.role, 'value') else str(row.role),
+    }
+    user_summaries.set(user_id, summary)
+    return summary
+
+
+def invalidate_users(*user_ids):
+    """
+    Drops cached summaries, e.g. after a role change or deletion.
+    """
+    for user_id in user_ids:
+        user_summaries.delete(int(user_id))
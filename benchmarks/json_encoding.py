@@ -0,0 +1,106 @@
+"""
+Micro-benchmark for the JSON representation.
+
+Encodes payloads shaped like the API's large responses (a bus search result
+and an admin bookings page with nested customer, bus and transaction) with
+Flask-RESTful's default encoder (json.dumps) and with app.utils.json_output,
+and reports the CPU time per payload. The "native" rows encode the same data
+with datetimes and enums left as objects instead of pre-converted strings.
+
+    python -m benchmarks.json_encoding --items 5000 --repeat 20
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from app.models.models import BookingStatus, UserRole
+from app.utils import json_output
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compare JSON encoders on large API payloads.')
+    parser.add_argument('--items', type=int, default=5000, help='Buses/bookings per payload.')
+    parser.add_argument('--repeat', type=int, default=20, help='Encodings timed per encoder.')
+    parser.add_argument('--output', help='Write the results as JSON to this file.')
+    return parser.parse_args()
+
+
+def bus(i, native):
+    departure = datetime(2030, 1, 1, 6) + timedelta(minutes=15 * i)
+    arrival = departure + timedelta(hours=8)
+    return {
+        'id': i,
+        'driver_id': i % 97,
+        'number_of_seats': 49,
+        'cost_per_seat': 1450.0,
+        'route': 'Nairobi to Mombasa',
+        'departure_time': departure if native else departure.isoformat(),
+        'arrival_time': arrival if native else arrival.isoformat(),
+        'is_available': True,
+        'available_seats': list(range(1, 49, 2)),
+    }
+
+
+def booking(i, native):
+    booked = datetime(2029, 12, 20, 9) + timedelta(seconds=37 * i)
+    status = BookingStatus.CONFIRMED if i % 3 else BookingStatus.PENDING
+    return {
+        'id': i,
+        'customer_id': i % 1000,
+        'bus_id': i % 300,
+        'seat_number': i % 49 + 1,
+        'booking_date': booked if native else booked.isoformat(),
+        'status': status if native else status.value,
+        'customer': {'id': i % 1000, 'name': f'Customer {i % 1000}', 'email': f'customer{i % 1000}@example.com',
+                     'role': UserRole.CUSTOMER if native else UserRole.CUSTOMER.value},
+        'bus': bus(i % 300, native),
+        'transaction': {'id': i, 'booking_id': i, 'amount_paid': 1450.0,
+                        'payment_date': booked if native else booked.isoformat(), 'payment_method': 'M-Pesa'},
+    }
+
+
+def cpu_ms(encode, payload, repeat):
+    encode(payload)  # Warm up
+    started = time.process_time()
+    for _ in range(repeat):
+        size = len(encode(payload))
+    return (time.process_time() - started) * 1000 / repeat, size
+
+
+def main():
+    args = parse_args()
+    encoders = {
+        'json (Flask-RESTful default)': lambda data: json.dumps(data).encode(),
+        f'json_output ({"orjson" if json_output.orjson else "json fallback"})': json_output.dumps,
+    }
+    payloads = {
+        'bus search': lambda native: [bus(i, native) for i in range(args.items)],
+        'admin bookings': lambda native: {'items': [booking(i, native) for i in range(args.items)],
+                                          'next_cursor': 'eyJ2IjpbXX0', 'per_page': args.items},
+    }
+
+    results = []
+    for payload_name, build in payloads.items():
+        baseline = None
+        for native in (False, True):
+            payload = build(native)
+            for encoder_name, encode in encoders.items():
+                if native and encoder_name.startswith('json ('):
+                    continue  # The standard encoder cannot take datetimes or enums
+                ms, size = cpu_ms(encode, payload, args.repeat)
+                baseline = baseline or ms
+                results.append({'payload': payload_name, 'encoder': encoder_name, 'native': native,
+                                'cpu_ms': round(ms, 2), 'bytes': size, 'speedup': round(baseline / ms, 2)})
+
+    print(f'{"payload":<16}{"encoder":<32}{"native":<8}{"cpu ms":>10}{"bytes":>12}{"speedup":>9}')
+    for row in results:
+        print(f'{row["payload"]:<16}{row["encoder"]:<32}{str(row["native"]):<8}'
+              f'{row["cpu_ms"]:>10.2f}{row["bytes"]:>12}{row["speedup"]:>8.2f}x')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'items': args.items, 'repeat': args.repeat, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
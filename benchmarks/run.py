@@ -0,0 +1,417 @@
+"""
+Load-test benchmark for the booking API.
+
+Builds the app with create_app() against a throwaway SQLite file (or the
+database given with --database-url), seeds a dataset, then drives a weighted
+mix of session checks, searches, seat-map reads, single and multi-seat
+bookings and payment confirmations (per booking, and per order for the
+orders the multi-seat bookings create) from --concurrency threads.
+
+For every scenario it reports p50/p95/p99 latency, throughput and SQL
+statements per request, and checks afterwards that no seat ended up with two
+active bookings. Results are written as JSON; with --baseline a previous
+result file is compared and the run exits non-zero on a regression.
+
+    python -m benchmarks.run --requests 2000 --concurrency 8 --output bench.json
+    python -m benchmarks.run --baseline bench.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+
+PLACES = ['Nairobi', 'Mombasa', 'Kisumu', 'Nakuru', 'Eldoret', 'Thika', 'Nyeri', 'Malindi', 'Kitale', 'Garissa']
+
+DEFAULT_MIX = {
+    'session_check': 30,
+    'search': 25,
+    'seat_map': 25,
+    'book_single': 10,
+    'book_multi': 5,
+    'confirm_payment': 5,
+    'confirm_order': 3,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Database to benchmark against (default: a temporary SQLite file). It is dropped and re-created.')
+    parser.add_argument('--requests', type=int, default=2000, help='Total requests across all scenarios.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of client threads.')
+    parser.add_argument('--mix', default=','.join(f'{name}={weight}' for name, weight in DEFAULT_MIX.items()),
+                        help='Scenario weights, e.g. search=50,seat_map=50.')
+    parser.add_argument('--users', type=int, default=500, help='Customers to seed.')
+    parser.add_argument('--buses', type=int, default=100, help='Buses to seed.')
+    parser.add_argument('--seats', type=int, default=40, help='Seats per bus.')
+    parser.add_argument('--days', type=int, default=7, help='Days the bus departures are spread over.')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the dataset and the request mix.')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the response cache.')
+    parser.add_argument('--output', help='Write the results as JSON to this file.')
+    parser.add_argument('--baseline', help='Compare against a previous results file and fail on regression.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 latency/throughput slowdown versus the baseline (0.25 = 25%%).')
+    return parser.parse_args(argv)
+
+
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f'Unknown scenario {name!r} (choose from {", ".join(DEFAULT_MIX)})')
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def build_app(args):
+    """
+    Creates the app against the benchmark database. Settings are read from the
+    environment when app.config is imported, so it is set first.
+    """
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        handle, path = tempfile.mkstemp(prefix='bookbus-bench-', suffix='.db')
+        os.close(handle)
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+    if args.no_cache:
+        os.environ['RESPONSE_CACHE_ENABLED'] = 'false'
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import create_app
+    return create_app()
+
+
+def seed(app, args, rng):
+    """
+    Seeds customers, drivers, buses and some bookings with bulk inserts, and
+    returns what the scenarios need: tokens, search keys, bus ids and pending
+    booking ids to pay for.
+    """
+    from sqlalchemy import insert
+    from app.extensions import db, password_hasher
+    from app.models.models import Booking, BookingStatus, Bus, User, UserRole
+    from app.utils.jwt_utils import generate_token
+    from app.utils.places import normalize_place
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        password = password_hasher.hash('benchmark')
+        users = [
+            {'name': f'Customer {i}', 'email': f'customer{i}@bench.local', '_password_hash': password, 'role': UserRole.CUSTOMER}
+            for i in range(args.users)
+        ] + [
+            {'name': f'Driver {i}', 'email': f'driver{i}@bench.local', '_password_hash': password, 'role': UserRole.DRIVER}
+            for i in range(max(1, args.buses // 5))
+        ]
+        db.session.execute(insert(User), users)
+        customer_ids = [row.id for row in db.session.query(User.id).filter(User.role == UserRole.CUSTOMER)]
+        driver_ids = [row.id for row in db.session.query(User.id).filter(User.role == UserRole.DRIVER)]
+
+        start = datetime.utcnow().replace(hour=6, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        buses = []
+        for _ in range(args.buses):
+            origin, destination = rng.sample(PLACES, 2)
+            departure = start + timedelta(days=rng.randrange(args.days), hours=rng.randrange(16))
+            buses.append({
+                'driver_id': rng.choice(driver_ids),
+                'number_of_seats': args.seats,
+                'cost_per_seat': rng.choice([400, 500, 650, 800]),
+                'route': f'{origin} to {destination}',
+                'origin': normalize_place(origin),
+                'destination': normalize_place(destination),
+                'departure_time': departure,
+                'arrival_time': departure + timedelta(hours=rng.randint(1, 9)),
+                'is_available': True,
+            })
+        db.session.execute(insert(Bus), buses)
+        bus_rows = db.session.query(Bus.id, Bus.origin, Bus.destination, Bus.departure_time).all()
+
+        # Pre-book the top quarter of every bus, half of it left pending for the payment scenario
+        bookings = []
+        reserved = max(1, args.seats // 4)
+        for bus in bus_rows:
+            for seat_number in range(args.seats - reserved + 1, args.seats + 1):
+                bookings.append({
+                    'customer_id': rng.choice(customer_ids),
+                    'bus_id': bus.id,
+                    'seat_number': seat_number,
+                    'booking_date': datetime.utcnow(),
+                    'status': BookingStatus.PENDING if seat_number % 2 else BookingStatus.CONFIRMED,
+                })
+        db.session.execute(insert(Booking), bookings)
+        db.session.commit()
+
+        # Seat maps, and the seat counters derived from them
+        for bus in Bus.query.all():
+            bus.load_seat_map()
+        db.session.commit()
+
+        pending_ids = [row.id for row in db.session.query(Booking.id).filter(Booking.status == BookingStatus.PENDING)]
+        rng.shuffle(pending_ids)
+        tokens = [generate_token(customer_id, UserRole.CUSTOMER) for customer_id in rng.sample(customer_ids, min(50, len(customer_ids)))]
+
+    return {
+        'customer_ids': customer_ids,
+        'buses': [(bus.id, bus.origin, bus.destination, bus.departure_time.date().isoformat()) for bus in bus_rows],
+        'bookable_seats': args.seats - reserved,
+        'pending_ids': pending_ids,
+        'pending_order_ids': [],
+        'tokens': tokens,
+    }
+
+
+class Scenarios:
+    """
+    One method per scenario. Each issues one request and returns (endpoint label, response).
+    """
+
+    def __init__(self, client, data, rng, pending_lock):
+        self.client = client
+        self.data = data
+        self.rng = rng
+        self.pending_lock = pending_lock
+
+    def session_check(self):
+        token = self.rng.choice(self.data['tokens'])
+        return 'GET /check_session', self.client.get('/check_session', headers={'Cookie': f'jwt_token={token}'})
+
+    def search(self):
+        _, origin, destination, day = self.rng.choice(self.data['buses'])
+        url = f'/buses/search?from={origin}&to={destination}&departure_date={day}'
+        return 'GET /buses/search', self.client.get(url)
+
+    def seat_map(self):
+        bus_id = self.rng.choice(self.data['buses'])[0]
+        return 'GET /bus/<id>', self.client.get(f'/bus/{bus_id}')
+
+    def book_single(self):
+        bus_id = self.rng.choice(self.data['buses'])[0]
+        body = {
+            'customer_id': self.rng.choice(self.data['customer_ids']),
+            'bus_id': bus_id,
+            'seat_number': self.rng.randint(1, self.data['bookable_seats']),
+        }
+        return 'POST /user/book_seat', self.client.post('/user/book_seat', json=body)
+
+    def book_multi(self):
+        bus_id = self.rng.choice(self.data['buses'])[0]
+        seats = self.rng.sample(range(1, self.data['bookable_seats'] + 1), min(4, self.data['bookable_seats']))
+        body = {'customer_id': self.rng.choice(self.data['customer_ids']), 'bus_id': bus_id, 'seat_numbers': seats}
+        response = self.client.post('/api/bookings/multiple', json=body)
+        if response.status_code == 201:
+            with self.pending_lock:
+                self.data['pending_order_ids'].append(response.get_json()['order_id'])
+        return 'POST /api/bookings/multiple', response
+
+    def confirm_payment(self):
+        with self.pending_lock:
+            booking_id = self.data['pending_ids'].pop() if self.data['pending_ids'] else None
+        if booking_id is None:
+            return self.seat_map()
+        url = f'/api/bookings/{booking_id}/confirm_payment'
+        return 'POST /api/bookings/<id>/confirm_payment', self.client.post(url, json={'payment_method': 'M-Pesa'})
+
+    def confirm_order(self):
+        with self.pending_lock:
+            order_id = self.data['pending_order_ids'].pop() if self.data['pending_order_ids'] else None
+        if order_id is None:
+            return self.book_multi()
+        url = f'/api/orders/{order_id}/confirm_payment'
+        return 'POST /api/orders/<id>/confirm_payment', self.client.post(url, json={'payment_method': 'M-Pesa'})
+
+
+def run(app, data, args, mix):
+    """
+    Drives the mix from args.concurrency threads and returns raw samples per
+    endpoint: (latency seconds, status code, SQL statement count).
+    """
+    from sqlalchemy import event
+    from app.extensions import db
+
+    local = threading.local()
+
+    def count_statement(*_):
+        if getattr(local, 'active', False):
+            local.queries += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_statement)
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = defaultdict(list)
+    samples_lock = threading.Lock()
+    pending_lock = threading.Lock()
+    per_thread = [args.requests // args.concurrency + (1 if i < args.requests % args.concurrency else 0)
+                  for i in range(args.concurrency)]
+
+    def worker(index):
+        rng = random.Random(args.seed * 1000 + index)
+        scenarios = Scenarios(app.test_client(use_cookies=False), data, rng, pending_lock)
+        mine = []
+        for _ in range(per_thread[index]):
+            scenario = getattr(scenarios, rng.choices(names, weights)[0])
+            local.active, local.queries = True, 0
+            started = time.perf_counter()
+            label, response = scenario()
+            elapsed = time.perf_counter() - started
+            local.active = False
+            mine.append((label, elapsed, response.status_code, local.queries))
+        with samples_lock:
+            for label, elapsed, status, queries in mine:
+                samples[label].append((elapsed, status, queries))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - started
+
+    event.remove(engine, 'before_cursor_execute', count_statement)
+    return samples, wall_time
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def summarize(samples, wall_time):
+    endpoints = {}
+    for label, rows in sorted(samples.items()):
+        latencies = sorted(row[0] for row in rows)
+        statuses = defaultdict(int)
+        for _, status, _ in rows:
+            statuses[str(status)] += 1
+        queries = [row[2] for row in rows]
+        endpoints[label] = {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / wall_time, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+            'server_errors': sum(count for status, count in statuses.items() if status.startswith('5')),
+            'statuses': dict(statuses),
+        }
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'total_requests': total,
+        'wall_time_s': round(wall_time, 3),
+        'throughput_rps': round(total / wall_time, 2) if wall_time else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def check_integrity(app):
+    """
+    Returns the (bus_id, seat_number) pairs holding more than one active
+    booking. Anything here means two customers got the same seat.
+    """
+    from sqlalchemy import func
+    from app.extensions import db
+    from app.models.models import Booking
+    from app.utils.reservations import ACTIVE_STATUSES
+
+    with app.app_context():
+        rows = db.session.query(Booking.bus_id, Booking.seat_number).filter(
+            Booking.status.in_(ACTIVE_STATUSES)
+        ).group_by(Booking.bus_id, Booking.seat_number).having(func.count() > 1).all()
+    return [list(row) for row in rows]
+
+
+def compare(result, baseline, tolerance):
+    """
+    Returns human-readable regressions of result versus baseline: slower p95,
+    more SQL statements per request, lower throughput or new server errors.
+    """
+    regressions = []
+    for label, current in result['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(label)
+        if not previous:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['queries_mean'] > previous['queries_mean'] + 0.5:
+            regressions.append(f"{label}: queries/request {previous['queries_mean']} -> {current['queries_mean']}")
+        if current['server_errors'] > previous['server_errors']:
+            regressions.append(f"{label}: server errors {previous['server_errors']} -> {current['server_errors']}")
+    if result['throughput_rps'] < baseline.get('throughput_rps', 0) * (1 - tolerance):
+        regressions.append(f"throughput {baseline['throughput_rps']} -> {result['throughput_rps']} req/s")
+    return regressions
+
+
+def print_report(result):
+    header = f"{'endpoint':<42}{'reqs':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'sql/req':>9}{'5xx':>6}"
+    print(header)
+    print('-' * len(header))
+    for label, endpoint in result['endpoints'].items():
+        print(f"{label:<42}{endpoint['requests']:>7}{endpoint['throughput_rps']:>9}{endpoint['p50_ms']:>9}"
+              f"{endpoint['p95_ms']:>9}{endpoint['p99_ms']:>9}{endpoint['queries_mean']:>9}{endpoint['server_errors']:>6}")
+    print(f"\n{result['total_requests']} requests in {result['wall_time_s']}s ({result['throughput_rps']} req/s)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+
+    app = build_app(args)
+    data = seed(app, args, rng)
+    samples, wall_time = run(app, data, args, mix)
+
+    result = summarize(samples, wall_time)
+    result['double_booked_seats'] = check_integrity(app)
+    result['settings'] = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'mix': mix,
+        'users': args.users,
+        'buses': args.buses,
+        'seats': args.seats,
+        'seed': args.seed,
+        'response_cache': not args.no_cache,
+        'database': app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0],
+    }
+    print_report(result)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(result, handle, indent=2)
+        print(f'Results written to {args.output}')
+
+    failed = False
+    if result['double_booked_seats']:
+        print(f"FAIL: seats with more than one active booking: {result['double_booked_seats']}")
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(result, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION: {regression}')
+        failed = failed or bool(regressions)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
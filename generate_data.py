@@ -0,0 +1,237 @@
+"""
+Bulk synthetic dataset generator.
+
+Unlike seed.py, which builds a handful of rows through the ORM, this streams
+production-sized volumes straight into the tables: multi-row INSERTs in
+batches, or COPY on PostgreSQL. Every customer shares one password hash, ids
+are assigned up front so no rows are read back, and each bus gets its seat map
+and seat counters computed from its generated bookings. The same --seed always produces the same
+data, with departures placed relative to the day it is run.
+
+    python generate_data.py --users 1000000 --buses 5000 --seed 42 --drop
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, text
+from app import create_app
+from app.extensions import db, password_hasher
+from app.models.models import Booking, BookingStatus, Bus, Transaction, User, UserRole
+from app.utils import seat_map
+from app.utils.places import normalize_place
+
+
+# (origin, destination, typical hours) pairs; each is also run in reverse
+ROUTES = [
+    ('Nairobi', 'Mombasa', 8), ('Nairobi', 'Kisumu', 6), ('Nairobi', 'Nakuru', 2),
+    ('Nairobi', 'Eldoret', 5), ('Nairobi', 'Thika', 1), ('Nairobi', 'Nyeri', 3),
+    ('Nairobi', 'Malindi', 10), ('Nairobi', 'Garissa', 6), ('Nairobi', 'Kitale', 7),
+    ('Mombasa', 'Malindi', 2), ('Nakuru', 'Eldoret', 3), ('Kisumu', 'Eldoret', 3),
+    ('Nakuru', 'Kisumu', 4), ('Eldoret', 'Kitale', 1), ('Thika', 'Nyeri', 2),
+]
+DEPARTURE_HOURS = [6, 7, 8, 9, 10, 12, 14, 16, 18, 20, 21, 22]
+SEAT_COUNTS = [14, 33, 45, 49, 62]
+PAYMENT_METHODS = ['M-Pesa', 'M-Pesa', 'M-Pesa', 'Credit Card', 'PayPal']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate a large synthetic dataset.')
+    parser.add_argument('--users', type=int, default=100000, help='Customers to generate.')
+    parser.add_argument('--drivers', type=int, default=None, help='Drivers to generate (default: one per 3 buses).')
+    parser.add_argument('--buses', type=int, default=2000, help='Buses to generate.')
+    parser.add_argument('--days', type=int, default=60, help='Days the departures are spread over, starting today.')
+    parser.add_argument('--occupancy', type=float, default=0.6, help='Average share of seats booked per bus.')
+    parser.add_argument('--paid-ratio', type=float, default=0.8, help='Share of bookings that are confirmed and paid.')
+    parser.add_argument('--cancel-ratio', type=float, default=0.05, help='Share of bookings that were canceled.')
+    parser.add_argument('--password', default='password123', help='Password shared by every generated user.')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows per INSERT/COPY batch.')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed.')
+    parser.add_argument('--drop', action='store_true', help='Drop and re-create all tables first.')
+    return parser.parse_args()
+
+
+class BulkWriter:
+    """
+    Writes dict rows to a table in batches: COPY FROM STDIN on PostgreSQL,
+    executemany INSERTs elsewhere.
+    """
+
+    def __init__(self, connection, batch_size):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.use_copy = connection.dialect.name == 'postgresql'
+
+    def write(self, table, rows):
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(table, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._flush(table, batch)
+            count += len(batch)
+        return count
+
+    def _flush(self, table, batch):
+        if self.use_copy:
+            self._copy(table, batch)
+        else:
+            self.connection.execute(table.insert(), batch)
+
+    def _copy(self, table, batch):
+        columns = list(batch[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([self._copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+        cursor = self.connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')',
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _copy_value(value):
+        if value is None:
+            return '\\N'
+        if isinstance(value, (UserRole, BookingStatus)):
+            return value.name  # Enum columns store member names
+        if isinstance(value, bytes):
+            return '\\x' + value.hex()
+        if isinstance(value, datetime):
+            return value.isoformat(sep=' ')
+        return value
+
+
+def next_id(connection, model):
+    return (connection.execute(db.select(func.max(model.id))).scalar() or 0) + 1
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    drivers = args.drivers if args.drivers is not None else max(1, args.buses // 3)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    app = create_app()
+    with app.app_context():
+        if args.drop:
+            print('Dropping and re-creating tables...')
+            db.drop_all()
+            db.create_all()
+
+        password_hash = password_hasher.hash(args.password)  # Hashed once for everyone
+
+        with db.engine.begin() as connection:
+            if connection.dialect.name == 'postgresql':
+                connection.exec_driver_sql('SET LOCAL statement_timeout = 0')  # Large COPYs outlast the API limit
+            writer = BulkWriter(connection, args.batch_size)
+            first_user = next_id(connection, User)
+            first_bus = next_id(connection, Bus)
+            first_booking = next_id(connection, Booking)
+            first_transaction = next_id(connection, Transaction)
+
+            started = time.perf_counter()
+            customer_ids = range(first_user, first_user + args.users)
+            driver_ids = range(first_user + args.users, first_user + args.users + drivers)
+
+            def users():
+                for user_id in customer_ids:
+                    yield {'id': user_id, 'name': f'Customer {user_id}', 'email': f'customer{user_id}@example.com',
+                           '_password_hash': password_hash, 'role': UserRole.CUSTOMER}
+                for user_id in driver_ids:
+                    yield {'id': user_id, 'name': f'Driver {user_id}', 'email': f'driver{user_id}@example.com',
+                           '_password_hash': password_hash, 'role': UserRole.DRIVER}
+
+            count = writer.write(User.__table__, users())
+            print(f'Users: {count} in {time.perf_counter() - started:.1f}s')
+
+            # Buses with their bookings and transactions generated together, so
+            # each bus row can carry the seat map of its own bookings
+            buses, bookings, transactions = [], [], []
+            booking_id = first_booking
+            transaction_id = first_transaction
+            for bus_id in range(first_bus, first_bus + args.buses):
+                origin, destination, hours = rng.choice(ROUTES)
+                if rng.random() < 0.5:
+                    origin, destination = destination, origin
+                departure = today + timedelta(days=rng.randrange(args.days), hours=rng.choice(DEPARTURE_HOURS),
+                                              minutes=rng.choice([0, 15, 30, 45]))
+                arrival = departure + timedelta(hours=hours, minutes=rng.randrange(0, 60, 5))
+                number_of_seats = rng.choice(SEAT_COUNTS)
+                cost_per_seat = float(hours * rng.choice([150, 180, 200, 250]))
+
+                booked = min(number_of_seats, int(rng.triangular(0, 1, args.occupancy) * number_of_seats))
+                seat_states = []
+                for seat_number in rng.sample(range(1, number_of_seats + 1), booked):
+                    roll = rng.random()
+                    if roll < args.cancel_ratio:
+                        status = BookingStatus.CANCELED
+                    elif roll < args.cancel_ratio + args.paid_ratio:
+                        status = BookingStatus.CONFIRMED
+                    else:
+                        status = BookingStatus.PENDING
+                    booking_date = departure - timedelta(days=rng.randint(0, 20), minutes=rng.randrange(1440))
+                    bookings.append({'id': booking_id, 'customer_id': rng.choice(customer_ids), 'bus_id': bus_id,
+                                     'seat_number': seat_number, 'booking_date': booking_date, 'status': status})
+                    if status == BookingStatus.CONFIRMED:
+                        transactions.append({'id': transaction_id, 'booking_id': booking_id, 'amount_paid': cost_per_seat,
+                                             'payment_date': booking_date + timedelta(minutes=rng.randint(1, 30)),
+                                             'payment_method': rng.choice(PAYMENT_METHODS)})
+                        transaction_id += 1
+                        seat_states.append((seat_number, seat_map.CONFIRMED))
+                    elif status == BookingStatus.PENDING:
+                        seat_states.append((seat_number, seat_map.PENDING))
+                    booking_id += 1
+
+                buses.append({
+                    'id': bus_id,
+                    'driver_id': rng.choice(driver_ids) if rng.random() < 0.9 else None,
+                    'number_of_seats': number_of_seats,
+                    'cost_per_seat': cost_per_seat,
+                    'route': f'{origin} to {destination}',
+                    'origin': normalize_place(origin),
+                    'destination': normalize_place(destination),
+                    'departure_time': departure,
+                    'arrival_time': arrival,
+                    'is_available': departure >= today,
+                    'seat_map': seat_map.build(number_of_seats, seat_states),
+                    'confirmed_seats': sum(1 for _, state in seat_states if state == seat_map.CONFIRMED),
+                    'pending_seats': sum(1 for _, state in seat_states if state == seat_map.PENDING),
+                })
+
+                # Bookings reference buses, so buses go first in each flush
+                if len(bookings) >= args.batch_size or len(buses) >= args.batch_size:
+                    writer.write(Bus.__table__, buses)
+                    writer.write(Booking.__table__, bookings)
+                    writer.write(Transaction.__table__, transactions)
+                    buses, bookings, transactions = [], [], []
+
+            writer.write(Bus.__table__, buses)
+            writer.write(Booking.__table__, bookings)
+            writer.write(Transaction.__table__, transactions)
+            print(f'Buses: {args.buses}, bookings: {booking_id - first_booking}, '
+                  f'transactions: {transaction_id - first_transaction} in {time.perf_counter() - started:.1f}s')
+
+            # Explicit ids leave PostgreSQL sequences behind; move them past the new rows
+            if connection.dialect.name == 'postgresql':
+                for model in (User, Bus, Booking, Transaction):
+                    table = model.__tablename__
+                    connection.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                    ))
+
+        print(f'Dataset generated in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    generate(parse_args())
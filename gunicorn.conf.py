@@ -0,0 +1,15 @@
+# Gunicorn picks this file up automatically when started from the project root.
+# With several workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory so
+# /metrics can aggregate every worker (see app/utils/metrics.py).
+# Each worker also processes queued payments in a background thread
+# (PAYMENT_WORKER_INTERVAL). To run payments in separate processes instead,
+# set PAYMENT_WORKER_INTERVAL=0 and start `flask payment-worker` alongside;
+# with neither, payments stay queued and their bookings are never confirmed.
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited from the multiprocess metrics."""
+    import os
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
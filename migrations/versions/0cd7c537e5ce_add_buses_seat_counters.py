@@ -0,0 +1,35 @@
+"""add buses.confirmed_seats/pending_seats
+
+Revision ID: 0cd7c537e5ce
+Revises: e5930a866457
+Create Date: 2026-10-18 08:34:39.747318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0cd7c537e5ce'
+down_revision = 'e5930a866457'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('confirmed_seats', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('pending_seats', sa.Integer(), server_default='0', nullable=False))
+
+    # Counted from the bookings table, as `flask repair-seat-counters` does
+    op.execute(
+        "UPDATE buses SET "
+        "confirmed_seats = (SELECT COUNT(*) FROM bookings WHERE bookings.bus_id = buses.id AND bookings.status = 'CONFIRMED'), "
+        "pending_seats = (SELECT COUNT(*) FROM bookings WHERE bookings.bus_id = buses.id AND bookings.status = 'PENDING')"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.drop_column('pending_seats')
+        batch_op.drop_column('confirmed_seats')
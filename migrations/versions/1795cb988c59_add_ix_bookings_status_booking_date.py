@@ -0,0 +1,26 @@
+"""add ix_bookings_status_booking_date
+
+Revision ID: 1795cb988c59
+Revises: 0cd7c537e5ce
+Create Date: 2026-10-18 08:34:40.609599
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1795cb988c59'
+down_revision = '0cd7c537e5ce'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_status_booking_date', ['status', 'booking_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_status_booking_date')
@@ -0,0 +1,36 @@
+"""add keyset pagination indexes
+
+Revision ID: 1ade77361c20
+Revises: 68a4f4762069
+Create Date: 2026-10-18 08:34:38.156990
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1ade77361c20'
+down_revision = '68a4f4762069'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_booking_date_id', ['booking_date', 'id'], unique=False)
+        batch_op.create_index('ix_bookings_bus_id_booking_date', ['bus_id', 'booking_date'], unique=False)
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_transactions_booking_id'), ['booking_id'], unique=False)
+        batch_op.create_index('ix_transactions_payment_date_id', ['payment_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_payment_date_id')
+        batch_op.drop_index(batch_op.f('ix_transactions_booking_id'))
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_bus_id_booking_date')
+        batch_op.drop_index('ix_bookings_booking_date_id')
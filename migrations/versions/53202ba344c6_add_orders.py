@@ -0,0 +1,74 @@
+"""add orders
+
+Revision ID: 53202ba344c6
+Revises: 7f3d842cc4a1
+Create Date: 2026-10-18 08:34:42.230984
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '53202ba344c6'
+down_revision = '7f3d842cc4a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have created the table with db.create_all()
+    if not sa.inspect(op.get_bind()).has_table('orders'):
+        op.create_table('orders',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('bus_id', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('seat_count', sa.Integer(), nullable=False),
+        # Shares the bookingstatus type created with the bookings table
+        sa.Column('status', postgresql.ENUM('PENDING', 'CONFIRMED', 'CANCELED', name='bookingstatus', create_type=False), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['bus_id'], ['buses.id'], ),
+        sa.ForeignKeyConstraint(['customer_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('orders', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_orders_customer_id'), ['customer_id'], unique=False)
+
+    # Existing bookings and transactions predate orders and keep order_id NULL
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('order_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_bookings_order_id'), ['order_id'], unique=False)
+        batch_op.create_foreign_key('bookings_order_id_fkey', 'orders', ['order_id'], ['id'])
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('order_id', sa.Integer(), nullable=True))
+        batch_op.alter_column('booking_id',
+               existing_type=sa.INTEGER(),
+               nullable=True)
+        batch_op.create_index(batch_op.f('ix_transactions_order_id'), ['order_id'], unique=False)
+        batch_op.create_foreign_key('transactions_order_id_fkey', 'orders', ['order_id'], ['id'])
+
+
+def downgrade():
+    # Whole-order payments have no booking to fall back on
+    op.execute('DELETE FROM transactions WHERE booking_id IS NULL')
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_constraint('transactions_order_id_fkey', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_transactions_order_id'))
+        batch_op.alter_column('booking_id',
+               existing_type=sa.INTEGER(),
+               nullable=False)
+        batch_op.drop_column('order_id')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_constraint('bookings_order_id_fkey', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_bookings_order_id'))
+        batch_op.drop_column('order_id')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_orders_customer_id'))
+
+    op.drop_table('orders')
@@ -0,0 +1,65 @@
+"""add buses.origin/destination
+
+Revision ID: 68a4f4762069
+Revises: cd4adccfcab6
+Create Date: 2026-10-18 08:34:37.397799
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.places import parse_route
+
+
+# revision identifiers, used by Alembic.
+revision = '68a4f4762069'
+down_revision = 'cd4adccfcab6'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+buses = sa.table(
+    'buses',
+    sa.column('id', sa.Integer),
+    sa.column('route', sa.String),
+    sa.column('origin', sa.String),
+    sa.column('destination', sa.String),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('origin', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('destination', sa.String(length=100), nullable=True))
+        batch_op.create_index('ix_buses_origin_destination_departure', ['origin', 'destination', 'departure_time'], unique=False)
+
+    # Same backfill as `flask backfill-routes`; routes not in "X to Y" form stay NULL
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(buses.c.id, buses.c.route).where(buses.c.id > last_id).order_by(buses.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        values = []
+        for row in rows:
+            origin, destination = parse_route(row.route)
+            if origin is not None:
+                values.append({'bus_id': row.id, 'origin': origin, 'destination': destination})
+        if values:
+            bind.execute(
+                buses.update().where(buses.c.id == sa.bindparam('bus_id')).values(
+                    origin=sa.bindparam('origin'), destination=sa.bindparam('destination')
+                ),
+                values
+            )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.drop_index('ix_buses_origin_destination_departure')
+        batch_op.drop_column('destination')
+        batch_op.drop_column('origin')
@@ -0,0 +1,43 @@
+"""add idempotency_keys
+
+Revision ID: 7f3d842cc4a1
+Revises: 1795cb988c59
+Create Date: 2026-10-18 08:34:41.406202
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3d842cc4a1'
+down_revision = '1795cb988c59'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() may already have created the table with db.create_all()
+    if sa.inspect(op.get_bind()).has_table('idempotency_keys'):
+        return
+
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('request_path', sa.String(length=255), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('request_path', 'key', name='uq_idempotency_keys_path_key')
+    )
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_idempotency_keys_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_idempotency_keys_created_at'))
+
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,71 @@
+"""add buses.seat_map
+
+Revision ID: 80ad494706a0
+Revises: ca76058ce079
+Create Date: 2026-10-18 08:34:35.869550
+
+"""
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils import seat_map
+
+
+# revision identifiers, used by Alembic.
+revision = '80ad494706a0'
+down_revision = 'ca76058ce079'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+SEAT_STATES = {'PENDING': seat_map.PENDING, 'CONFIRMED': seat_map.CONFIRMED}
+
+buses = sa.table(
+    'buses',
+    sa.column('id', sa.Integer),
+    sa.column('number_of_seats', sa.Integer),
+    sa.column('seat_map', sa.LargeBinary),
+)
+bookings = sa.table(
+    'bookings',
+    sa.column('bus_id', sa.Integer),
+    sa.column('seat_number', sa.Integer),
+    sa.column('status', sa.String),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seat_map', sa.LargeBinary(), nullable=True))
+
+    # Build every bus's map from its bookings here, so seat-map reads never
+    # have to rebuild (and write) one
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(buses.c.id, buses.c.number_of_seats).where(buses.c.id > last_id).order_by(buses.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        states = defaultdict(list)
+        for booking in bind.execute(
+            sa.select(bookings.c.bus_id, bookings.c.seat_number, bookings.c.status).where(
+                bookings.c.bus_id.in_([row.id for row in rows]),
+                bookings.c.status.in_(list(SEAT_STATES))
+            )
+        ):
+            states[booking.bus_id].append((booking.seat_number, SEAT_STATES[booking.status]))
+        bind.execute(
+            buses.update().where(buses.c.id == sa.bindparam('bus_id')).values(seat_map=sa.bindparam('map')),
+            [{'bus_id': row.id, 'map': seat_map.build(row.number_of_seats, states[row.id])} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.drop_column('seat_map')
@@ -0,0 +1,58 @@
+"""add payment_jobs
+
+Revision ID: 9b1e4d2c7a35
+Revises: 53202ba344c6
+Create Date: 2026-10-18 08:34:43.018452
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1e4d2c7a35'
+down_revision = '53202ba344c6'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status IN ('QUEUED', 'PROCESSING')")
+
+
+def upgrade():
+    # create_app() may already have created the table with db.create_all()
+    if sa.inspect(op.get_bind()).has_table('payment_jobs'):
+        return
+
+    op.create_table('payment_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('payment_method', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'PROCESSING', 'SUCCEEDED', 'FAILED', name='paymentjobstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('transaction_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('payment_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_payment_jobs_status_run_at', ['status', 'run_at'], unique=False)
+        batch_op.create_index('uq_payment_jobs_active_booking', ['booking_id'], unique=True, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+        batch_op.create_index('uq_payment_jobs_active_order', ['order_id'], unique=True, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+
+
+def downgrade():
+    with op.batch_alter_table('payment_jobs', schema=None) as batch_op:
+        batch_op.drop_index('uq_payment_jobs_active_order', postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+        batch_op.drop_index('uq_payment_jobs_active_booking', postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+        batch_op.drop_index('ix_payment_jobs_status_run_at')
+
+    op.drop_table('payment_jobs')
+    sa.Enum(name='paymentjobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,74 @@
+"""baseline schema
+
+Revision ID: ca76058ce079
+Revises: 
+Create Date: 2026-10-18 08:34:35.111737
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ca76058ce079'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The tables as db.create_all() made them before migrations were kept.
+    # Databases that already have them are stamped at this revision instead.
+    if sa.inspect(op.get_bind()).has_table('users'):
+        return
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('_password_hash', sa.String(length=128), nullable=False),
+    sa.Column('role', sa.Enum('ADMIN', 'DRIVER', 'CUSTOMER', name='userrole'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('buses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('driver_id', sa.Integer(), nullable=True),
+    sa.Column('number_of_seats', sa.Integer(), nullable=False),
+    sa.Column('cost_per_seat', sa.Float(), nullable=False),
+    sa.Column('route', sa.String(length=200), nullable=False),
+    sa.Column('departure_time', sa.DateTime(), nullable=False),
+    sa.Column('arrival_time', sa.DateTime(), nullable=False),
+    sa.Column('is_available', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['driver_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('bookings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('bus_id', sa.Integer(), nullable=False),
+    sa.Column('seat_number', sa.Integer(), nullable=False),
+    sa.Column('booking_date', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'CONFIRMED', 'CANCELED', name='bookingstatus'), nullable=False),
+    sa.ForeignKeyConstraint(['bus_id'], ['buses.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.Column('amount_paid', sa.Float(), nullable=False),
+    sa.Column('payment_date', sa.DateTime(), nullable=False),
+    sa.Column('payment_method', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('transactions')
+    op.drop_table('bookings')
+    op.drop_table('buses')
+    op.drop_table('users')
+    sa.Enum(name='bookingstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=True)
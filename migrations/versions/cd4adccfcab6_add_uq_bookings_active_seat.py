@@ -0,0 +1,41 @@
+"""add uq_bookings_active_seat
+
+Revision ID: cd4adccfcab6
+Revises: 80ad494706a0
+Create Date: 2026-10-18 08:34:36.629106
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cd4adccfcab6'
+down_revision = '80ad494706a0'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status IN ('PENDING', 'CONFIRMED')")
+
+
+def upgrade():
+    # Seats double-booked before the index existed keep one active booking (a
+    # confirmed one if any, then the earliest); the others are canceled so the
+    # unique index can be built.
+    op.execute(
+        "UPDATE bookings SET status = 'CANCELED' "
+        "WHERE status IN ('PENDING', 'CONFIRMED') AND EXISTS ("
+        "SELECT 1 FROM bookings AS kept "
+        "WHERE kept.bus_id = bookings.bus_id "
+        "AND kept.seat_number = bookings.seat_number "
+        "AND kept.id <> bookings.id "
+        "AND ((kept.status = 'CONFIRMED' AND bookings.status = 'PENDING') "
+        "OR (kept.status = bookings.status AND kept.id < bookings.id)))"
+    )
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('uq_bookings_active_seat', ['bus_id', 'seat_number'], unique=True, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('uq_bookings_active_seat', postgresql_where=ACTIVE, sqlite_where=ACTIVE)
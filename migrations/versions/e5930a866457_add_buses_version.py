@@ -0,0 +1,26 @@
+"""add buses.version
+
+Revision ID: e5930a866457
+Revises: 1ade77361c20
+Create Date: 2026-10-18 08:34:38.942186
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5930a866457'
+down_revision = '1ade77361c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('buses', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,58 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+# Config reads the environment at import time, so point it at a throwaway
+# SQLite file before the app package is imported. A file (not :memory:) lets
+# every thread's connection see the same database. Tests run the payment
+# worker themselves, so the in-process one is turned off.
+_db_dir = tempfile.mkdtemp(prefix='bookbus-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ['PAYMENT_WORKER_INTERVAL'] = '0'
+
+from app import create_app  # noqa: E402
+from app.extensions import db, response_cache  # noqa: E402
+from app.models.models import Bus, User, UserRole  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config.update(TESTING=True, BCRYPT_LOG_ROUNDS=4)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all(bind_key=None)  # Other test apps may have registered more binds
+
+
+@pytest.fixture
+def bus(app):
+    """
+    A fresh 30-seat bus with its driver, plus one customer id per thread the
+    tests run (customer_ids).
+    """
+    with app.app_context():
+        stamp = datetime.utcnow().strftime('%H%M%S%f')
+        driver = User(name='Driver', email=f'driver-{stamp}@example.com', role=UserRole.DRIVER)
+        driver._password_hash = 'x'
+        customers = [
+            User(name=f'Customer {i}', email=f'customer-{i}-{stamp}@example.com', role=UserRole.CUSTOMER)
+            for i in range(16)
+        ]
+        for customer in customers:
+            customer._password_hash = 'x'
+        db.session.add_all([driver, *customers])
+        db.session.flush()
+        departure = datetime(2030, 1, 1, 8)
+        bus = Bus(driver_id=driver.id, number_of_seats=30, cost_per_seat=100, route='Nairobi to Mombasa',
+                  departure_time=departure, arrival_time=departure + timedelta(hours=8))
+        db.session.add(bus)
+        db.session.commit()
+        response_cache.invalidate_buses(bus.id, listing=True)  # As AddBus does
+        seeded = {'id': bus.id, 'customer_ids': [customer.id for customer in customers]}
+    # Requests then get their own app context (g, session), as in production
+    return seeded
@@ -0,0 +1,97 @@
+"""
+Cancelling and moving bookings keep the bus seat map and counters in step
+with the bookings that actually hold seats.
+"""
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models.models import Bus, PaymentJob, PaymentJobStatus
+from app.utils import seat_map
+from app.utils.reservations import expire_pending_bookings
+
+
+def book(client, customer_id, bus_id, seat_number):
+    response = client.post('/user/book_seat', json={'customer_id': customer_id, 'bus_id': bus_id, 'seat_number': seat_number})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def expire_all(app):
+    with app.app_context():
+        expire_pending_bookings(datetime.utcnow() + timedelta(minutes=1), batch_size=100)
+        db.session.commit()
+
+
+def seat_state(app, bus_id, seat_number):
+    with app.app_context():
+        bus = db.session.get(Bus, bus_id)
+        return seat_map.get_state(bus.seat_map, seat_number), bus.pending_seats
+
+
+def test_cancel_expired_booking_keeps_the_new_owners_seat(app, bus):
+    client = app.test_client(use_cookies=False)
+    first, second = bus['customer_ids'][:2]
+    stale_id = book(client, first, bus['id'], 4)
+    expire_all(app)
+    book(client, second, bus['id'], 4)
+
+    response = client.delete(f'/user/cancel_bookings/{stale_id}')
+
+    assert response.status_code == 200
+    assert seat_state(app, bus['id'], 4) == (seat_map.PENDING, 1)
+
+
+def test_cancel_detaches_finished_payment_jobs(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 5)
+    with app.app_context():
+        job = PaymentJob(booking_id=booking_id, amount=100, payment_method='M-Pesa', status=PaymentJobStatus.FAILED)
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    response = client.delete(f'/user/cancel_bookings/{booking_id}')
+
+    assert response.status_code == 200
+    assert seat_state(app, bus['id'], 5) == (seat_map.FREE, 0)
+    with app.app_context():
+        assert db.session.get(PaymentJob, job_id).booking_id is None
+
+
+def test_cancel_refused_while_payment_is_queued(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 6)
+    with app.app_context():
+        db.session.add(PaymentJob(booking_id=booking_id, amount=100, payment_method='M-Pesa'))
+        db.session.commit()
+
+    response = client.delete(f'/user/cancel_bookings/{booking_id}')
+
+    assert response.status_code == 409
+    assert seat_state(app, bus['id'], 6) == (seat_map.PENDING, 1)
+
+
+def test_move_refused_for_expired_booking(app, bus):
+    client = app.test_client(use_cookies=False)
+    first, second = bus['customer_ids'][:2]
+    stale_id = book(client, first, bus['id'], 7)
+    expire_all(app)
+    book(client, second, bus['id'], 7)
+
+    response = client.put(f'/user/update_booking/{stale_id}', json={'seat_number': 8})
+
+    assert response.status_code == 409
+    assert seat_state(app, bus['id'], 7) == (seat_map.PENDING, 1)
+    assert seat_state(app, bus['id'], 8)[0] == seat_map.FREE
+
+
+def test_move_pending_booking_updates_both_seats(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 9)
+
+    response = client.put(f'/user/update_booking/{booking_id}', json={'seat_number': 10})
+
+    assert response.status_code == 200
+    assert response.get_json()['seat_number'] == 10
+    assert seat_state(app, bus['id'], 9) == (seat_map.FREE, 1)
+    assert seat_state(app, bus['id'], 10) == (seat_map.PENDING, 1)
@@ -0,0 +1,63 @@
+"""
+The seat-map endpoints answer conditional GETs from the bus version: 304
+while nothing changed, a fresh body and ETag once it has.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.extensions import db
+
+SEAT_MAP_URLS = ['/bus/{}', '/buses/{}/seats']
+
+
+@pytest.mark.parametrize('url', SEAT_MAP_URLS)
+def test_unchanged_bus_answers_304(app, bus, url):
+    client = app.test_client(use_cookies=False)
+    url = url.format(bus['id'])
+    etag = client.get(url).headers['ETag']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    weak = client.get(url, headers={'If-None-Match': f'W/{etag}'})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert weak.status_code == 304
+
+
+@pytest.mark.parametrize('url', SEAT_MAP_URLS)
+def test_booking_changes_the_etag(app, bus, url):
+    client = app.test_client(use_cookies=False)
+    url = url.format(bus['id'])
+    etag = client.get(url).headers['ETag']
+    client.post('/user/book_seat', json={'customer_id': bus['customer_ids'][0], 'bus_id': bus['id'], 'seat_number': 2})
+
+    response = client.get(url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['pending_seats'] == [2]
+
+
+def test_version_bumped_elsewhere_is_not_served_from_cache(app, bus):
+    client = app.test_client(use_cookies=False)
+    url = f'/buses/{bus["id"]}/seats'
+    etag = client.get(url).headers['ETag']
+    assert client.get(url).headers['X-Cache'] == 'HIT'
+
+    # As another process (e.g. the payment worker) would: no local invalidation
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text('UPDATE buses SET version = version + 1 WHERE id = :id'), {'id': bus['id']})
+
+    response = client.get(url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.headers['ETag'] != etag
+
+
+def test_unknown_bus_is_404_even_when_conditional(app):
+    client = app.test_client(use_cookies=False)
+
+    assert client.get('/bus/999999', headers={'If-None-Match': '"bus-999999-v1-h0"'}).status_code == 404
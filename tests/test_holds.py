@@ -0,0 +1,85 @@
+"""
+Seat holds keep seats away from other customers for a few minutes, until
+the holder books them, releases them or the hold expires.
+"""
+import time
+
+from app.extensions import seat_holds
+
+
+def hold(client, bus_id, customer_id, seat_numbers):
+    return client.post(f'/buses/{bus_id}/holds', json={'customer_id': customer_id, 'seat_numbers': seat_numbers})
+
+
+def book(client, customer_id, bus_id, seat_number):
+    return client.post('/user/book_seat', json={'customer_id': customer_id, 'bus_id': bus_id, 'seat_number': seat_number})
+
+
+def test_hold_blocks_other_customers(app, bus):
+    client = app.test_client(use_cookies=False)
+    holder, other = bus['customer_ids'][:2]
+
+    response = hold(client, bus['id'], holder, [3, 4])
+    assert response.status_code == 201
+    assert response.get_json()['seat_numbers'] == [3, 4]
+
+    booked = book(client, other, bus['id'], 3)
+    assert booked.status_code == 409
+    assert booked.get_json() == {'message': 'Seat 3 is already held', 'seat_numbers': [3]}
+    assert hold(client, bus['id'], other, [4, 5]).status_code == 409
+    assert client.get(f'/bus/{bus["id"]}').get_json()['held_seats'] == [3, 4]
+
+
+def test_holder_books_held_seat_and_releases_the_hold(app, bus):
+    client = app.test_client(use_cookies=False)
+    holder, other = bus['customer_ids'][:2]
+    hold(client, bus['id'], holder, [6])
+
+    assert book(client, holder, bus['id'], 6).status_code == 201
+
+    with app.app_context():
+        assert seat_holds.held_by(bus['id'], holder) == []
+    seats = client.get(f'/bus/{bus["id"]}').get_json()
+    assert seats['held_seats'] == []
+    assert seats['pending_seats'] == [6]
+    assert hold(client, bus['id'], other, [6]).get_json()['message'] == 'Seat 6 is already booked'
+
+
+def test_release_and_expiry_free_held_seats(app, bus, monkeypatch):
+    client = app.test_client(use_cookies=False)
+    holder, other = bus['customer_ids'][:2]
+    hold(client, bus['id'], holder, [7, 8])
+
+    response = client.delete(f'/buses/{bus["id"]}/holds', json={'customer_id': holder, 'seat_numbers': [7]})
+    assert response.get_json() == {'bus_id': bus['id'], 'released_seats': [7]}
+    assert book(client, other, bus['id'], 7).status_code == 201
+
+    # Seat 8 is still held until its hold lapses
+    assert book(client, other, bus['id'], 8).status_code == 409
+    monkeypatch.setattr(seat_holds, 'ttl', 0.05)
+    hold(client, bus['id'], holder, [8])
+    time.sleep(0.1)
+    assert book(client, other, bus['id'], 8).status_code == 201
+
+
+def test_confirm_books_only_held_seats(app, bus):
+    client = app.test_client(use_cookies=False)
+    holder, other = bus['customer_ids'][:2]
+    hold(client, bus['id'], holder, [10, 11])
+    payload = {'customer_id': holder, 'payment_method': 'M-Pesa'}
+
+    refused = client.post(f'/buses/{bus["id"]}/holds/confirm', json={**payload, 'seat_numbers': [10, 12]})
+    assert refused.status_code == 409
+    assert refused.get_json()['seat_numbers'] == [12]
+    assert client.post(f'/buses/{bus["id"]}/holds/confirm',
+                       json={'customer_id': other, 'payment_method': 'M-Pesa'}).status_code == 409
+
+    response = client.post(f'/buses/{bus["id"]}/holds/confirm', json=payload)
+
+    assert response.status_code == 202
+    body = response.get_json()
+    assert sorted(booking['seat_number'] for booking in body['bookings']) == [10, 11]
+    assert body['status'] == 'pending'
+    assert body['payment']['status'] == 'queued'
+    with app.app_context():
+        assert seat_holds.held_by(bus['id'], holder) == []
@@ -0,0 +1,81 @@
+"""
+Payment endpoints replay the first response to retries carrying the same
+Idempotency-Key, and only one request at a time may run for a key.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models.models import IdempotencyKey
+
+
+def book(client, customer_id, bus_id, seat_number):
+    response = client.post('/user/book_seat', json={'customer_id': customer_id, 'bus_id': bus_id, 'seat_number': seat_number})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def pay(client, booking_id, key, payment_method='M-Pesa'):
+    return client.post(f'/api/bookings/{booking_id}/confirm_payment',
+                       json={'payment_method': payment_method}, headers={'Idempotency-Key': key})
+
+
+def claim(app, path, key, age):
+    with app.app_context():
+        db.session.add(IdempotencyKey(request_path=path, key=key, fingerprint='0' * 64,
+                                      created_at=datetime.utcnow() - age))
+        db.session.commit()
+
+
+def test_retry_replays_the_first_response(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 1)
+    key = str(uuid.uuid4())
+
+    first = pay(client, booking_id, key)
+    retry = pay(client, booking_id, key)
+
+    assert first.status_code == retry.status_code == 202
+    assert 'Idempotent-Replayed' not in first.headers
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+
+
+def test_key_reused_for_a_different_body_is_rejected(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 2)
+    key = str(uuid.uuid4())
+    pay(client, booking_id, key)
+
+    response = pay(client, booking_id, key, payment_method='PayPal')
+
+    assert response.status_code == 422
+
+
+def test_retry_waits_for_a_running_request(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 3)
+    key = str(uuid.uuid4())
+    claim(app, f'/api/bookings/{booking_id}/confirm_payment', key, timedelta(seconds=1))
+
+    response = pay(client, booking_id, key)
+
+    assert response.status_code == 409
+    assert response.get_json()['message'] == 'A request with this Idempotency-Key is still in progress'
+
+
+def test_abandoned_claim_is_taken_over(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 4)
+    key = str(uuid.uuid4())
+    path = f'/api/bookings/{booking_id}/confirm_payment'
+    claim(app, path, key, timedelta(seconds=app.config['IDEMPOTENCY_CLAIM_TIMEOUT'] + 1))
+
+    response = pay(client, booking_id, key)
+
+    assert response.status_code == 202
+    assert 'Idempotent-Replayed' not in response.headers
+    with app.app_context():
+        row = IdempotencyKey.query.filter_by(request_path=path, key=key).one()
+        assert row.status_code == 202
+    assert pay(client, booking_id, key).headers['Idempotent-Replayed'] == 'true'
@@ -0,0 +1,25 @@
+"""
+Payment counters are labelled by the accepted payment methods only.
+"""
+from prometheus_client import REGISTRY
+
+from app.models.models import PAYMENT_METHODS
+from app.utils.payments import PAYMENT_METHOD_LABELS, record_payment
+
+
+def payments_counted(label):
+    return REGISTRY.get_sample_value('bookbus_payments_total', {'method': label}) or 0
+
+
+def test_every_accepted_method_has_its_own_label():
+    assert set(PAYMENT_METHOD_LABELS) == set(PAYMENT_METHODS)
+    assert 'other' not in PAYMENT_METHOD_LABELS.values()
+
+
+def test_unknown_methods_are_counted_as_other(app):
+    before = payments_counted('other'), payments_counted('m-pesa')
+
+    record_payment('cash', 100)
+    record_payment('M-Pesa', 100)
+
+    assert (payments_counted('other'), payments_counted('m-pesa')) == (before[0] + 1, before[1] + 1)
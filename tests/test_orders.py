@@ -0,0 +1,58 @@
+"""
+Multi-seat bookings form one order, booked all-or-nothing and confirmed by
+a single payment for the order total.
+"""
+from app.extensions import db
+from app.models.models import Booking, BookingStatus, Order, Transaction
+from app.utils.payments import process_payment_jobs
+
+
+def book_seats(client, customer_id, bus_id, seat_numbers):
+    return client.post('/api/bookings/multiple', json={'customer_id': customer_id, 'bus_id': bus_id, 'seat_numbers': seat_numbers})
+
+
+def run_payment_worker(app):
+    with app.app_context():
+        while process_payment_jobs():
+            pass
+
+
+def test_order_is_paid_with_one_transaction(app, bus):
+    client = app.test_client(use_cookies=False)
+    response = book_seats(client, bus['customer_ids'][0], bus['id'], [1, 2, 3])
+    assert response.status_code == 201
+    order = response.get_json()
+    assert order['total_amount'] == 300
+    assert sorted(booking['seat_number'] for booking in order['bookings']) == [1, 2, 3]
+
+    payment = client.post(f'/api/orders/{order["order_id"]}/confirm_payment', json={'payment_method': 'M-Pesa'})
+    assert payment.status_code == 202
+    run_payment_worker(app)
+
+    status = client.get(payment.get_json()['status_url']).get_json()
+    assert status['status'] == 'succeeded'
+    with app.app_context():
+        assert db.session.get(Order, order['order_id']).status == BookingStatus.CONFIRMED
+        bookings = Booking.query.filter_by(order_id=order['order_id']).all()
+        assert {booking.status for booking in bookings} == {BookingStatus.CONFIRMED}
+        transactions = Transaction.query.filter_by(order_id=order['order_id']).all()
+        assert [(t.id, t.amount_paid) for t in transactions] == [(status['transaction_id'], 300)]
+    assert client.get(f'/bus/{bus["id"]}').get_json()['booked_seats'] == [1, 2, 3]
+
+    again = client.post(f'/api/orders/{order["order_id"]}/confirm_payment', json={'payment_method': 'M-Pesa'})
+    assert again.status_code == 400
+    assert again.get_json()['message'] == 'Order is already confirmed'
+
+
+def test_order_with_a_taken_seat_books_nothing(app, bus):
+    client = app.test_client(use_cookies=False)
+    first, second = bus['customer_ids'][:2]
+    assert book_seats(client, first, bus['id'], [5]).status_code == 201
+
+    response = book_seats(client, second, bus['id'], [4, 5, 6])
+
+    assert response.status_code == 409
+    assert response.get_json()['seat_numbers'] == [5]
+    with app.app_context():
+        assert Booking.query.filter_by(bus_id=bus['id'], customer_id=second).count() == 0
+        assert Order.query.filter_by(bus_id=bus['id'], customer_id=second).count() == 0
@@ -0,0 +1,99 @@
+"""
+Queued payments are claimed under a lease, retried with backoff on gateway
+errors, and polled through their status endpoint.
+"""
+import time
+from datetime import datetime
+
+from app.extensions import db
+from app.models.models import Booking, BookingStatus, PaymentJob, PaymentJobStatus, Transaction
+from app.utils.payments import PaymentGatewayError, SimulatedGateway, claim_payment_jobs, process_payment_job
+
+
+class FailingGateway:
+    def charge(self, reference, amount, payment_method):
+        raise PaymentGatewayError(f'{payment_method} gateway timed out')
+
+
+def book(client, customer_id, bus_id, seat_number):
+    response = client.post('/user/book_seat', json={'customer_id': customer_id, 'bus_id': bus_id, 'seat_number': seat_number})
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def queue_payment(client, booking_id):
+    response = client.post(f'/api/bookings/{booking_id}/confirm_payment', json={'payment_method': 'M-Pesa'})
+    assert response.status_code == 202
+    return response.get_json()['payment']['id']
+
+
+def claim(job_id, lease_seconds=120):
+    """
+    Claims the due jobs and returns this job's attempt. Jobs queued by other
+    tests are processed on the way so none is left holding a lease.
+    """
+    claimed = dict(claim_payment_jobs(100, lease_seconds))
+    for other_id, attempt in claimed.items():
+        if other_id != job_id:
+            process_payment_job(other_id, attempt, SimulatedGateway())
+    return claimed.get(job_id)
+
+
+def test_payment_status_follows_the_job(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 1)
+    job_id = queue_payment(client, booking_id)
+
+    queued = client.get(f'/api/payments/{job_id}').get_json()
+    assert queued['status'] == 'queued'
+    assert queued['next_attempt_at'] is not None
+
+    with app.app_context():
+        assert process_payment_job(job_id, claim(job_id), SimulatedGateway()) == PaymentJobStatus.SUCCEEDED
+
+    succeeded = client.get(f'/api/payments/{job_id}').get_json()
+    assert succeeded['status'] == 'succeeded'
+    assert succeeded['attempts'] == 1
+    with app.app_context():
+        assert db.session.get(Booking, booking_id).status == BookingStatus.CONFIRMED
+        assert Transaction.query.filter_by(booking_id=booking_id).one().id == succeeded['transaction_id']
+    assert client.get('/api/payments/999999').status_code == 404
+
+
+def test_gateway_error_requeues_with_backoff(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 2)
+    job_id = queue_payment(client, booking_id)
+
+    with app.app_context():
+        assert process_payment_job(job_id, claim(job_id), FailingGateway()) == PaymentJobStatus.QUEUED
+        job = db.session.get(PaymentJob, job_id)
+        assert job.attempts == 1
+        assert job.locked_until is None
+        assert job.last_error == 'M-Pesa gateway timed out'
+        assert job.run_at > datetime.utcnow()
+        # Not due until its backoff has passed
+        assert claim(job_id) is None
+        assert db.session.get(Booking, booking_id).status == BookingStatus.PENDING
+
+
+def test_lapsed_lease_is_reclaimed_and_the_old_worker_writes_nothing(app, bus):
+    client = app.test_client(use_cookies=False)
+    booking_id = book(client, bus['customer_ids'][0], bus['id'], 3)
+    job_id = queue_payment(client, booking_id)
+
+    with app.app_context():
+        first = claim(job_id, lease_seconds=0)
+        time.sleep(0.01)
+        second = claim(job_id)
+        assert (first, second) == (1, 2)
+
+        # The first worker wakes up after its lease lapsed
+        assert process_payment_job(job_id, first, SimulatedGateway()) is None
+        db.session.expire_all()
+        job = db.session.get(PaymentJob, job_id)
+        assert (job.status, job.attempts) == (PaymentJobStatus.PROCESSING, 2)
+        assert Transaction.query.filter_by(booking_id=booking_id).count() == 0
+
+        assert process_payment_job(job_id, second, SimulatedGateway()) == PaymentJobStatus.SUCCEEDED
+        assert Transaction.query.filter_by(booking_id=booking_id).count() == 1
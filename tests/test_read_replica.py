@@ -0,0 +1,61 @@
+"""
+GETs read from the replica, except right after the client's own write: the
+read-your-writes cookie keeps it on the primary.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from app.config import config
+from app.extensions import db
+from app.models.models import Bus, User, UserRole
+
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch):
+    """
+    An app with two SQLite files, primary and replica, the replica synced
+    once after seeding a bus and a customer.
+    """
+    env_config = config['development']
+    monkeypatch.setattr(env_config, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "primary.db"}')
+    monkeypatch.setattr(env_config, 'SQLALCHEMY_BINDS', {'replica': f'sqlite:///{tmp_path / "replica.db"}'})
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.app_context():
+        driver = User(name='Driver', email='driver@example.com', role=UserRole.DRIVER, _password_hash='x')
+        customer = User(name='Customer', email='customer@example.com', role=UserRole.CUSTOMER, _password_hash='x')
+        db.session.add_all([driver, customer])
+        db.session.flush()
+        departure = datetime(2030, 1, 1, 8)
+        bus = Bus(driver_id=driver.id, number_of_seats=30, cost_per_seat=100, route='Nairobi to Mombasa',
+                  departure_time=departure, arrival_time=departure + timedelta(hours=8))
+        db.session.add(bus)
+        db.session.commit()
+        app.seeded = {'bus_id': bus.id, 'customer_id': customer.id}
+    assert app.test_cli_runner().invoke(args=['sync-replica']).exit_code == 0
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_get_after_own_write_reads_the_primary(replica_app):
+    client = replica_app.test_client(use_cookies=False)
+    bus_id, customer_id = replica_app.seeded['bus_id'], replica_app.seeded['customer_id']
+
+    response = client.post('/user/book_seat', json={'customer_id': customer_id, 'bus_id': bus_id, 'seat_number': 1})
+    assert response.status_code == 201
+    cookie = response.headers['Set-Cookie']
+    assert cookie.startswith('read_primary_until=')
+    # Sent back on the frontend's cross-site requests, like the JWT cookie
+    assert 'SameSite=None' in cookie and 'Secure' in cookie
+
+    own = client.get(f'/user/bookings/{customer_id}', headers={'Cookie': cookie.split(';')[0]})
+    other = client.get(f'/user/bookings/{customer_id}')
+
+    # The booking is only on the primary; the replica was synced before it
+    assert [booking['seat_number'] for booking in own.get_json()] == [1]
+    assert other.get_json() == []
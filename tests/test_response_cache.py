@@ -0,0 +1,49 @@
+"""
+Public bus listings and seat maps are served from the response cache until
+a write that affects them invalidates their tags.
+"""
+
+
+def listed_bus(response, bus_id):
+    return next(bus for bus in response.get_json() if bus['id'] == bus_id)
+
+
+def test_bus_listing_is_cached_until_the_bus_changes(app, bus):
+    client = app.test_client(use_cookies=False)
+
+    first = client.get('/user/buses')
+    second = client.get('/user/buses')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+
+    response = client.put(f'/driver/update_price/{bus["id"]}', json={'cost_per_seat': 250})
+    assert response.status_code == 200
+
+    third = client.get('/user/buses')
+    assert third.headers['X-Cache'] == 'MISS'
+    assert listed_bus(third, bus['id'])['cost_per_seat'] == 250
+
+
+def test_query_strings_are_cached_separately(app, bus):
+    client = app.test_client(use_cookies=False)
+
+    client.get('/user/buses?sort=cost_per_seat')
+    response = client.get('/user/buses?sort=-cost_per_seat')
+
+    assert response.headers['X-Cache'] == 'MISS'
+    assert client.get('/user/buses?sort=-cost_per_seat').headers['X-Cache'] == 'HIT'
+
+
+def test_booking_invalidates_the_seat_map(app, bus):
+    client = app.test_client(use_cookies=False)
+    url = f'/buses/{bus["id"]}/seats'
+    client.get(url)
+    assert client.get(url).headers['X-Cache'] == 'HIT'
+
+    response = client.post('/user/book_seat', json={'customer_id': bus['customer_ids'][0], 'bus_id': bus['id'], 'seat_number': 3})
+    assert response.status_code == 201
+
+    fresh = client.get(url)
+    assert fresh.headers['X-Cache'] == 'MISS'
+    assert fresh.get_json()['pending_seats'] == [3]
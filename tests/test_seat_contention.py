@@ -0,0 +1,81 @@
+"""
+Many customers racing for the same seat: exactly one booking wins, the rest
+get 409, and the partial unique index leaves no duplicate active seat rows.
+"""
+import threading
+
+import pytest
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models.models import Booking, BookingStatus
+
+THREADS = 16
+
+
+def race(app, path, bodies):
+    """
+    POSTs each body to path from its own thread, all released at once.
+    Returns the status codes.
+    """
+    barrier = threading.Barrier(len(bodies))
+    statuses = [None] * len(bodies)
+
+    def post(i):
+        client = app.test_client(use_cookies=False)
+        barrier.wait()
+        statuses[i] = client.post(path, json=bodies[i]).status_code
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(len(bodies))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def duplicate_active_seats(app, bus_id):
+    with app.app_context():
+        return db.session.query(Booking.seat_number, func.count()).filter(
+            Booking.bus_id == bus_id,
+            Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED])
+        ).group_by(Booking.seat_number).having(func.count() > 1).all()
+
+
+def active_bookings(app, bus_id):
+    with app.app_context():
+        return Booking.query.filter(
+            Booking.bus_id == bus_id,
+            Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED])
+        ).all()
+
+
+def test_book_seat_same_seat_has_one_winner(app, bus):
+    bodies = [{'customer_id': customer_id, 'bus_id': bus['id'], 'seat_number': 7}
+              for customer_id in bus['customer_ids'][:THREADS]]
+
+    statuses = race(app, '/user/book_seat', bodies)
+
+    assert statuses.count(201) == 1
+    assert statuses.count(409) == THREADS - 1
+    assert duplicate_active_seats(app, bus['id']) == []
+    assert [booking.seat_number for booking in active_bookings(app, bus['id'])] == [7]
+
+
+@pytest.mark.parametrize('seat_numbers', [
+    lambda i: [7, 8],  # Identical selections
+    lambda i: [7, 9 + i],  # Overlapping on one seat, each with a seat nobody else wants
+])
+def test_book_multiple_seats_overlapping_orders_have_one_winner(app, bus, seat_numbers):
+    bodies = [{'customer_id': customer_id, 'bus_id': bus['id'], 'seat_numbers': seat_numbers(i)}
+              for i, customer_id in enumerate(bus['customer_ids'][:THREADS])]
+
+    statuses = race(app, '/api/bookings/multiple', bodies)
+
+    assert statuses.count(201) == 1
+    assert statuses.count(409) == THREADS - 1
+    assert duplicate_active_seats(app, bus['id']) == []
+    winner = bodies[statuses.index(201)]
+    bookings = active_bookings(app, bus['id'])
+    assert sorted(booking.seat_number for booking in bookings) == sorted(winner['seat_numbers'])
+    assert {booking.customer_id for booking in bookings} == {winner['customer_id']}
@@ -0,0 +1,89 @@
+"""
+The pending-booking sweeper expires old unpaid bookings in batches, frees
+their seats and leaves bookings with a payment under way alone.
+"""
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.models import Booking, BookingStatus, Bus, PaymentJob
+from app.utils import sweeper
+from app.utils.sweeper import sweep_pending_bookings
+
+# Bookings made "before" this are expired by sweep(); every other test's
+# bookings are recent and left alone.
+LONG_AGO = datetime(2000, 1, 1)
+
+
+def hold_minutes():
+    return int((datetime.utcnow() - datetime(2001, 1, 1)).total_seconds() // 60)
+
+
+def sweep(app, batch_size):
+    with app.app_context():
+        return sweep_pending_bookings(hold_minutes(), batch_size)
+
+
+def book_long_ago(app, client, bus, seat_numbers):
+    response = client.post('/api/bookings/multiple', json={
+        'customer_id': bus['customer_ids'][0], 'bus_id': bus['id'], 'seat_numbers': seat_numbers
+    })
+    assert response.status_code == 201
+    booking_ids = [booking['id'] for booking in response.get_json()['bookings']]
+    with app.app_context():
+        db.session.execute(update(Booking).where(Booking.id.in_(booking_ids)).values(booking_date=LONG_AGO))
+        db.session.commit()
+    return booking_ids
+
+
+def statuses(app, booking_ids):
+    with app.app_context():
+        return {booking.status for booking in Booking.query.filter(Booking.id.in_(booking_ids))}
+
+
+def test_sweep_expires_in_batches_and_frees_seats(app, bus, monkeypatch):
+    client = app.test_client(use_cookies=False)
+    old = book_long_ago(app, client, bus, [1, 2, 3, 4, 5])
+    client.post('/user/book_seat', json={'customer_id': bus['customer_ids'][1], 'bus_id': bus['id'], 'seat_number': 6})
+    batches = []
+    expire = sweeper.expire_pending_bookings
+
+    def recording_expire(cutoff, batch_size):
+        batches.append(expire(cutoff, batch_size))
+        return batches[-1]
+
+    monkeypatch.setattr(sweeper, 'expire_pending_bookings', recording_expire)
+
+    assert sweep(app, batch_size=2) == (5, 1)
+
+    assert [sum(len(seats) for seats in released.values()) for released in batches] == [2, 2, 1]
+    assert statuses(app, old) == {BookingStatus.CANCELED}
+    with app.app_context():
+        assert db.session.get(Bus, bus['id']).pending_seats == 1
+    seats = client.get(f'/buses/{bus["id"]}/seats').get_json()
+    assert seats['pending_seats'] == [6]
+
+
+def test_sweep_skips_bookings_with_a_queued_payment(app, bus):
+    client = app.test_client(use_cookies=False)
+    paying = book_long_ago(app, client, bus, [7])
+    unpaid = book_long_ago(app, client, bus, [8])
+    with app.app_context():
+        db.session.add(PaymentJob(booking_id=paying[0], amount=100, payment_method='M-Pesa'))
+        db.session.commit()
+
+    assert sweep(app, batch_size=10) == (1, 1)
+
+    assert statuses(app, paying) == {BookingStatus.PENDING}
+    assert statuses(app, unpaid) == {BookingStatus.CANCELED}
+
+
+def test_expire_bookings_command(app, bus):
+    client = app.test_client(use_cookies=False)
+    book_long_ago(app, client, bus, [9, 10])
+
+    result = app.test_cli_runner().invoke(args=['expire-bookings', '--hold-minutes', str(hold_minutes()), '--batch-size', '1'])
+
+    assert result.exit_code == 0
+    assert 'Released 2 seats on 1 buses' in result.output